@@ -0,0 +1,67 @@
+"""
+    event count and simulation throughput of every routing x channel backend combination
+    (see topology_builder.h), one fresh process per combination.
+
+        python bench/backends.py --backbone 10 30 --infra 3 --duration 20
+
+    prints a markdown table: ns-3 events, Simulator::Run wall time, events per second,
+    simulated seconds per wall second, and the MAC bytes received (rxSum), which shows how
+    much of the traffic each backend still carries.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+
+_CHILD = """
+import json, sys
+params = json.loads(sys.argv[1])
+import generator
+generator.initialize_cpp()
+result, report = generator.MixedWireless(result_format="windows", profile=True, seed=1, **params)
+print(json.dumps({
+    "events": report["events_executed"],
+    "run": report["phases"]["run"]["wall"],
+    "rx_bytes": float(result["rxSum"].sum()),
+}))
+"""
+
+
+def measure(params):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC_DIR, env.get("PYTHONPATH")]))
+    out = subprocess.check_output([sys.executable, "-c", _CHILD, json.dumps(params)], env=env, text=True)
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backbone", type=int, nargs="+", default=[10, 30])
+    parser.add_argument("--infra", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--routing", nargs="+", default=["olsr", "aodv", "global"])
+    parser.add_argument("--channel", nargs="+", default=["yans", "spectrum", "cutoff"])
+    parser.add_argument("--cutoff-range", type=float, default=250.0)
+    args = parser.parse_args()
+
+    print("| backbone | routing | channel | events executed | run (s) | events/s | sim-s/s | MAC rx bytes |")
+    print("|---|---|---|---|---|---|---|---|")
+    for backbone, routing, channel in itertools.product(args.backbone, args.routing, args.channel):
+        params = {"numofbackbone": backbone, "numofInfra": args.infra, "numofLan": 1,
+                  "duration": args.duration, "sampleCts": 7, "routing": routing,
+                  "channel": channel, "cutoff_range": args.cutoff_range}
+        m = measure(params)
+        print("| %d | %s | %s | %d | %.2f | %.0f | %.1f | %.0f |" % (
+            backbone, routing, channel, m["events"], m["run"], m["events"] / m["run"],
+            args.duration / m["run"], m["rx_bytes"]))
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+    accuracy of the cost model, learning online over a grid of MixedWireless runs.
+
+    the scenarios run in one warm process, in a shuffled order. before each run the
+    model predicts its wall time, events and memory, then learns from its report, so
+    the error of late runs shows what a sweep gets once the model has seen some of it.
+    --records keeps the observed costs; --fit refits cost_model.PRIOR from them.
+
+        python bench/cost_model.py --backbone 3 5 10 --infra 2 3 5 --duration 10 30 60 --records costs.json
+        python bench/cost_model.py --fit costs.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+sys.path.insert(0, SRC_DIR)
+
+import cost_model  # noqa: E402
+from sweep import make_grid  # noqa: E402
+
+
+def log_errors(predicted, observed):
+    return {name: abs(np.log(getattr(predicted, name) / getattr(observed, name)))
+            for name in cost_model.COSTS if getattr(observed, name)}
+
+
+def summarize(label, errors):
+    if not errors:
+        return
+    parts = ["%s x%.2f" % (name, np.exp(np.median([e[name] for e in errors if name in e])))
+             for name in cost_model.COSTS]
+    print("%-28s median error factor: %s" % (label, "  ".join(parts)))
+
+
+def fit(records):
+    # the data alone, with just enough ridge to pin the features it does not vary
+    model = cost_model.CostModel(prior={name: [0.0] * len(cost_model.FEATURES) for name in cost_model.COSTS},
+                                 prior_weight=1e-3)
+    for record in records:
+        model.update(record["scenario"], cost_model.Cost(**record["cost"]))
+    for name in cost_model.COSTS:
+        print('    "%s": [%s],' % (name, ", ".join("%.3g" % c for c in model.coefficients(name))))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backbone", type=int, nargs="+", default=[3, 5, 10])
+    parser.add_argument("--infra", type=int, nargs="+", default=[2, 3, 5])
+    parser.add_argument("--duration", type=float, nargs="+", default=[10, 30, 60])
+    parser.add_argument("--backends", action="store_true", help="also run aodv, global and spectrum")
+    parser.add_argument("--records", default=None, help="write the observed costs here")
+    parser.add_argument("--fit", default=None, help="print PRIOR refitted from a --records file")
+    args = parser.parse_args()
+
+    if args.fit:
+        with open(args.fit) as f:
+            fit(json.load(f))
+        return
+
+    grid = make_grid(args.backbone, args.infra, args.duration, [7], seed=[1])
+    if args.backends:
+        grid += [dict(s, routing=r) for s in grid[::3] for r in ("aodv", "global")]
+        grid += [dict(s, channel="spectrum") for s in grid[1::3]]
+    random.Random(1).shuffle(grid)
+
+    import generator
+    generator.initialize_cpp()
+    prior = cost_model.CostModel()
+    model = cost_model.CostModel()
+    records, prior_errors, online_errors = [], [], []
+    start = time.perf_counter()
+    for scenario in grid:
+        predicted = model.predict(scenario)
+        _, report = generator.MixedWireless(**dict(scenario, profile=True, result_format="windows"))
+        observed = cost_model.report_costs(report)
+        prior_errors.append(log_errors(prior.predict(scenario), observed))
+        online_errors.append(log_errors(predicted, observed))
+        model.observe(scenario, report)
+        records.append({"scenario": scenario, "cost": observed._asdict()})
+        print("%-60s wall %6.2fs (predicted %6.2fs)  events %8d  heap %6.1f MB" % (
+            json.dumps({k: v for k, v in scenario.items() if k not in ("numofLan", "sampleCts", "seed")}),
+            observed.wall, predicted.wall, observed.events, observed.memory_mb))
+    print("%d runs in %.0fs" % (len(grid), time.perf_counter() - start))
+
+    half = len(grid) // 2
+    summarize("prior only", prior_errors)
+    summarize("online, first half", online_errors[:half])
+    summarize("online, second half", online_errors[half:])
+    if args.records:
+        with open(args.records, "w") as f:
+            json.dump(records, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+    import-to-first-Simulator::Run time, JIT vs prebuilt tracker library.
+
+    every measurement is a fresh interpreter, since that is the cost each sweep worker
+    or service process pays once. build the library first (src/build_tracker.py).
+
+        python bench/init_time.py --repeat 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+
+_CHILD = """
+import time
+start = time.perf_counter()
+import generator
+imported = time.perf_counter()
+generator.initialize_cpp()
+initialized = time.perf_counter()
+generator.ns.Simulator.Stop(generator.ns.Seconds(1))
+generator.ns.Simulator.Run()
+ran = time.perf_counter()
+generator.ns.Simulator.Destroy()
+import json
+print(json.dumps({
+    "backend": generator.cpp_init_info["backend"],
+    "import": imported - start,
+    "initialize_cpp": initialized - imported,
+    "first_run": ran - start,
+}))
+"""
+
+
+def measure(force_jit):
+    env = dict(os.environ)
+    env["NS3_GEN_FORCE_JIT"] = "1" if force_jit else "0"
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC_DIR, env.get("PYTHONPATH")]))
+    out = subprocess.check_output([sys.executable, "-c", _CHILD], env=env, text=True)
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    summary = {}
+    for force_jit in (True, False):
+        runs = [measure(force_jit) for _ in range(args.repeat)]
+        backend = runs[0]["backend"]
+        summary[backend] = {
+            key: statistics.median(run[key] for run in runs)
+            for key in ("import", "initialize_cpp", "first_run")
+        }
+        print("%-4s import %.3fs  initialize_cpp %.3fs  import->first Run %.3fs" % (
+            backend, summary[backend]["import"], summary[backend]["initialize_cpp"],
+            summary[backend]["first_run"]))
+
+    if "aot" in summary and "jit" in summary:
+        saved = summary["jit"]["first_run"] - summary["aot"]["first_run"]
+        print("prebuilt library saves %.3fs (%.0f%%) per process" % (
+            saved, 100.0 * saved / summary["jit"]["first_run"]))
+    else:
+        print("prebuilt library not used, run src/build_tracker.py first")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+    cost of interferers as their number grows, raw-PHY transmitters against full nodes
+    (see interference/interference_models.h), one fresh process per point.
+
+        python bench/interferers.py --count 0 5 20 50 --duty-cycle 0.2 --backbone 3 --infra 3
+
+    prints a markdown table: ns-3 events, Simulator::Run wall time, wall time relative to
+    the run without interferers, and the phy receive errors the interference caused.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+
+_CHILD = """
+import json, sys
+params = json.loads(sys.argv[1])
+import generator
+generator.initialize_cpp()
+result, report = generator.MixedWireless(result_format="windows", profile=True, seed=1, **params)
+print(json.dumps({
+    "events": report["events_executed"],
+    "run": report["phases"]["run"]["wall"],
+    "rx_errors": int(result["rxErrorCount"].sum()),
+}))
+"""
+
+
+def measure(params):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC_DIR, env.get("PYTHONPATH")]))
+    out = subprocess.check_output([sys.executable, "-c", _CHILD, json.dumps(params)], env=env, text=True)
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, nargs="+", default=[0, 5, 20, 50])
+    parser.add_argument("--kind", nargs="+", default=["phy", "node"])
+    parser.add_argument("--duty-cycle", type=float, default=0.2)
+    parser.add_argument("--backbone", type=int, default=3)
+    parser.add_argument("--infra", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--channel", default="yans")
+    args = parser.parse_args()
+
+    base = {"numofbackbone": args.backbone, "numofInfra": args.infra, "numofLan": 1,
+            "duration": args.duration, "sampleCts": 7, "channel": args.channel}
+    quiet = measure(base)
+
+    print("| interferers | kind | events executed | run (s) | x no interferers | phy rx errors |")
+    print("|---|---|---|---|---|---|")
+    print("| 0 | - | %d | %.2f | 1.0 | %d |" % (quiet["events"], quiet["run"], quiet["rx_errors"]))
+    for count in args.count:
+        if count == 0:
+            continue
+        for kind in args.kind:
+            m = measure(dict(base, interferers=count, interferer_kind=kind,
+                             interferer_duty_cycle=args.duty_cycle))
+            print("| %d | %s | %d | %.2f | %.1f | %d |" % (
+                count, kind, m["events"], m["run"], m["run"] / quiet["run"], m["rx_errors"]))
+            sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+    ns-3 events and wall time of MixedWireless with mobility="random" against "waypoint".
+
+    every grid point runs --seeds seeds in both modes in one warm process. the two modes
+    draw different trajectories, so the traffic, and the events it makes, differ from
+    seed to seed; the means over seeds are compared. the mobility events "waypoint"
+    saves are counted exactly: every waypoint after the first is a leg end or a pause
+    end at which RandomDirection2dMobilityModel would have run an event. the time to
+    draw the trajectories is reported cold and from the cache.
+
+        python bench/mobility.py --backbone 10 20 --infra 5 10 --duration 30 --seeds 3
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+sys.path.insert(0, SRC_DIR)
+
+import mobility  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backbone", type=int, nargs="+", default=[10, 20])
+    parser.add_argument("--infra", type=int, nargs="+", default=[5, 10])
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--seeds", type=int, default=3)
+    args = parser.parse_args()
+
+    import generator
+    generator.initialize_cpp()
+    print("%-10s %6s %-9s %10s %10s %8s %12s" % ("network", "nodes", "mobility", "events", "run wall", "legs", "draw"))
+    for backbone, infra in itertools.product(args.backbone, args.infra):
+        nodes = backbone * infra
+        for mode in generator.MOBILITY_MODELS:
+            events, walls, legs, draws = [], [], [], []
+            for seed in range(1, args.seeds + 1):
+                if mode == "waypoint":
+                    start = time.perf_counter()
+                    paths = mobility.trajectories(backbone, infra, args.duration, seed)
+                    cold = time.perf_counter() - start
+                    start = time.perf_counter()
+                    mobility.trajectories(backbone, infra, args.duration, seed)
+                    draws.append((cold, time.perf_counter() - start))
+                    legs.append(int(((paths.times > 0) & (paths.times < args.duration * 1e9)).sum()))
+                _, report = generator.MixedWireless(backbone, infra, 1, args.duration, 7, seed=seed,
+                                                    result_format="windows", profile=True, mobility=mode)
+                events.append(report["events_executed"])
+                walls.append(report["phases"]["run"]["wall"])
+            print("%-10s %6d %-9s %10.0f %9.2fs %8s %12s" % (
+                "%dx%d" % (backbone, infra), nodes, mode, np.mean(events), np.mean(walls),
+                "%.0f" % np.mean(legs) if legs else "",
+                "%.0f/%.2f ms" % tuple(1e3 * np.mean(draws, axis=0)) if draws else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+    samples per CPU-second: one MixedWireless run per sample vs MultiSampleMixedWireless,
+    which builds and warms the network once and takes every sample from the same run.
+
+    a MixedWireless sample carries duration - 4 s of traffic (the app runs from 3 s to
+    duration - 1 s), so the multi-sample segments are given the same length.
+
+        python bench/samples_per_cpu.py --backbone 10 --infra 3 --duration 20 --samples 8
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src"))
+
+import generator
+
+
+def report(label, samples, windows, cpu):
+    print("%-8s %3d samples %5d windows %7.2f cpu-s  %6.3f samples/cpu-s  %7.2f windows/cpu-s"
+          % (label, samples, windows, cpu, samples / cpu, windows / cpu))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backbone", type=int, default=10)
+    parser.add_argument("--infra", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--sampleCts", type=float, default=7)
+    parser.add_argument("--samples", type=int, default=8)
+    parser.add_argument("--gap", type=float, default=1.0)
+    args = parser.parse_args()
+
+    # the one-off import and JIT cost is the same for both, keep it out of the numbers
+    generator.initialize_cpp()
+
+    start = time.process_time()
+    windows = 0
+    for seed in range(1, args.samples + 1):
+        result = generator.MixedWireless(args.backbone, args.infra, 1, args.duration, args.sampleCts,
+                                         seed=seed, result_format="windows")
+        windows += len(result)
+    report("per-run", args.samples, windows, time.process_time() - start)
+
+    start = time.process_time()
+    results = generator.MultiSampleMixedWireless(args.backbone, args.infra, 1, args.sampleCts, args.samples,
+                                                 segment=args.duration - 4, gap=args.gap, seed=1,
+                                                 result_format="windows")
+    report("multi", len(results), sum(len(r) for r in results), time.process_time() - start)
+
+
+if __name__ == "__main__":
+    main()
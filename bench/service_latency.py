@@ -0,0 +1,106 @@
+"""
+    request latency of the generation service against a cold process per request.
+
+    the service runs with --workers warm workers on a Unix socket; --requests requests
+    are sent by --concurrency client threads. latency is from sending the request to the
+    first streamed window and to the last line. a cold request is a fresh interpreter
+    importing generator, calling initialize_cpp() and running MixedWireless, which is
+    what every request costs without the service.
+
+        python bench/service_latency.py --workers 2 --requests 20 --concurrency 2 --cold 5
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+sys.path.insert(0, SRC_DIR)
+
+import generation_service  # noqa: E402
+
+
+_COLD = """
+import json, sys
+import generator
+generator.initialize_cpp()
+generator.MixedWireless(**json.loads(sys.argv[1]))
+"""
+
+
+def percentiles(values):
+    return "p50 %7.3fs  p99 %7.3fs" % (np.percentile(values, 50), np.percentile(values, 99))
+
+
+def warm_request(address, params):
+    start = time.perf_counter()
+    first = None
+    for line in generation_service.request(address, params):
+        if first is None:
+            first = time.perf_counter() - start
+        if "error" in line:
+            raise RuntimeError(line["error"])
+    return first, time.perf_counter() - start
+
+
+def cold_request(params, env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", _COLD, json.dumps(params)], env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--cold", type=int, default=3, help="cold runs to compare with")
+    parser.add_argument("--backbone", type=int, default=3)
+    parser.add_argument("--infra", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+
+    params = {"numofbackbone": args.backbone, "numofInfra": args.infra, "numofLan": 1,
+              "duration": args.duration, "sampleCts": 7, "seed": 1}
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC_DIR, env.get("PYTHONPATH")]))
+    address = os.path.join(tempfile.mkdtemp(), "service.sock")
+
+    server = subprocess.Popen([sys.executable, os.path.join(SRC_DIR, "generation_service.py"),
+                               "--unix", address, "--workers", str(args.workers),
+                               "--queue-size", str(max(16, args.requests))], env=env,
+                              stderr=subprocess.DEVNULL)
+    try:
+        start = time.perf_counter()
+        while not os.path.exists(address):
+            if server.poll() is not None:
+                raise RuntimeError("the service exited with %d" % (server.returncode,))
+            time.sleep(0.05)
+        print("service up with %d warm workers in %.2fs" % (args.workers, time.perf_counter() - start))
+
+        with concurrent.futures.ThreadPoolExecutor(args.concurrency) as pool:
+            warm = list(pool.map(lambda _: warm_request(address, params), range(args.requests)))
+        print("warm, %d requests x%d: first window %s" % (
+            args.requests, args.concurrency, percentiles([w[0] for w in warm])))
+        print("                      complete     %s" % (percentiles([w[1] for w in warm]),))
+        print("service status", json.dumps(generation_service.status(address)))
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.cold:
+        cold = [cold_request(params, env) for _ in range(args.cold)]
+        print("cold, %d requests:    complete     %s" % (args.cold, percentiles(cold)))
+        print("warm saves %.2fs at the median" % (np.median(cold) - np.median([w[1] for w in warm]),))
+
+
+if __name__ == "__main__":
+    main()
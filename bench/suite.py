@@ -0,0 +1,172 @@
+"""
+    per-phase timings of a MixedWireless run over a grid of scenario sizes.
+
+    every grid point runs in a fresh interpreter, so initialize_cpp() is measured as every
+    new process pays it and the peak RSS belongs to that scenario alone. the phases are
+    the ones MixedWireless goes through: initialize_cpp, build (topology and traffic),
+    connect (trace sources), run (Simulator::Run), extract (detaching the windows) and
+    field_mapping (the legacy dict). with --repeat the median of every number is kept.
+
+        python bench/suite.py --backbone 3 10 20 --infra 3 5 --duration 20 60 --output suite.json
+        python bench/suite.py ... --output new.json --baseline suite.json
+
+    --baseline prints the wall time of every phase relative to an earlier output file.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+
+PHASES = ("initialize_cpp", "build", "connect", "run", "extract", "field_mapping")
+
+_CHILD = """
+import json, resource, sys, time
+params = json.loads(sys.argv[1])
+import generator
+from generator import ns
+from results import WindowResult
+
+phases = {}
+def phase(name, start):
+    now = time.perf_counter()
+    phases[name] = now - start
+    return now
+
+t = time.perf_counter()
+generator.initialize_cpp()
+t = phase("initialize_cpp", t)
+timeWindow = generator._start_run(params["sampleCts"], params["seed"])
+tempRef = generator._build_scenario(params["numofbackbone"], params["numofInfra"], 1, params["duration"],
+                                    params["topology_builder"])
+t = phase("build", t)
+generator._connect_traces(params["trace_mode"])
+t = phase("connect", t)
+ns.Simulator.Stop(ns.Seconds(params["duration"]))
+ns.Simulator.Run()
+ns.cppyy.gbl.FlushStatisticTracker()
+t = phase("run", t)
+events = int(ns.Simulator.GetEventCount())
+result = WindowResult.from_buffer(ns.cppyy.gbl.DetachWindowMetrics(), timeWindow)
+t = phase("extract", t)
+result.field_mapping()
+t = phase("field_mapping", t)
+windows = len(result)
+ns.Simulator.Destroy()
+
+print(json.dumps({
+    "phases": phases,
+    "events": events,
+    "windows": windows,
+    "backend": generator.cpp_init_info["backend"],
+    # kilobytes on linux
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+}))
+"""
+
+
+def measure(params):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC_DIR, env.get("PYTHONPATH")]))
+    out = subprocess.check_output([sys.executable, "-c", _CHILD, json.dumps(params)], env=env, text=True)
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def run_point(params, repeat):
+    runs = [measure(params) for _ in range(repeat)]
+    phases = {name: statistics.median(run["phases"][name] for run in runs) for name in PHASES}
+    run_wall = phases["run"]
+    return {
+        "params": params,
+        "backend": runs[0]["backend"],
+        "phases": phases,
+        "total": sum(phases.values()),
+        "events": runs[0]["events"],
+        "windows": runs[0]["windows"],
+        "events_per_sec": runs[0]["events"] / run_wall,
+        "sim_seconds_per_wall_second": params["duration"] / run_wall,
+        "peak_rss_mb": statistics.median(run["peak_rss_mb"] for run in runs),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=SRC_DIR,
+                                       text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _point_key(params):
+    return tuple(sorted(params.items()))
+
+
+def compare(points, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {_point_key(p["params"]): p for p in json.load(f)["points"]}
+    print("\nrelative to %s (new / old wall time, < 1 is faster)" % baseline_path)
+    for point in points:
+        old = baseline.get(_point_key(point["params"]))
+        if old is None:
+            continue
+        ratios = ["%s %.2f" % (name, point["phases"][name] / old["phases"][name])
+                  for name in PHASES if old["phases"].get(name)]
+        print("%-24s total %.2f  %s" % (_label(point["params"]), point["total"] / old["total"], "  ".join(ratios)))
+
+
+def _label(params):
+    return "b=%d i=%d d=%g" % (params["numofbackbone"], params["numofInfra"], params["duration"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backbone", type=int, nargs="+", default=[3, 10])
+    parser.add_argument("--infra", type=int, nargs="+", default=[3])
+    parser.add_argument("--duration", type=float, nargs="+", default=[20, 60])
+    parser.add_argument("--sampleCts", type=float, default=7)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--trace-mode", default="context")
+    parser.add_argument("--topology-builder", default="native")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", default="bench-suite.json")
+    parser.add_argument("--baseline", default=None, help="an earlier --output file to compare with")
+    args = parser.parse_args()
+
+    points = []
+    for backbone, infra, duration in itertools.product(args.backbone, args.infra, args.duration):
+        params = {"numofbackbone": backbone, "numofInfra": infra, "duration": duration,
+                  "sampleCts": args.sampleCts, "seed": args.seed, "trace_mode": args.trace_mode,
+                  "topology_builder": args.topology_builder}
+        point = run_point(params, args.repeat)
+        points.append(point)
+        print("%-24s %s  %9.0f events/s %7.2f sim-s/s %7.1f MB" % (
+            _label(params),
+            " ".join("%s %.3f" % (name, point["phases"][name]) for name in PHASES),
+            point["events_per_sec"], point["sim_seconds_per_wall_second"], point["peak_rss_mb"]))
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "commit": _git_commit(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+            "points": points,
+        }, f, indent=1)
+    print("wrote", args.output)
+
+    if args.baseline:
+        compare(points, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
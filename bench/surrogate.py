@@ -0,0 +1,67 @@
+"""
+    fidelity and speed of the surrogate generator against MixedWireless.
+
+    --fit seeds of one scenario class are simulated and the surrogate is fitted to them;
+    --holdout more seeds are simulated and compared with surrogate windows field by field
+    (surrogate.validation_report). the speed is windows per second of the simulation
+    against surrogate.sample() of --runs runs at once.
+
+        python bench/surrogate.py --backbone 3 --infra 3 --duration 60 --fit 20 --holdout 10
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+sys.path.insert(0, SRC_DIR)
+
+import surrogate  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backbone", type=int, default=3)
+    parser.add_argument("--infra", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--sampleCts", type=int, default=7)
+    parser.add_argument("--fit", type=int, default=20, help="simulated runs to fit to")
+    parser.add_argument("--holdout", type=int, default=10, help="simulated runs to validate against")
+    parser.add_argument("--runs", type=int, default=10000, help="surrogate runs sampled at once")
+    args = parser.parse_args()
+
+    import generator
+    generator.initialize_cpp()
+    scenario = dict(numofbackbone=args.backbone, numofInfra=args.infra, numofLan=1, sampleCts=args.sampleCts)
+
+    start = time.perf_counter()
+    results = [generator.MixedWireless(duration=args.duration, seed=seed, result_format="windows", **scenario)
+               for seed in range(1, args.fit + args.holdout + 1)]
+    simulated = time.perf_counter() - start
+    windows = sum(len(r) for r in results)
+    print("simulated %d runs, %d windows in %.1fs: %.0f windows/s" % (
+        len(results), windows, simulated, windows / simulated))
+
+    library = surrogate.SurrogateLibrary(tempfile.mkdtemp())
+    start = time.perf_counter()
+    model = library.fit(scenario, seeds=None, duration=args.duration, results=results[:args.fit])
+    print("fitted to %d runs in %.3fs, %d fields modelled, %d constant" % (
+        args.fit, time.perf_counter() - start, len(model.marginals), len(model.constants)))
+
+    length = len(results[0])
+    start = time.perf_counter()
+    model.sample(length, args.runs, seed=0)
+    sampled = time.perf_counter() - start
+    print("sampled %d runs, %d windows in %.2fs: %.0f windows/s, x%.0f the simulation" % (
+        args.runs, args.runs * length, sampled, args.runs * length / sampled,
+        (args.runs * length / sampled) / (windows / simulated)))
+
+    report = surrogate.validation_report(model, results[args.fit:], runs=args.runs)
+    print("against %d held-out runs, windows past the %d warm-up windows:" % (args.holdout, model.first_window))
+    print(surrogate.format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+    topology setup time, the python helper-by-helper loop vs BuildMixedTopology.
+
+    each measurement is a fresh interpreter: "cold" is the first build in the process
+    (cppyy still has to bind every helper method the python builder touches), "warm" a
+    second build after Simulator::Destroy, as in a reused sweep worker.
+
+        python bench/topology_build.py --backbone 10 50 200 --infra 3
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+
+_CHILD = """
+import contextlib, io, json, sys, time
+backbone, infra, builder = int(sys.argv[1]), int(sys.argv[2]), sys.argv[3]
+import generator
+from generator import ns
+generator.initialize_cpp()
+times = []
+for _ in range(2):
+    generator._start_run(7, 1)
+    start = time.perf_counter()
+    # the python builder prints a line per backbone node, keep that out of the timing
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator._build_topology(backbone, infra, 1, builder)
+    times.append(time.perf_counter() - start)
+    nodes = int(ns.NodeList.GetNNodes())
+    ns.Simulator.Destroy()
+print(json.dumps({"cold": times[0], "warm": times[1], "nodes": nodes}))
+"""
+
+
+def measure(backbone, infra, builder):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC_DIR, env.get("PYTHONPATH")]))
+    out = subprocess.check_output([sys.executable, "-c", _CHILD, str(backbone), str(infra), builder],
+                                  env=env, text=True)
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backbone", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--infra", type=int, default=3)
+    args = parser.parse_args()
+
+    for backbone in args.backbone:
+        python = measure(backbone, args.infra, "python")
+        native = measure(backbone, args.infra, "native")
+        print("backbone %4d (%5d nodes)  cold: python %.3fs native %.3fs (x%.1f)  "
+              "warm: python %.3fs native %.3fs (x%.1f)" % (
+                  backbone, native["nodes"], python["cold"], native["cold"], python["cold"] / native["cold"],
+                  python["warm"], native["warm"], python["warm"] / native["warm"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+    per-packet cost of the MAC trace callbacks, Config.Connect with a context string vs
+    the per-device callbacks bound to a device index (trace_mode="device").
+
+    the micro benchmark fires a TracedCallback the way MacRx does, once connected with a
+    context (ns-3 copies the context string into every call) and once connected without
+    one. --scenario also runs a whole MixedWireless scenario in both modes.
+
+        python bench/trace_callback_cost.py --packets 2000000 --scenario 10 3 30
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src"))
+
+import generator
+from generator import ns
+
+
+_BENCH_CPP = """
+#include "ns3/traced-callback.h"
+#include <chrono>
+
+// a realistic context, long enough to defeat the small string optimization
+static const char* kBenchContext = "/NodeList/12/DeviceList/1/$ns3::WifiNetDevice/Mac/MacRx";
+
+double BenchTraceCallback(uint64_t packets, bool perDevice) {
+    TracedCallback<Ptr<const Packet>> source;
+    if (perDevice) {
+        InitializeDeviceTrackers(1);
+        source.ConnectWithoutContext(MakeBoundCallback(&DeviceRxTraceCallback, (uint32_t) 0));
+    } else {
+        source.Connect(MakeCallback(&DevRxTraceCallback), kBenchContext);
+    }
+    Ptr<const Packet> packet = Create<Packet>(1024);
+
+    auto start = std::chrono::steady_clock::now();
+    for (uint64_t i = 0; i < packets; i++) {
+        source(packet);
+    }
+    std::chrono::duration<double, std::nano> elapsed = std::chrono::steady_clock::now() - start;
+    return elapsed.count() / packets;
+}
+"""
+
+
+def micro(packets, repeat):
+    generator.initialize_cpp()
+    ns.cppyy.cppdef(_BENCH_CPP)
+    for label, per_device in (("context", False), ("device", True)):
+        costs = []
+        for _ in range(repeat):
+            ns.cppyy.gbl.InitializeStatisticTracker(1.0)
+            costs.append(ns.cppyy.gbl.BenchTraceCallback(packets, per_device))
+        print("%-8s %7.1f ns/packet (best of %d, %d packets)" % (label, min(costs), repeat, packets))
+
+
+def scenario(numofbackbone, numofInfra, duration):
+    # the first run of a process pays ~0.5s of warm-up that would go to whichever mode is first
+    generator.MixedWireless(numofbackbone, numofInfra, 1, duration, 7, seed=1, result_format="windows")
+    for mode in generator.TRACE_MODES:
+        start = time.perf_counter()
+        result = generator.MixedWireless(numofbackbone, numofInfra, 1, duration, 7,
+                                          seed=1, result_format="windows", trace_mode=mode)
+        elapsed = time.perf_counter() - start
+        packets = int(result['rxCount'].sum() + result['txCount'].sum())
+        print("%-8s %.2fs wall, %d windows, %d traced packets" % (mode, elapsed, len(result), packets))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packets", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scenario", type=float, nargs=3, metavar=("BACKBONE", "INFRA", "DURATION"))
+    args = parser.parse_args()
+
+    micro(args.packets, args.repeat)
+    if args.scenario:
+        backbone, infra, duration = args.scenario
+        scenario(int(backbone), int(infra), duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,211 @@
 // interference_models.cc
 #include "interference_models.h"
 
+#include <cmath>
+#include <sstream>
+
 namespace ns3 {
 
+// above any received power, so the channel drops frames for an interferer unseen
+static const double kDeafRxSensitivityDbm = 1000.0;
+// full-node interferers: their own subnet, addressed by node id, and a port nobody binds
+static const Ipv4Address kInterfererNetwork("172.16.0.0");
+static const Ipv4Mask kInterfererMask("255.255.0.0");
+static const uint16_t kInterfererPort = 9999;
+// MAC header, FCS, LLC/SNAP, IPv4 and UDP headers around a full-node interferer's payload
+static const uint32_t kUdpFrameOverhead = 24 + 4 + 8 + 20 + 8;
+
+static std::string BandName(WifiPhyBand band) {
+    switch (band) {
+    case WIFI_PHY_BAND_2_4GHZ:
+        return "BAND_2_4GHZ";
+    case WIFI_PHY_BAND_6GHZ:
+        return "BAND_6GHZ";
+    default:
+        return "BAND_5GHZ";
+    }
+}
+
+static WifiTxVector InterfererTxVector() {
+    WifiTxVector txVector;
+    txVector.SetMode(WifiMode(kInterfererMode));
+    txVector.SetPreambleType(WIFI_PREAMBLE_LONG);
+    txVector.SetChannelWidth(20);
+    txVector.SetTxPowerLevel(0);
+    return txVector;
+}
+
+// time on air of one interferer frame on the victim's band
+static Time InterfererAirtime(Ptr<WifiPhy> victim) {
+    return WifiPhy::CalculateTxDuration(kInterfererFrameBytes, InterfererTxVector(), victim->GetPhyBand());
+}
+
+// a node without any stack, kept at a random offset from the victim's node as it moves
+static Ptr<Node> CreateInterfererNode(Ptr<WifiPhy> victim, Ptr<UniformRandomVariable> uniform) {
+    double angle = uniform->GetValue(0.0, 2 * M_PI);
+    double radius = kInterfererRadius * std::sqrt(uniform->GetValue(0.0, 1.0));
+    Ptr<ConstantPositionMobilityModel> offset = CreateObject<ConstantPositionMobilityModel>();
+    offset->SetPosition(Vector(radius * std::cos(angle), radius * std::sin(angle), 0.0));
+
+    Ptr<HierarchicalMobilityModel> mobility = CreateObject<HierarchicalMobilityModel>();
+    mobility->SetChild(offset);
+    Ptr<MobilityModel> victimMobility = victim->GetDevice()->GetNode()->GetObject<MobilityModel>();
+    if (victimMobility) {
+        mobility->SetParent(victimMobility);
+    }
+
+    Ptr<Node> node = CreateObject<Node>();
+    node->AggregateObject(mobility);
+    return node;
+}
+
+// an adhoc wifi device on the victim's channel, standard and operating channel
+static Ptr<WifiNetDevice> InstallInterfererDevice(Ptr<WifiPhy> victim, Ptr<Node> node) {
+    WifiHelper wifi;
+    wifi.SetStandard(victim->GetStandard());
+    wifi.SetRemoteStationManager("ns3::ConstantRateWifiManager",
+                                 "DataMode", StringValue(kInterfererMode),
+                                 "ControlMode", StringValue(kInterfererMode));
+    WifiMacHelper mac;
+    mac.SetType("ns3::AdhocWifiMac");
+
+    const WifiPhyOperatingChannel& operating = victim->GetOperatingChannel();
+    std::ostringstream settings;
+    settings << "{" << +operating.GetNumber() << ", " << operating.GetWidth() << ", "
+             << BandName(victim->GetPhyBand()) << ", " << +operating.GetPrimaryChannelIndex(20) << "}";
+
+    NetDeviceContainer devices;
+    if (Ptr<YansWifiChannel> channel = DynamicCast<YansWifiChannel>(victim->GetChannel())) {
+        YansWifiPhyHelper phy;
+        phy.SetChannel(channel);
+        phy.Set("ChannelSettings", StringValue(settings.str()));
+        devices = wifi.Install(phy, mac, node);
+    } else if (Ptr<SpectrumChannel> channel = DynamicCast<SpectrumChannel>(victim->GetChannel())) {
+        SpectrumWifiPhyHelper phy;
+        phy.SetChannel(channel);
+        phy.Set("ChannelSettings", StringValue(settings.str()));
+        devices = wifi.Install(phy, mac, node);
+    } else {
+        NS_ABORT_MSG("interference needs a yans or spectrum channel");
+    }
+    return DynamicCast<WifiNetDevice>(devices.Get(0));
+}
+
+// hands a frame to the phy every airtime + gap, the gap exponential with the mean that
+// keeps the phy on the air dutyCycle of the time. the scheduled event holds the only
+// reference, the interferer lives as long as the simulation
+class RawPhyInterferer : public SimpleRefCount<RawPhyInterferer> {
+private:
+    Ptr<WifiPhy> phy;
+    Ptr<const WifiPsdu> psdu;
+    WifiTxVector txVector;
+    Time airtime;
+    Ptr<ExponentialRandomVariable> gap;
+
+public:
+    RawPhyInterferer(Ptr<WifiNetDevice> device, double dutyCycle) :
+            phy(device->GetPhy()),
+            txVector(InterfererTxVector()) {
+        phy->SetRxSensitivity(kDeafRxSensitivityDbm);
+
+        // addressed to itself: victims' MACs drop it after the phy has received it
+        WifiMacHeader header(WIFI_MAC_DATA);
+        header.SetAddr1(device->GetMac()->GetAddress());
+        header.SetAddr2(device->GetMac()->GetAddress());
+        header.SetAddr3(device->GetMac()->GetAddress());
+        header.SetDsNotFrom();
+        header.SetDsNotTo();
+        uint32_t payload = kInterfererFrameBytes - header.GetSerializedSize() - WIFI_MAC_FCS_LENGTH;
+        psdu = Create<WifiPsdu>(Create<Packet>(payload), header);
+
+        airtime = WifiPhy::CalculateTxDuration(psdu->GetSize(), txVector, phy->GetPhyBand());
+        gap = CreateObject<ExponentialRandomVariable>();
+        gap->SetAttribute("Mean", DoubleValue(airtime.GetSeconds() * (1.0 / dutyCycle - 1.0)));
+    }
+
+    // the first frame at a random point of one mean period, so interferers do not align
+    void Start(double dutyCycle, Ptr<UniformRandomVariable> uniform) {
+        Time first = Seconds(uniform->GetValue(0.0, airtime.GetSeconds() / dutyCycle));
+        Simulator::Schedule(first, &RawPhyInterferer::Send, Ptr<RawPhyInterferer>(this));
+    }
+
+    void Send() {
+        phy->Send(psdu, txVector);
+        Simulator::Schedule(airtime + Seconds(gap->GetValue()), &RawPhyInterferer::Send,
+                            Ptr<RawPhyInterferer>(this));
+    }
+};
+
+static void AddRawPhyInterferers(Ptr<WifiPhy> victim, uint32_t numInterferers, double dutyCycle) {
+    NS_ABORT_MSG_IF(dutyCycle <= 0.0 || dutyCycle > 1.0, "duty cycle " << dutyCycle << " not in (0, 1]");
+    Ptr<UniformRandomVariable> uniform = CreateObject<UniformRandomVariable>();
+    for (uint32_t i = 0; i < numInterferers; i++) {
+        Ptr<Node> node = CreateInterfererNode(victim, uniform);
+        Ptr<RawPhyInterferer> interferer = Create<RawPhyInterferer>(InstallInterfererDevice(victim, node), dutyCycle);
+        interferer->Start(dutyCycle, uniform);
+    }
+}
+
 NoiseInterferenceModel::NoiseInterferenceModel(double noiseFigure)
     : noiseFigure(noiseFigure) {}
 
-void NoiseInterferenceModel::Apply(Ptr<YansWifiPhy> phy) {
-    NS_LOG_UNCOND("Applying noise interference with noise figure: " << noiseFigure);
-    phy->Set("NoiseFigure", DoubleValue(noiseFigure));
+void NoiseInterferenceModel::Apply(Ptr<WifiPhy> phy) {
+    phy->SetRxNoiseFigure(noiseFigure);
 }
 
 TrafficInterferenceModel::TrafficInterferenceModel(uint32_t numInterferers, double trafficRate)
     : numInterferers(numInterferers), trafficRate(trafficRate) {}
 
-void TrafficInterferenceModel::Apply(Ptr<YansWifiPhy> phy) {
-    NS_LOG_UNCOND("Applying traffic interference with " << numInterferers << " interferers");
-    // Implementation for traffic-based interference
+void TrafficInterferenceModel::Apply(Ptr<WifiPhy> phy) {
+    // trafficRate bit/s of kInterfererFrameBytes frames keep the phy busy this much
+    double framesPerSecond = trafficRate / (8.0 * kInterfererFrameBytes);
+    double dutyCycle = std::min(1.0, framesPerSecond * InterfererAirtime(phy).GetSeconds());
+    if (dutyCycle > 0.0) {
+        AddRawPhyInterferers(phy, numInterferers, dutyCycle);
+    }
 }
 
-NumberInterferenceModel::NumberInterferenceModel(uint32_t numInterferers)
-    : numInterferers(numInterferers) {}
+NumberInterferenceModel::NumberInterferenceModel(uint32_t numInterferers, double dutyCycle)
+    : numInterferers(numInterferers), dutyCycle(dutyCycle) {}
 
-void NumberInterferenceModel::Apply(Ptr<YansWifiPhy> phy) {
-    NS_LOG_UNCOND("Applying number-based interference with " << numInterferers << " interferers");
-    // Implementation for number-based interference
+void NumberInterferenceModel::Apply(Ptr<WifiPhy> phy) {
+    AddRawPhyInterferers(phy, numInterferers, dutyCycle);
+}
+
+FullNodeInterferenceModel::FullNodeInterferenceModel(uint32_t numInterferers, double dutyCycle)
+    : numInterferers(numInterferers), dutyCycle(dutyCycle) {}
+
+void FullNodeInterferenceModel::Apply(Ptr<WifiPhy> phy) {
+    NS_ABORT_MSG_IF(dutyCycle <= 0.0 || dutyCycle > 1.0, "duty cycle " << dutyCycle << " not in (0, 1]");
+    Ptr<UniformRandomVariable> uniform = CreateObject<UniformRandomVariable>();
+    NodeContainer nodes;
+    NetDeviceContainer devices;
+    for (uint32_t i = 0; i < numInterferers; i++) {
+        Ptr<Node> node = CreateInterfererNode(phy, uniform);
+        nodes.Add(node);
+        devices.Add(InstallInterfererDevice(phy, node));
+    }
+    InternetStackHelper internet;
+    internet.Install(nodes);
+
+    // the same frames as the raw-PHY interferers, sent at the rate that fills dutyCycle
+    // of the air time (MAC backoff comes on top)
+    Time airtime = InterfererAirtime(phy);
+    uint32_t payload = kInterfererFrameBytes - kUdpFrameOverhead;
+    OnOffHelper onoff("ns3::UdpSocketFactory", InetSocketAddress(Ipv4Address::GetBroadcast(), kInterfererPort));
+    onoff.SetConstantRate(DataRate(uint64_t(dutyCycle * 8.0 * payload / airtime.GetSeconds())), payload);
+
+    for (uint32_t i = 0; i < nodes.GetN(); i++) {
+        Ptr<Node> node = nodes.Get(i);
+        Ptr<Ipv4> ipv4 = node->GetObject<Ipv4>();
+        int32_t interface = ipv4->AddInterface(devices.Get(i));
+        Ipv4Address address(kInterfererNetwork.Get() + node->GetId());
+        ipv4->AddAddress(interface, Ipv4InterfaceAddress(address, kInterfererMask));
+        ipv4->SetUp(interface);
+
+        ApplicationContainer apps = onoff.Install(node);
+        apps.Start(Seconds(uniform->GetValue(0.0, airtime.GetSeconds() / dutyCycle)));
+    }
 }
 
 // Factory implementations
@@ -36,8 +217,12 @@ std::unique_ptr<InterferenceModel> InterferenceModelFactory::CreateTrafficModel(
     return std::make_unique<TrafficInterferenceModel>(numInterferers, trafficRate);
 }
 
-std::unique_ptr<InterferenceModel> InterferenceModelFactory::CreateNumberModel(uint32_t numInterferers) {
-    return std::make_unique<NumberInterferenceModel>(numInterferers);
+std::unique_ptr<InterferenceModel> InterferenceModelFactory::CreateNumberModel(uint32_t numInterferers, double dutyCycle) {
+    return std::make_unique<NumberInterferenceModel>(numInterferers, dutyCycle);
+}
+
+std::unique_ptr<InterferenceModel> InterferenceModelFactory::CreateFullNodeModel(uint32_t numInterferers, double dutyCycle) {
+    return std::make_unique<FullNodeInterferenceModel>(numInterferers, dutyCycle);
 }
 
 } // namespace ns3
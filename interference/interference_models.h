@@ -1,15 +1,48 @@
 // interference_models.h
+//
+// interference applied around one victim phy (see SimulationManager). the interferers
+// join the victim's channel, whatever its kind (yans or spectrum), and follow the
+// victim's node around at a fixed random offset.
+//
+//   noise   raises the victim's receiver noise figure, no extra transmitters
+//   traffic numInterferers raw-PHY transmitters, each putting trafficRate bit/s of
+//           frames on the air
+//   number  numInterferers raw-PHY transmitters, each on the air dutyCycle of the time
+//   fullnode numInterferers complete nodes (MAC, IP stack, OnOff broadcast) on the air
+//           about dutyCycle of the time; the expensive reference the others replace
+//
+// a raw-PHY interferer is a wifi phy with an idle MAC and no IP stack. frames are handed
+// straight to WifiPhy::Send on a schedule of its own (no channel access, no backoff),
+// addressed to the interferer itself so no victim MAC passes them up. its receive
+// sensitivity is out of reach, so frames meant for it are dropped on arrival (by the
+// yans channel itself, by the phy's first check on spectrum): an interferer costs its
+// own transmissions and little else.
+//
+// interferers must be added after the tracker's traces are connected, so their devices
+// are not counted among the network's radios.
 #pragma once
 
+#include "ns3/applications-module.h"
 #include "ns3/core-module.h"
+#include "ns3/internet-module.h"
+#include "ns3/mobility-module.h"
+#include "ns3/network-module.h"
 #include "ns3/wifi-module.h"
 
+#include <memory>
+
 namespace ns3 {
 
+// frame length and rate of the interferers' transmissions
+static const uint32_t kInterfererFrameBytes = 1000;
+static const char* const kInterfererMode = "OfdmRate6Mbps";
+// interferers are placed uniformly in a disc of this radius (meters) around the victim
+static const double kInterfererRadius = 20.0;
+
 class InterferenceModel {
 public:
     virtual ~InterferenceModel() = default;
-    virtual void Apply(Ptr<YansWifiPhy> phy) = 0;
+    virtual void Apply(Ptr<WifiPhy> phy) = 0;
 };
 
 class NoiseInterferenceModel : public InterferenceModel {
@@ -17,24 +50,34 @@ private:
     double noiseFigure;
 public:
     NoiseInterferenceModel(double noiseFigure);
-    void Apply(Ptr<YansWifiPhy> phy) override;
+    void Apply(Ptr<WifiPhy> phy) override;
 };
 
 class TrafficInterferenceModel : public InterferenceModel {
 private:
     uint32_t numInterferers;
-    double trafficRate;
+    double trafficRate; // bit/s per interferer
 public:
     TrafficInterferenceModel(uint32_t numInterferers, double trafficRate);
-    void Apply(Ptr<YansWifiPhy> phy) override;
+    void Apply(Ptr<WifiPhy> phy) override;
 };
 
 class NumberInterferenceModel : public InterferenceModel {
 private:
     uint32_t numInterferers;
+    double dutyCycle;
+public:
+    NumberInterferenceModel(uint32_t numInterferers, double dutyCycle=0.1);
+    void Apply(Ptr<WifiPhy> phy) override;
+};
+
+class FullNodeInterferenceModel : public InterferenceModel {
+private:
+    uint32_t numInterferers;
+    double dutyCycle;
 public:
-    NumberInterferenceModel(uint32_t numInterferers);
-    void Apply(Ptr<YansWifiPhy> phy) override;
+    FullNodeInterferenceModel(uint32_t numInterferers, double dutyCycle=0.1);
+    void Apply(Ptr<WifiPhy> phy) override;
 };
 
 // Factory class to create interference models
@@ -42,7 +85,8 @@ class InterferenceModelFactory {
 public:
     static std::unique_ptr<InterferenceModel> CreateNoiseModel(double noiseFigure);
     static std::unique_ptr<InterferenceModel> CreateTrafficModel(uint32_t numInterferers, double trafficRate);
-    static std::unique_ptr<InterferenceModel> CreateNumberModel(uint32_t numInterferers);
+    static std::unique_ptr<InterferenceModel> CreateNumberModel(uint32_t numInterferers, double dutyCycle=0.1);
+    static std::unique_ptr<InterferenceModel> CreateFullNodeModel(uint32_t numInterferers, double dutyCycle=0.1);
 };
 
 } // namespace ns3
@@ -3,7 +3,7 @@
 
 namespace ns3 {
 
-SimulationManager::SimulationManager(Ptr<YansWifiPhy> phy)
+SimulationManager::SimulationManager(Ptr<WifiPhy> phy)
     : phy(phy) {}
 
 void SimulationManager::AddInterferenceModel(std::unique_ptr<InterferenceModel> model) {
@@ -20,4 +20,34 @@ void SimulationManager::ClearInterferenceModels() {
     interferenceModels.clear();
 }
 
+uint32_t AddAccessPointInterferers(uint32_t count, double dutyCycle, const std::string& kind) {
+    NS_ABORT_MSG_IF(kind != "phy" && kind != "node", "unknown interferer kind " << kind);
+    std::vector<Ptr<WifiPhy>> aps;
+    for (uint32_t n = 0; n < NodeList::GetNNodes(); n++) {
+        Ptr<Node> node = NodeList::GetNode(n);
+        for (uint32_t d = 0; d < node->GetNDevices(); d++) {
+            Ptr<WifiNetDevice> device = DynamicCast<WifiNetDevice>(node->GetDevice(d));
+            if (device && DynamicCast<ApWifiMac>(device->GetMac())) {
+                aps.push_back(device->GetPhy());
+            }
+        }
+    }
+    NS_ABORT_MSG_IF(count > 0 && aps.empty(), "no access point to place interferers around");
+
+    uint32_t used = 0;
+    for (uint32_t i = 0; i < aps.size() && i < count; i++) {
+        // the first count % aps.size() access points get one more
+        uint32_t share = count / aps.size() + (i < count % aps.size() ? 1 : 0);
+        SimulationManager manager(aps[i]);
+        if (kind == "phy") {
+            manager.AddInterferenceModel(InterferenceModelFactory::CreateNumberModel(share, dutyCycle));
+        } else {
+            manager.AddInterferenceModel(InterferenceModelFactory::CreateFullNodeModel(share, dutyCycle));
+        }
+        manager.ApplyAllInterferenceModels();
+        used++;
+    }
+    return used;
+}
+
 } // namespace ns3
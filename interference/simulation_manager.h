@@ -2,6 +2,7 @@
 #pragma once
 
 #include "interference_models.h"
+#include <string>
 #include <vector>
 #include <memory>
 
@@ -10,14 +11,19 @@ namespace ns3 {
 class SimulationManager {
 private:
     std::vector<std::unique_ptr<InterferenceModel>> interferenceModels;
-    Ptr<YansWifiPhy> phy;
+    Ptr<WifiPhy> phy;
 
 public:
-    SimulationManager(Ptr<YansWifiPhy> phy);
+    SimulationManager(Ptr<WifiPhy> phy);
     
     void AddInterferenceModel(std::unique_ptr<InterferenceModel> model);
     void ApplyAllInterferenceModels();
     void ClearInterferenceModels();
 };
 
+// count interferers spread round robin over the access points of the nodes built so far
+// (the phys of ApWifiMac devices), kind "phy" (NumberInterferenceModel) or "node"
+// (FullNodeInterferenceModel). returns the number of access points they went to
+uint32_t AddAccessPointInterferers(uint32_t count, double dutyCycle, const std::string& kind="phy");
+
 } // namespace ns3
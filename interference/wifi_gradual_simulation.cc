@@ -1,9 +1,93 @@
 // wifi_gradual_simulation.cc
+//
+// one access point and its stations sending UDP to it, with the interference models
+// applied to the access point's phy. prints what the AP's phy received and the goodput,
+// run it with growing --numInterferers/--dutyCycle to see the network degrade.
+//
+//   g++ -std=c++20 -I<ns-3 include> wifi_gradual_simulation.cc interference_models.cc \
+//       simulation_manager.cc -L<ns-3 lib> -lns3.44-wifi -lns3.44-internet ...
+//   ./a.out --numInterferers=4 --dutyCycle=0.2
 #include "simulation_manager.h"
 #include "interference_models.h"
 
+#include <iostream>
+
+using namespace ns3;
+
+static uint64_t g_rxOk = 0;
+static uint64_t g_rxError = 0;
+
+static void PhyRxOk(Ptr<const Packet>, double, WifiMode, WifiPreamble) {
+    g_rxOk++;
+}
+
+static void PhyRxError(Ptr<const Packet>, double) {
+    g_rxError++;
+}
+
 int main(int argc, char* argv[]) {
-    // ... setup code ...
+    uint32_t numStations = 4;
+    double noiseFigure = 7.0;
+    uint32_t numInterferers = 2;
+    double trafficRate = 500e3;
+    double dutyCycle = 0.1;
+    double duration = 10.0;
+
+    CommandLine cmd(__FILE__);
+    cmd.AddValue("numStations", "stations sending to the access point", numStations);
+    cmd.AddValue("noiseFigure", "receiver noise figure of the access point (dB)", noiseFigure);
+    cmd.AddValue("numInterferers", "interferers of each kind around the access point", numInterferers);
+    cmd.AddValue("trafficRate", "bit/s sent by every traffic interferer", trafficRate);
+    cmd.AddValue("dutyCycle", "fraction of the time every number interferer is on the air", dutyCycle);
+    cmd.AddValue("duration", "simulated seconds", duration);
+    cmd.Parse(argc, argv);
+
+    NodeContainer ap;
+    ap.Create(1);
+    NodeContainer stations;
+    stations.Create(numStations);
+
+    YansWifiChannelHelper channel = YansWifiChannelHelper::Default();
+    YansWifiPhyHelper phyHelper;
+    phyHelper.SetChannel(channel.Create());
+
+    WifiHelper wifi;
+    wifi.SetRemoteStationManager("ns3::ConstantRateWifiManager", "DataMode", StringValue("OfdmRate54Mbps"));
+    WifiMacHelper mac;
+    Ssid ssid = Ssid("gradual");
+    mac.SetType("ns3::ApWifiMac", "Ssid", SsidValue(ssid));
+    NetDeviceContainer apDevices = wifi.Install(phyHelper, mac, ap);
+    mac.SetType("ns3::StaWifiMac", "Ssid", SsidValue(ssid));
+    NetDeviceContainer staDevices = wifi.Install(phyHelper, mac, stations);
+
+    MobilityHelper mobility;
+    mobility.SetPositionAllocator("ns3::RandomDiscPositionAllocator",
+                                  "Rho", StringValue("ns3::UniformRandomVariable[Min=0|Max=30]"));
+    mobility.SetMobilityModel("ns3::ConstantPositionMobilityModel");
+    mobility.Install(ap);
+    mobility.Install(stations);
+
+    InternetStackHelper internet;
+    internet.Install(ap);
+    internet.Install(stations);
+    Ipv4AddressHelper addresses;
+    addresses.SetBase("10.1.0.0", "255.255.255.0");
+    Ipv4InterfaceContainer apInterfaces = addresses.Assign(apDevices);
+    addresses.Assign(staDevices);
+
+    uint16_t port = 9;
+    PacketSinkHelper sinkHelper("ns3::UdpSocketFactory", InetSocketAddress(Ipv4Address::GetAny(), port));
+    ApplicationContainer sinks = sinkHelper.Install(ap);
+    sinks.Start(Seconds(0.5));
+    OnOffHelper onoff("ns3::UdpSocketFactory", InetSocketAddress(apInterfaces.GetAddress(0), port));
+    onoff.SetConstantRate(DataRate("2Mbps"), 1000);
+    ApplicationContainer sources = onoff.Install(stations);
+    sources.Start(Seconds(1.0));
+    sources.Stop(Seconds(duration));
+
+    Ptr<WifiPhy> phy = DynamicCast<WifiNetDevice>(apDevices.Get(0))->GetPhy();
+    phy->GetState()->TraceConnectWithoutContext("RxOk", MakeCallback(&PhyRxOk));
+    phy->GetState()->TraceConnectWithoutContext("RxError", MakeCallback(&PhyRxError));
 
     // Create simulation manager
     SimulationManager simManager(phy);
@@ -16,11 +100,18 @@ int main(int argc, char* argv[]) {
         InterferenceModelFactory::CreateTrafficModel(numInterferers, trafficRate)
     );
     simManager.AddInterferenceModel(
-        InterferenceModelFactory::CreateNumberModel(numInterferers)
+        InterferenceModelFactory::CreateNumberModel(numInterferers, dutyCycle)
     );
 
     // Apply all interference models
     simManager.ApplyAllInterferenceModels();
 
-    // ... rest of the simulation code ...
+    Simulator::Stop(Seconds(duration));
+    Simulator::Run();
+
+    uint64_t received = DynamicCast<PacketSink>(sinks.Get(0))->GetTotalRx();
+    std::cout << "ap phy rx ok " << g_rxOk << ", rx error " << g_rxError
+              << ", goodput " << received * 8.0 / (duration - 1.0) / 1e6 << " Mbit/s" << std::endl;
+    Simulator::Destroy();
+    return 0;
 }
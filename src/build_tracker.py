@@ -0,0 +1,183 @@
+"""
+    ahead-of-time build of the C++ side of the generator.
+
+    initialize_cpp() used to hand the whole tracker to the cppyy/Cling JIT in every new
+    process. this script compiles the same sources into libstatistic_tracker.so once;
+    initialize_cpp() then only parses the header and loads the library, and falls back to
+    the JIT when the library is missing or older than the sources, or when the ns-3 it
+    was linked against changed since: the build writes the ns-3 version and the ns-3
+    libraries it used to libstatistic_tracker.so.stamp, which must still match.
+
+        python src/build_tracker.py --ns3-dir ~/ns-3-dev
+
+    the ns-3 directory is the one holding build/include and build/lib (an installed tree
+    with include/ and lib/ works too). without --ns3-dir, $NS3_DIR is used, then the
+    location of the ns python bindings.
+"""
+
+import argparse
+import functools
+import glob
+import importlib.metadata
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# the interference models live next to their standalone example, outside src/
+INTERFERENCE_DIR = os.path.join(os.pardir, "interference")
+
+# relative to SRC_DIR; compiled in this order, and JIT-included in this order by the
+# fallback path
+CPP_SOURCES = ["statistic_tracker.cc", "phy_event_log.cc", "topology_builder.cc",
+               os.path.join(INTERFERENCE_DIR, "interference_models.cc"),
+               os.path.join(INTERFERENCE_DIR, "simulation_manager.cc")]
+CPP_HEADERS = ["statistic_tracker.h", "phy_event_log.h", "topology_builder.h",
+               os.path.join(INTERFERENCE_DIR, "interference_models.h"),
+               os.path.join(INTERFERENCE_DIR, "simulation_manager.h")]
+
+LIBRARY_PATH = os.environ.get("NS3_GEN_TRACKER_LIB", os.path.join(SRC_DIR, "libstatistic_tracker.so"))
+
+NS3_MODULES = ["core", "network", "internet", "wifi", "mobility", "propagation", "spectrum", "olsr", "aodv",
+               "applications"]
+
+
+def stamp_path(path=LIBRARY_PATH):
+    return path + ".stamp"
+
+
+def library_is_current(path=LIBRARY_PATH):
+    """
+        True when the prebuilt library exists, is newer than every C++ source, and its
+        stamp matches the ns-3 installed now: same version, same libraries unchanged
+    """
+    if not os.path.exists(path):
+        return False
+    built = os.path.getmtime(path)
+    for name in CPP_SOURCES + CPP_HEADERS:
+        if os.path.getmtime(os.path.join(SRC_DIR, name)) > built:
+            return False
+    try:
+        with open(stamp_path(path)) as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        # built before stamps, or by hand: nothing says which ns-3 it fits
+        return False
+    if stamp.get("ns3_version") != ns3_version():
+        return False
+    for lib, mtime in stamp.get("ns3_libraries", {}).items():
+        if not os.path.exists(lib) or os.path.getmtime(lib) != mtime:
+            return False
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def ns3_version():
+    """the installed ns-3 version, without importing the bindings, looked up once"""
+    try:
+        return importlib.metadata.version("ns3")
+    except importlib.metadata.PackageNotFoundError:
+        pass
+    # a source build: the version is in the name of its libraries
+    ns3_dir = _guess_ns3_dir()
+    if ns3_dir is not None:
+        try:
+            _, lib_dir = _ns3_paths(ns3_dir)
+            core = _ns3_libraries(lib_dir, "default")[0]
+            return os.path.basename(core).split("-")[0]
+        except SystemExit:
+            pass
+    return "unknown"
+
+
+def _guess_ns3_dir():
+    if os.environ.get("NS3_DIR"):
+        return os.environ["NS3_DIR"]
+    # find the bindings without importing them, importing ns loads every module
+    spec = importlib.util.find_spec("ns")
+    if spec is None or not spec.origin:
+        return None
+    path = os.path.dirname(spec.origin)
+    while path != os.path.dirname(path):
+        if os.path.isdir(os.path.join(path, "build", "include", "ns3")):
+            return path
+        # pip wheels install the bindings next to an ns3/ prefix
+        for candidate in (path, os.path.join(path, "ns3")):
+            if glob.glob(os.path.join(candidate, "include", "ns3*")) and glob.glob(os.path.join(candidate, "lib*")):
+                return candidate
+        path = os.path.dirname(path)
+    return None
+
+
+def _ns3_paths(ns3_dir):
+    for include_dir, lib_dir in (
+        (os.path.join(ns3_dir, "build", "include"), os.path.join(ns3_dir, "build", "lib")),
+        (os.path.join(ns3_dir, "include"), os.path.join(ns3_dir, "lib")),
+        (os.path.join(ns3_dir, "include"), os.path.join(ns3_dir, "lib64")),
+    ):
+        if os.path.isdir(include_dir) and os.path.isdir(lib_dir):
+            # installed trees put the headers under include/ns3.xx/ns3/...
+            versioned = sorted(glob.glob(os.path.join(include_dir, "ns3.*")))
+            if versioned and not os.path.isdir(os.path.join(include_dir, "ns3")):
+                include_dir = versioned[-1]
+            return include_dir, lib_dir
+    raise SystemExit("Error: no include/lib directories found under " + ns3_dir)
+
+
+def _ns3_libraries(lib_dir, profile):
+    libs = []
+    for module in NS3_MODULES:
+        # ns3 builds name them libns3.xx-<module>-<profile>.so, release installs drop the profile
+        found = sorted(glob.glob(os.path.join(lib_dir, "libns3*-%s-%s.so" % (module, profile))))
+        found = found or sorted(glob.glob(os.path.join(lib_dir, "libns3*-%s.so" % module)))
+        if not found:
+            raise SystemExit("Error: libns3*-%s-%s.so not found in %s" % (module, profile, lib_dir))
+        libs.append(found[-1])
+    return libs
+
+
+def build(ns3_dir, output=LIBRARY_PATH, profile="default", std="c++20", cxx=None, extra_flags=()):
+    include_dir, lib_dir = _ns3_paths(ns3_dir)
+    cmd = [cxx or os.environ.get("CXX", "g++"), "-shared", "-fPIC", "-O2", "-std=" + std,
+           "-I" + include_dir, "-I" + SRC_DIR]
+    # the debug profile is built with logging and asserts, the headers must agree
+    if profile == "debug":
+        cmd += ["-DNS3_LOG_ENABLE", "-DNS3_ASSERT_ENABLE"]
+    cmd += list(extra_flags)
+    cmd += [os.path.join(SRC_DIR, name) for name in CPP_SOURCES]
+    cmd += ["-o", output, "-Wl,-rpath," + lib_dir]
+    libs = _ns3_libraries(lib_dir, profile)
+    cmd += libs
+    print(" ".join(cmd))
+    subprocess.check_call(cmd)
+    # what the library was linked against, see library_is_current
+    with open(stamp_path(output), "w") as f:
+        json.dump({
+            "ns3_version": ns3_version(),
+            "ns3_dir": os.path.abspath(ns3_dir),
+            "ns3_libraries": {os.path.abspath(lib): os.path.getmtime(lib) for lib in libs},
+        }, f, indent=1)
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="prebuild the generator's C++ statistics library")
+    parser.add_argument("--ns3-dir", default=None, help="ns-3 source or install directory")
+    parser.add_argument("--profile", default="default", help="ns-3 build profile: default, debug or optimized")
+    parser.add_argument("--std", default="c++20", help="C++ standard, must match the ns-3 build")
+    parser.add_argument("--output", default=LIBRARY_PATH)
+    parser.add_argument("--cxx", default=None)
+    args, extra = parser.parse_known_args(argv)
+
+    ns3_dir = args.ns3_dir or _guess_ns3_dir()
+    if ns3_dir is None:
+        raise SystemExit("Error: ns-3 directory not found, pass --ns3-dir or set NS3_DIR")
+    build(ns3_dir, args.output, args.profile, args.std, args.cxx, extra)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
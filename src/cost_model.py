@@ -0,0 +1,187 @@
+"""
+    predicted cost of a MixedWireless run: wall seconds, executed ns-3 events (the
+    report's events_executed, Simulator::GetEventCount) and memory, the heap
+    the run holds at its end on top of what a warm worker process holds anyway.
+
+    each cost is modelled as log(cost) = w . features(scenario), features being the log
+    of the node count, the backbone size and the simulated seconds, plus flags for the
+    backends. the fit is a ridge regression towards PRIOR kept as its sufficient
+    statistics (X'X and X'y), so every finished run updates it in O(features^2) and
+    the model saves to a small json file. before any run is observed the prior alone
+    predicts, which ranks scenarios sensibly but is calibrated on one machine only.
+
+        model = CostModel.load("costs.json")          # or CostModel()
+        model.predict(scenario)                        # Cost(wall=..., events=..., memory_mb=...)
+        model.observe(scenario, report)                # a MixedWireless(profile=True) report
+        model.save("costs.json")
+
+    run_sweep(grid, cost_model=model, memory_mb=...) uses it to start the longest
+    scenarios first and to keep the predicted memory of the running ones in budget.
+"""
+
+import collections
+import json
+import math
+import os
+
+import numpy as np
+
+
+FEATURES = ("intercept", "log_nodes", "log_backbone", "log_seconds", "log_interferers",
+            "spectrum", "aodv", "global_routing", "device_traces")
+COSTS = ("wall", "events", "memory_mb")
+
+Cost = collections.namedtuple("Cost", COSTS)
+
+# coefficients fitted on 60 runs of a 3..10 backbone, 2..5 infra, 10..60 s grid with
+# olsr/aodv/global and yans/spectrum, one core (bench/cost_model.py --backends --fit);
+# the grid does not vary interferers or trace_mode, their weights are guesses
+PRIOR = {
+    "wall": [-6.68, 1.57, -0.283, 1.07, 0.2, 2.03, 0.684, -1.05, 0.3],
+    "events": [4.53, 1.67, -0.567, 1.17, 0.3, 0.122, 0.905, -1.32, 0.0],
+    "memory_mb": [-2.42, 0.696, 0.696, 0.15, 0.2, 1.45, -0.175, -0.389, 0.5],
+}
+# weight of the prior, in observations' worth
+PRIOR_WEIGHT = 1.0
+
+MODEL_VERSION = 1
+
+
+def simulated_seconds(scenario):
+    """
+        the simulated time a scenario runs for at most: duration, or the end of the
+        windows it asks for (see MixedWireless windows/warmup)
+    """
+    duration = scenario.get("duration")
+    windows = scenario.get("windows")
+    if windows is None:
+        if duration is None:
+            # MixedWireless has no default duration either, it refuses such a run
+            raise ValueError("scenario %r sets neither duration nor windows" % (scenario,))
+        return float(duration)
+    timeWindow = 7.0 / scenario.get("sampleCts", 7)
+    end = (math.ceil(scenario.get("warmup", 3.0) / timeWindow - 1e-9) + windows) * timeWindow
+    return end if duration is None else min(end, float(duration))
+
+
+def features(scenario):
+    """the feature vector of a scenario (a dict of MixedWireless arguments), see FEATURES"""
+    backbone = scenario["numofbackbone"]
+    nodes = backbone * (scenario.get("numofInfra", 1) + scenario.get("numofLan", 1) - 1)
+    return np.array([
+        1.0,
+        math.log(max(nodes, 1)),
+        math.log(max(backbone, 1)),
+        math.log(max(simulated_seconds(scenario), 1e-3)),
+        math.log1p(scenario.get("interferers", 0)),
+        float(scenario.get("channel", "yans") != "yans"),
+        float(scenario.get("routing", "olsr") == "aodv"),
+        float(scenario.get("routing", "olsr") == "global"),
+        float(scenario.get("trace_mode", "context") == "device"),
+    ])
+
+
+def feature_matrix(scenarios):
+    return np.array([features(s) for s in scenarios]).reshape(-1, len(FEATURES))
+
+
+def report_costs(report):
+    """the observed Cost of a run from its profile report, None where it does not tell"""
+    return Cost(
+        wall=sum(phase["wall"] for phase in report["phases"].values()),
+        events=report["events_executed"] or None,
+        memory_mb=report.get("heap_mb"),
+    )
+
+
+class CostModel:
+    """ridge regression per cost on features(scenario); prior_weight pulls it towards PRIOR"""
+
+    def __init__(self, prior=None, prior_weight=PRIOR_WEIGHT):
+        self.prior = {cost: np.array((prior or PRIOR)[cost], dtype=float) for cost in COSTS}
+        self.prior_weight = prior_weight
+        size = len(FEATURES)
+        self._xtx = {cost: np.zeros((size, size)) for cost in COSTS}
+        self._xty = {cost: np.zeros(size) for cost in COSTS}
+        self.observations = {cost: 0 for cost in COSTS}
+        self._coefficients = {}
+
+    def update(self, scenario, cost):
+        """add one observed run, cost a Cost (fields may be None when not measured)"""
+        x = features(scenario)
+        for name in COSTS:
+            value = getattr(cost, name)
+            if value is None or value <= 0:
+                continue
+            self._xtx[name] += np.outer(x, x)
+            self._xty[name] += x * math.log(value)
+            self.observations[name] += 1
+            self._coefficients.pop(name, None)
+
+    def observe(self, scenario, report):
+        """update from a MixedWireless(profile=True) report; cache hits tell nothing"""
+        if not report.get("cache_hit"):
+            self.update(scenario, report_costs(report))
+
+    def coefficients(self, name):
+        if name not in self._coefficients:
+            ridge = self.prior_weight * np.eye(len(FEATURES))
+            self._coefficients[name] = np.linalg.solve(
+                self._xtx[name] + ridge, self._xty[name] + ridge @ self.prior[name])
+        return self._coefficients[name]
+
+    def predict(self, scenario):
+        x = features(scenario)
+        return Cost(*(float(np.exp(x @ self.coefficients(name))) for name in COSTS))
+
+    def predict_many(self, matrix):
+        """predicted costs of the rows of a feature_matrix, shape (rows, len(COSTS))"""
+        return np.exp(np.stack([matrix @ self.coefficients(name) for name in COSTS], axis=1))
+
+    def to_dict(self):
+        return {
+            "version": MODEL_VERSION,
+            "features": list(FEATURES),
+            "prior": {name: self.prior[name].tolist() for name in COSTS},
+            "prior_weight": self.prior_weight,
+            "xtx": {name: self._xtx[name].tolist() for name in COSTS},
+            "xty": {name: self._xty[name].tolist() for name in COSTS},
+            "observations": self.observations,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        if state["version"] != MODEL_VERSION or state["features"] != list(FEATURES):
+            raise ValueError("cost model version %r with features %r not supported" % (
+                state["version"], state["features"]))
+        model = cls(state["prior"], state["prior_weight"])
+        for name in COSTS:
+            model._xtx[name] = np.array(state["xtx"][name])
+            model._xty[name] = np.array(state["xty"][name])
+        model.observations = dict(state["observations"])
+        return model
+
+    def save(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """the model saved at path, or a fresh one when there is none yet"""
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def longest_first(scenarios, model, matrix=None):
+    """
+        indices of scenarios by decreasing predicted wall time. matrix is their
+        feature_matrix, when the caller has it already.
+    """
+    if matrix is None:
+        matrix = feature_matrix(scenarios)
+    walls = model.predict_many(matrix)[:, COSTS.index("wall")]
+    return [int(i) for i in np.argsort(-walls, kind="stable")]
@@ -0,0 +1,306 @@
+"""
+    sharded dataset files from MixedWireless results, written on a background thread.
+
+        writer = DatasetWriter("dataset/", formats=("jsonl", "parquet"))
+        for index, scenario, result, error in run_sweep(grid):
+            if error is None:
+                writer.write(result, scenario)
+        writer.close()   # waits for the queue, writes dataset/manifest.json
+
+    write() only queues the result; converting and compressing it happens on the writer
+    thread while the caller starts the next simulation (Simulator::Run releases the GIL,
+    see initialize_cpp). the queue holds at most queue_size results, write() blocks
+    when it is full.
+
+    jsonl: one line per run, {"run", "scenario", "time_window", "windows", "metrics":
+    {field: [value per window]}}, gzip compressed. parquet: one row per window, the
+    scenario keys as string columns next to the window fields (needs pyarrow); the
+    manifest keeps the scenario values as they were. a shard is closed
+    and the next one started once it holds shard_bytes (compressed), and a parquet shard
+    also when a run brings scenario keys or columns its schema does not have.
+    manifest.json lists the shards with their runs, rows and bytes, and every run with
+    its scenario and the shards holding it.
+"""
+
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from results import WINDOW_DTYPE, WindowResult
+
+
+FORMATS = ("jsonl", "parquet")
+MANIFEST_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+_STOP = object()
+
+
+def result_columns(result):
+    """the per-window columns of a WindowResult or of a legacy field_mapping dict, as lists"""
+    if isinstance(result, WindowResult):
+        return {name: result.records[name].tolist() for name in result.fields}
+    # field_mapping: name -> [[timestamp, str(value)], ...]
+    columns = {}
+    for name, pairs in result.items():
+        if "timestamp" not in columns:
+            columns["timestamp"] = [int(t) for t, _ in pairs]
+        columns[name] = [float(v) for _, v in pairs]
+    return columns
+
+
+class _JsonlShards:
+    def __init__(self, directory, compresslevel):
+        self.directory = directory
+        self.compresslevel = compresslevel
+        self.file = None
+
+    def open(self, index):
+        name = "part-%05d.jsonl.gz" % index
+        self.raw = open(os.path.join(self.directory, name), "wb")
+        self.file = gzip.GzipFile(fileobj=self.raw, mode="wb", compresslevel=self.compresslevel)
+        return name
+
+    def write(self, run, scenario, time_window, columns):
+        line = json.dumps({
+            "run": run,
+            "scenario": scenario,
+            "time_window": time_window,
+            "windows": len(next(iter(columns.values()), ())),
+            "metrics": columns,
+        }, separators=(",", ":"), default=_json_default)
+        self.file.write(line.encode("utf-8"))
+        self.file.write(b"\n")
+
+    def fits(self, scenario, columns):
+        return True
+
+    def size(self):
+        # a sync flush per line (a whole run) costs little ratio and makes the size exact
+        self.file.flush()
+        return self.raw.tell()
+
+    def close(self):
+        self.file.close()
+        self.raw.close()
+        self.file = None
+
+
+def scenario_text(value):
+    """
+        a scenario value as the parquet shards store it: a string, or None. a key can be
+        None in one run and a number or a name in the next (seed, events), and some values
+        are objects (a cache), so every scenario column is a string column.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (bool, int, float, np.generic, list, tuple, dict)):
+        return json.dumps(value, default=_json_default)
+    return str(value)
+
+
+def _column_type(name):
+    # a window field as WINDOW_DTYPE has it; the field_mapping form is a timestamp and floats
+    if name in WINDOW_DTYPE.names:
+        return pyarrow.from_numpy_dtype(WINDOW_DTYPE[name])
+    if name == "timestamp":
+        return pyarrow.int64()
+    return pyarrow.float64()
+
+
+class _ParquetShards:
+    def __init__(self, directory, compression):
+        self.directory = directory
+        self.compression = compression
+        self.writer = None
+        self.schema = None
+        self.keys = None
+        self.columns = None
+        self.path = None
+
+    def open(self, index):
+        name = "part-%05d.parquet" % index
+        self.path = os.path.join(self.directory, name)
+        return name
+
+    def fits(self, scenario, columns):
+        """whether a run can go into the open shard: no new scenario keys, the same columns"""
+        if self.writer is None:
+            return True
+        return list(columns) == self.columns and all(key in self.keys for key in scenario)
+
+    def write(self, run, scenario, time_window, columns):
+        rows = len(next(iter(columns.values()), ()))
+        if self.writer is None:
+            # declared rather than inferred from the first run: its None values, or no
+            # windows at all, would fix null columns the later runs do not fit
+            fields = [pyarrow.field("run", pyarrow.int64()), pyarrow.field("time_window", pyarrow.float64())]
+            fields += [pyarrow.field(key, pyarrow.string()) for key in scenario]
+            fields += [pyarrow.field(name, _column_type(name)) for name in columns]
+            self.schema = pyarrow.schema(fields)
+            self.keys = list(scenario)
+            self.columns = list(columns)
+            self.writer = pyarrow.parquet.ParquetWriter(self.path, self.schema, compression=self.compression)
+        table = {"run": [run] * rows, "time_window": [time_window] * rows}
+        for field in self.schema:
+            if field.name not in table and field.name not in columns:
+                # keys of the shard this run lacks are null
+                table[field.name] = [scenario_text(scenario.get(field.name))] * rows
+        table.update(columns)
+        self.writer.write_table(pyarrow.table(table, schema=self.schema))
+
+    def size(self):
+        # row groups are flushed as they are written, the file grows with them
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.writer = None
+
+
+class DatasetWriter:
+    """
+        formats: any of FORMATS, each written to its own shards. shard_bytes: roll over
+        to a new shard past this size. compresslevel: gzip level of the jsonl shards.
+        parquet_compression: codec of the parquet shards.
+    """
+
+    def __init__(self, directory, formats=("jsonl",), shard_bytes=64 << 20, queue_size=8,
+                 compresslevel=6, parquet_compression="zstd"):
+        formats = tuple(formats)
+        for fmt in formats:
+            if fmt not in FORMATS:
+                raise ValueError("unknown format: %r" % (fmt,))
+        if "parquet" in formats and pyarrow is None:
+            raise ImportError("parquet shards need pyarrow (pip install pyarrow)")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.shard_bytes = shard_bytes
+        self._sinks = {}
+        for fmt in formats:
+            sink = _JsonlShards(directory, compresslevel) if fmt == "jsonl" \
+                else _ParquetShards(directory, parquet_compression)
+            self._sinks[fmt] = {"sink": sink, "index": 0, "current": None}
+        self.shards = []
+        self.runs = []
+        self._queue = queue.Queue(queue_size)
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._drain, name="dataset-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, result, scenario=None):
+        """queue a WindowResult (or field_mapping dict) and its scenario parameters, returns its run number"""
+        self._check()
+        if self._closed:
+            raise ValueError("the writer is closed")
+        run = len(self.runs)
+        self.runs.append({"run": run, "scenario": dict(scenario or {}), "rows": None, "shards": {}})
+        self._queue.put((run, result))
+        return run
+
+    def close(self):
+        """write everything queued, close the shards and write the manifest; returns its path"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._check()
+        return self._write_manifest()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+            return
+        # close the shards all the same, but let the exception in flight through
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def _check(self):
+        if self._error is not None:
+            raise RuntimeError("dataset writer failed") from self._error
+
+    def _drain(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            if self._error is not None:
+                # keep taking items so write() never blocks on a dead writer
+                continue
+            try:
+                self._write_run(*item)
+            except Exception as exc:
+                self._error = exc
+        try:
+            for fmt in self._sinks:
+                self._close_shard(fmt)
+        except Exception as exc:
+            self._error = self._error or exc
+
+    def _write_run(self, run, result):
+        entry = self.runs[run]
+        time_window = result.time_window if isinstance(result, WindowResult) else None
+        columns = result_columns(result)
+        entry["rows"] = len(next(iter(columns.values()), ()))
+        for fmt, state in self._sinks.items():
+            if state["current"] is not None and not state["sink"].fits(entry["scenario"], columns):
+                # new scenario keys, or the other result form: start a shard with its own schema
+                self._close_shard(fmt)
+            if state["current"] is None:
+                name = state["sink"].open(state["index"])
+                state["current"] = {"path": name, "format": fmt, "runs": 0, "rows": 0, "bytes": 0}
+            state["sink"].write(run, entry["scenario"], time_window, columns)
+            state["current"]["runs"] += 1
+            state["current"]["rows"] += entry["rows"] if fmt == "parquet" else 1
+            entry["shards"][fmt] = state["current"]["path"]
+            if state["sink"].size() >= self.shard_bytes:
+                self._close_shard(fmt)
+
+    def _close_shard(self, fmt):
+        state = self._sinks[fmt]
+        if state["current"] is None:
+            return
+        state["sink"].close()
+        state["current"]["bytes"] = os.path.getsize(os.path.join(self.directory, state["current"]["path"]))
+        self.shards.append(state["current"])
+        state["current"] = None
+        state["index"] += 1
+
+    def _write_manifest(self):
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "shards": self.shards,
+            "runs": self.runs,
+        }
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=1, default=_json_default)
+        os.replace(tmp, path)
+        return path
+
+
+def _json_default(value):
+    # numpy scalars in scenario parameters; anything else (a cache, an EventCapture) by name
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
@@ -0,0 +1,130 @@
+"""
+    raw phy events of a MixedWireless run, captured by phy_event_log.cc into a file of
+    fixed-size records and read back here as a read-only numpy memmap.
+
+        result = MixedWireless(..., result_format="windows",
+                               events=EventCapture("run.events", capacity=1_000_000, sample_rate=0.1))
+        log = result.events
+        log["snrDb"][log["kind"] == EVENT_KINDS.index("rx_ok")]
+
+    memory is bounded by the capacity whatever the run length: past it, events are
+    dropped, or with reservoir=True kept as a uniform sample of all the sampled events.
+    a reservoir log is not in time order, see EventLog.sorted().
+"""
+
+import os
+
+import numpy as np
+
+
+# must match struct PhyEventRecord in phy_event_log.h, field for field
+EVENT_FIELDS = [
+    ("time", "f8"),
+    ("snrDb", "f8"),
+    ("txPowerDbm", "f8"),
+    ("rateMbps", "f4"),
+    ("node", "u4"),
+    ("size", "u4"),
+    ("device", "u2"),
+    ("kind", "u1"),
+    ("mcs", "u1"),
+    ("modulation", "u1"),
+]
+EVENT_DTYPE = np.dtype(EVENT_FIELDS, align=True)
+
+# must match struct PhyEventLogHeader
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "u4"),
+    ("recordSize", "u4"),
+    ("capacity", "u8"),
+    ("count", "u8"),
+    ("seen", "u8"),
+    ("sampled", "u8"),
+    ("sampleRate", "f8"),
+    ("reservoir", "u4"),
+    ("reserved", "u4"),
+], align=True)
+
+MAGIC = b"NS3PHYEV"
+VERSION = 1
+
+# values of the kind column, PhyEventKind
+EVENT_KINDS = ("tx", "rx_ok", "rx_error")
+# the mcs column of modulations older than HT
+NO_MCS = 255
+
+
+def check_event_layout(layout):
+    """compare EVENT_DTYPE and HEADER_DTYPE with GetPhyEventLayout()"""
+    layout = [int(x) for x in layout]
+    expected = ([EVENT_DTYPE.fields[name][1] for name, _ in EVENT_FIELDS]
+                + [EVENT_DTYPE.itemsize, HEADER_DTYPE.itemsize])
+    if layout != expected:
+        raise RuntimeError("PhyEventRecord layout %s does not match event_log %s" % (layout, expected))
+
+
+class EventCapture:
+    """
+        what to capture: the file, the most records it may hold, the probability of
+        keeping each event, and whether a full log turns into a reservoir sample.
+    """
+
+    def __init__(self, path, capacity=1000000, sample_rate=1.0, reservoir=False):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive, got %r" % (capacity,))
+        if not 0.0 < sample_rate <= 1.0:
+            raise ValueError("sample_rate must be in (0, 1], got %r" % (sample_rate,))
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(directory):
+            raise ValueError("no directory for the event log: %s" % (directory,))
+        self.path = path
+        self.capacity = int(capacity)
+        self.sample_rate = float(sample_rate)
+        self.reservoir = bool(reservoir)
+
+    def open(self, gbl, seed=None):
+        """open the capture on the C++ side; the sampler is seeded from the run's seed"""
+        gbl.OpenPhyEventCapture(self.path, self.capacity, self.sample_rate, self.reservoir,
+                                1 if seed is None else int(seed))
+
+
+class EventLog:
+    """
+        a closed capture file. log.records is the memmap (EVENT_DTYPE), log["size"] one
+        column; seen, sampled and dropped count the events offered, kept by the sampler,
+        and lost to a full log.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if len(header) != 1 or header["magic"][0] != MAGIC:
+            raise ValueError("%s is not a phy event log" % (path,))
+        header = header[0]
+        if int(header["version"]) != VERSION or int(header["recordSize"]) != EVENT_DTYPE.itemsize:
+            raise ValueError("%s: event log version %d, record size %d not supported" % (
+                path, int(header["version"]), int(header["recordSize"])))
+        self.capacity = int(header["capacity"])
+        self.seen = int(header["seen"])
+        self.sampled = int(header["sampled"])
+        self.sample_rate = float(header["sampleRate"])
+        self.reservoir = bool(header["reservoir"])
+        count = int(header["count"])
+        self.dropped = self.sampled - count
+        if count:
+            self.records = np.memmap(path, dtype=EVENT_DTYPE, mode="r", offset=HEADER_DTYPE.itemsize,
+                                     shape=(count,))
+        else:
+            # numpy cannot map an empty region
+            self.records = np.empty(0, dtype=EVENT_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, name):
+        return self.records[name]
+
+    def sorted(self):
+        """the records in time order, a copy"""
+        return self.records[np.argsort(self.records["time"], kind="stable")]
@@ -0,0 +1,370 @@
+"""
+    resumable, deterministic generation of a scenario grid, split over processes and hosts.
+
+    a job is a directory, on a filesystem every host sees:
+
+        job.json            the scenarios, the RNG seed and the number of shards
+        claims/<id>         created exclusively by the process running scenario <id>
+        done/<id>.json      checkpoint record of a finished (or failed) scenario
+        results/            the WindowResults, a ResultCache keyed by scenario id
+        manifest.json       the checkpoint records gathered, rewritten after every drive
+
+    every scenario is identified by a hash of its parameters and runs under the job's seed
+    with an ns-3 run number derived from that hash: it produces the same windows whatever
+    its position in the grid, whichever host runs it, and however often the job resumes.
+    the shard of a scenario is the same hash modulo num_shards, so host k of n runs shard
+    k with no overlap. without a shard, hosts take any unclaimed scenario. a claim whose
+    process died on this host, or older than claim_timeout, is taken over.
+
+        job = GenerationJob.create("/shared/job", make_grid(...), seed=1, num_shards=4)
+        job.drive(shard=2, workers=16)      # on host 2; run it again after a crash
+        job.status()
+
+        python src/generation_job.py /shared/job --shard 2 --workers 16
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import queue
+import socket
+import sys
+import time
+import uuid
+
+import numpy as np
+
+import sweep
+from result_cache import ResultCache, _normalize
+
+
+JOB_FORMAT = 1
+
+# MixedWireless arguments a job does not pass on: profile=True makes it return a
+# (result, report) pair, which ResultCache.put cannot store
+_DROPPED_ARGUMENTS = ("profile",)
+
+
+def scenario_id(scenario):
+    """hex hash of the normalized scenario parameters"""
+    params = {name: _normalize(value) for name, value in scenario.items()}
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:24]
+
+
+def _primitive(scenario, name, value):
+    # scenario_id hashes the values, and job.json stores them: only what json writes and
+    # reads back the same, numpy scalars as their python value
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [_primitive(scenario, name, v) for v in value]
+    raise ValueError("scenario %r: %s=%r is not a number, string, None or list of them" % (
+        scenario, name, value))
+
+
+def job_scenario(scenario):
+    """a scenario as a job stores it: primitive values only, without profile"""
+    return {name: _primitive(scenario, name, value) for name, value in scenario.items()
+            if name not in _DROPPED_ARGUMENTS}
+
+
+def run_number(ident):
+    """the ns-3 run number of a scenario: 60 bits of its id, never 0"""
+    return int(ident[:15], 16) + 1
+
+
+def shard_of(ident, num_shards):
+    return int(ident, 16) % num_shards
+
+
+def _write_json(path, value):
+    # written aside and renamed, readers on other hosts never see half a file
+    tmp = "%s.tmp-%s" % (path, uuid.uuid4().hex[:8])
+    with open(tmp, "w") as f:
+        json.dump(value, f, indent=1)
+    os.replace(tmp, path)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _dispatch_failed(done, ident, exc):
+    done.put((ident, None, None, "%s: %s" % (type(exc).__name__, exc)))
+
+
+class GenerationJob:
+    """the job in directory, see create(); claim_timeout (seconds) bounds how long a claim holds"""
+
+    def __init__(self, directory, claim_timeout=None):
+        self.directory = directory
+        self.claim_timeout = claim_timeout
+        with open(os.path.join(directory, "job.json")) as f:
+            spec = json.load(f)
+        if spec["format"] != JOB_FORMAT:
+            raise ValueError("%s: job format %r, expected %r" % (directory, spec["format"], JOB_FORMAT))
+        self.seed = spec["seed"]
+        self.num_shards = spec["num_shards"]
+        self.scenarios = {scenario_id(s): s for s in spec["scenarios"]}
+        self.results = ResultCache(os.path.join(directory, "results"), max_bytes=float("inf"))
+        self.host = socket.gethostname()
+
+    @classmethod
+    def create(cls, directory, scenarios, seed=1, num_shards=1, claim_timeout=None):
+        """
+            the job for scenarios (dicts of MixedWireless arguments) in directory. an existing
+            job is opened instead, and must have been created with the same scenarios and seed.
+            scenario values must be numbers, strings, None or lists of them (a cache or an
+            EventCapture has no stable id); profile is dropped.
+        """
+        scenarios = [job_scenario(s) for s in scenarios]
+        ids = [scenario_id(s) for s in scenarios]
+        if len(set(ids)) != len(ids):
+            raise ValueError("the grid holds the same scenario twice")
+        for name in ("claims", "done", "results"):
+            os.makedirs(os.path.join(directory, name), exist_ok=True)
+        spec = {"format": JOB_FORMAT, "seed": seed, "num_shards": num_shards, "scenarios": scenarios}
+        path = os.path.join(directory, "job.json")
+        try:
+            # whoever creates it first defines the job
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            with os.fdopen(fd, "w") as f:
+                json.dump(spec, f, indent=1)
+        except FileExistsError:
+            job = cls(directory, claim_timeout)
+            if set(job.scenarios) != set(ids) or job.seed != seed or job.num_shards != num_shards:
+                raise ValueError("%s already holds a different job" % (directory,))
+            return job
+        return cls(directory, claim_timeout)
+
+    def _claim_path(self, ident):
+        return os.path.join(self.directory, "claims", ident)
+
+    def _done_path(self, ident):
+        return os.path.join(self.directory, "done", ident + ".json")
+
+    def is_done(self, ident):
+        return os.path.exists(self._done_path(ident))
+
+    def _stale(self, claim):
+        if claim["host"] == self.host and not _pid_alive(claim["pid"]):
+            return True
+        return self.claim_timeout is not None and time.time() - claim["time"] > self.claim_timeout
+
+    def claim(self, ident):
+        """True when this process now owns scenario ident; False if done or held by another"""
+        path = self._claim_path(ident)
+        for _ in range(2):
+            if self.is_done(ident):
+                return False
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                try:
+                    with open(path) as f:
+                        claim = json.load(f)
+                except (OSError, ValueError):
+                    # gone meanwhile, or still being written by its owner
+                    continue
+                if not self._stale(claim):
+                    return False
+                # renaming is atomic: of several processes taking over, one succeeds
+                try:
+                    os.rename(path, "%s.stale-%s" % (path, uuid.uuid4().hex[:8]))
+                except FileNotFoundError:
+                    pass
+                continue
+            with os.fdopen(fd, "w") as f:
+                json.dump({"host": self.host, "pid": os.getpid(), "time": time.time()}, f)
+            # a scenario finished between the check and the claim is not run twice
+            if self.is_done(ident):
+                self.release(ident)
+                return False
+            return True
+        return False
+
+    def release(self, ident):
+        try:
+            os.remove(self._claim_path(ident))
+        except FileNotFoundError:
+            pass
+
+    def arguments(self, ident):
+        """the MixedWireless arguments of a scenario: its own, the job's seed and its run number"""
+        scenario = job_scenario(self.scenarios[ident])
+        if scenario.get("seed") is None:
+            scenario["seed"] = self.seed
+        if scenario.get("run") is None:
+            scenario["run"] = run_number(ident)
+        # results are stored as arrays, see ResultCache.put
+        scenario["result_format"] = "windows"
+        return scenario
+
+    def complete(self, ident, result, error=None, seconds=None):
+        """
+            store the result, then the checkpoint record, then drop the claim. a result
+            that cannot be stored fails the scenario, so a resumed job runs it again.
+        """
+        if error is None:
+            try:
+                self.results.put(ident, result, self.scenarios[ident], strict=True)
+            except OSError as exc:
+                error = "storing the result failed, %s: %s" % (type(exc).__name__, exc)
+        _write_json(self._done_path(ident), {
+            "id": ident,
+            "scenario": self.scenarios[ident],
+            "seed": self.arguments(ident)["seed"],
+            "run": self.arguments(ident)["run"],
+            "shard": shard_of(ident, self.num_shards),
+            "status": "failed" if error else "done",
+            "error": error,
+            "seconds": seconds,
+            "host": self.host,
+            "finished": time.time(),
+        })
+        self.release(ident)
+
+    def result(self, ident):
+        """the WindowResult of a finished scenario, memory-mapped, or None"""
+        return self.results.get(ident)
+
+    def pending(self, shard=None, retry_failed=False):
+        """ids of the scenarios still to run, in grid order, of one shard or all"""
+        ids = []
+        for ident in self.scenarios:
+            if shard is not None and shard_of(ident, self.num_shards) != shard:
+                continue
+            if self.is_done(ident):
+                if not retry_failed:
+                    continue
+                with open(self._done_path(ident)) as f:
+                    if json.load(f)["status"] != "failed":
+                        continue
+                os.remove(self._done_path(ident))
+            ids.append(ident)
+        return ids
+
+    def drive(self, shard=None, workers=1, retry_failed=False, maxtasksperchild=None):
+        """
+            run the pending scenarios of shard (all shards when None) that nobody else
+            holds, workers at a time, claiming each just before it starts. returns the
+            number of scenarios this call finished.
+        """
+        todo = iter(self.pending(shard, retry_failed))
+
+        def next_claimed():
+            for ident in todo:
+                if self.claim(ident):
+                    return ident
+            return None
+
+        finished = 0
+        if workers <= 1:
+            # in this process, warm after the first scenario like a pool worker
+            sweep._init_worker()
+            while True:
+                ident = next_claimed()
+                if ident is None:
+                    break
+                try:
+                    start = time.perf_counter()
+                    _, _, result, error = sweep._run_scenario((ident, self.arguments(ident)))
+                    self.complete(ident, result, error, time.perf_counter() - start)
+                finally:
+                    self.release(ident)
+                finished += 1
+            self.write_manifest()
+            return finished
+
+        ctx = mp.get_context("spawn")
+        done = queue.Queue()
+        in_flight = {}
+        with ctx.Pool(workers, initializer=sweep._init_worker, maxtasksperchild=maxtasksperchild) as pool:
+            try:
+                while True:
+                    while len(in_flight) < workers:
+                        ident = next_claimed()
+                        if ident is None:
+                            break
+                        in_flight[ident] = time.perf_counter()
+                        # a task that cannot be dispatched never calls back: fail it
+                        # instead, or done.get() waits for it with its claim held
+                        pool.apply_async(sweep._run_scenario, ((ident, self.arguments(ident)),),
+                                         callback=done.put,
+                                         error_callback=functools.partial(_dispatch_failed, done, ident))
+                    if not in_flight:
+                        break
+                    ident, _, result, error = done.get()
+                    self.complete(ident, result, error, time.perf_counter() - in_flight.pop(ident))
+                    finished += 1
+            finally:
+                # interrupted: give the unfinished scenarios back
+                for ident in in_flight:
+                    self.release(ident)
+        self.write_manifest()
+        return finished
+
+    def records(self):
+        """the checkpoint records of the finished scenarios"""
+        records = []
+        for name in sorted(os.listdir(os.path.join(self.directory, "done"))):
+            if name.endswith(".json"):
+                with open(os.path.join(self.directory, "done", name)) as f:
+                    records.append(json.load(f))
+        return records
+
+    def status(self):
+        records = self.records()
+        claims = [n for n in os.listdir(os.path.join(self.directory, "claims")) if ".stale-" not in n]
+        failed = sum(1 for r in records if r["status"] == "failed")
+        return {
+            "scenarios": len(self.scenarios),
+            "done": len(records) - failed,
+            "failed": failed,
+            "running": len(claims),
+            "pending": len(self.scenarios) - len(records),
+        }
+
+    def write_manifest(self):
+        """gather the checkpoint records into manifest.json, returns its path"""
+        path = os.path.join(self.directory, "manifest.json")
+        _write_json(path, {
+            "format": JOB_FORMAT,
+            "seed": self.seed,
+            "num_shards": self.num_shards,
+            "status": self.status(),
+            "scenarios": self.records(),
+        })
+        return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="run (or resume) a generation job")
+    parser.add_argument("directory", help="a job directory made by GenerationJob.create")
+    parser.add_argument("--shard", type=int, default=None, help="run only this shard")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--retry-failed", action="store_true")
+    parser.add_argument("--claim-timeout", type=float, default=None,
+                        help="seconds after which a claim from another host is taken over")
+    parser.add_argument("--status", action="store_true", help="print the job status and exit")
+    args = parser.parse_args(argv)
+
+    job = GenerationJob(args.directory, args.claim_timeout)
+    if not args.status:
+        job.drive(args.shard, args.workers, args.retry_failed)
+    print(json.dumps(job.status()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
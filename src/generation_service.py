@@ -0,0 +1,488 @@
+"""
+    a long-lived generation service: warm ns-3 worker processes behind a local HTTP
+    endpoint, on localhost TCP or on a Unix socket.
+
+        python src/generation_service.py --workers 4 --unix /tmp/ns3gen.sock
+        curl --unix-socket /tmp/ns3gen.sock http://localhost/generate \\
+             -d '{"numofbackbone": 3, "numofInfra": 3, "numofLan": 1, "duration": 20, "sampleCts": 7, "seed": 1}'
+
+    every worker imports ns-3 and calls initialize_cpp() once at start-up, as sweep
+    workers do, so a request only pays for its own simulation.
+
+    POST /generate takes a JSON object of StreamMixedWireless arguments, plus an
+    optional "timeout" in seconds. the response is chunked ndjson, one line per
+    simulation step as the windows close:
+        {"windows": n, "time_window": s, "metrics": {field: [value per window]}}
+    then {"done": true, "windows": total, "queued": s, "seconds": s}, or {"error": "..."}
+    when the run failed after streaming began. errors before the first window get a
+    status code instead: 400 bad arguments, 413 body over max_body bytes, 503 queue
+    full, 504 timed out.
+    GET /status reports the queue, the workers and the recent latencies.
+
+    backpressure: at most queue_size requests wait for a worker, past that the service
+    answers 503 with Retry-After at once. a slow reader stalls its worker, since only a
+    few steps are buffered between the worker pipe and the socket; a client that hangs
+    up stops its run at the next step. the timeout runs from the request's arrival: the
+    worker checks it between steps, and a worker still busy grace seconds after it is
+    killed and replaced.
+"""
+
+import argparse
+import asyncio
+import collections
+import contextlib
+import http.client
+import json
+import math
+import multiprocessing as mp
+import os
+import socket
+import sys
+import time
+
+import numpy as np
+
+from dataset_writer import result_columns
+
+
+# steps buffered per request between the worker and the client
+STREAM_BUFFER = 4
+# the largest request body accepted by default, in bytes
+MAX_BODY = 1 << 20
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+
+class ServiceBusy(Exception):
+    """the request queue is full"""
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class _BodyTooLarge(ValueError):
+    pass
+
+
+def _worker_main(conn):
+    # a worker process: initialize once, then run one request at a time
+    import generator
+    generator.initialize_cpp()
+    conn.send(("ready", os.getpid()))
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        if message == "cancel":
+            # meant for a run that had already finished or failed when it arrived
+            continue
+        windows = 0
+        stream = None
+        try:
+            params, deadline = message
+            stream = generator.StreamMixedWireless(**params)
+            for chunk in stream:
+                windows += len(chunk)
+                conn.send(("windows", chunk))
+                if deadline is not None and time.time() > deadline:
+                    raise TimeoutError("timed out after %d windows" % (windows,))
+                if conn.poll():
+                    # the only message sent during a run: the client went away
+                    conn.recv()
+                    raise _Cancelled("cancelled after %d windows" % (windows,))
+            conn.send(("done", windows))
+        except (Exception, SystemExit) as exc:
+            # a failing request must not take the warm worker down
+            conn.send(("error", "%s: %s" % (type(exc).__name__, exc), windows == 0, isinstance(exc, TimeoutError)))
+        finally:
+            if stream is not None:
+                # Simulator::Destroy before the next request
+                stream.close()
+
+
+async def _recv(conn, timeout=None):
+    """conn.recv() without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    ready = loop.create_future()
+    fd = conn.fileno()
+    loop.add_reader(fd, lambda: ready.done() or ready.set_result(None))
+    try:
+        # the timeout applies while nothing arrives, no thread is left waiting on it
+        await asyncio.wait_for(ready, timeout)
+    finally:
+        loop.remove_reader(fd)
+    # the message has started: read the rest of a large one on a thread, so other
+    # clients are served meanwhile. a worker dying half-way raises EOFError there
+    return await loop.run_in_executor(None, conn.recv)
+
+
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        self.requests = 0
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class _Request:
+    def __init__(self, params, timeout):
+        self.params = params
+        self.arrived = time.time()
+        self.deadline = None if timeout is None else self.arrived + timeout
+        self.started = None
+        self.out = asyncio.Queue(STREAM_BUFFER)
+        self.cancelled = False
+
+
+class GenerationService:
+    """
+        workers warm worker processes (os.cpu_count() by default), queue_size requests
+        waiting at most, timeout the default per-request limit in seconds (None: none),
+        grace how long a worker may overrun it before it is killed, max_requests the
+        requests a worker serves before it is replaced (None: for ever), max_body the
+        largest request body in bytes.
+    """
+
+    def __init__(self, workers=None, queue_size=16, timeout=300.0, grace=5.0, max_requests=None,
+                 max_body=MAX_BODY):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.max_body = max_body
+        self.grace = grace
+        self.max_requests = max_requests
+        self._ctx = mp.get_context("spawn")
+        self._queue = asyncio.Queue(queue_size)
+        self._slots = []
+        self._tasks = []
+        self._busy = 0
+        self._latencies = collections.deque(maxlen=1000)
+        self._counts = collections.Counter()
+
+    async def start(self):
+        """start the workers and wait until every one is initialized"""
+        self._slots = [await self._spawn() for _ in range(self.workers)]
+        self._tasks = [asyncio.create_task(self._run_slot(i)) for i in range(self.workers)]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for worker in self._slots:
+            worker.stop()
+        self._slots = []
+
+    async def _spawn(self):
+        worker = _Worker(self._ctx)
+        message = await _recv(worker.conn)
+        assert message[0] == "ready", message
+        return worker
+
+    async def generate(self, params, timeout=None):
+        """
+            yield ("windows", WindowResult) per step, then ("done", windows, seconds queued) or
+            ("error", message, before_first_window, timed_out). raises ServiceBusy.
+        """
+        request = _Request(dict(params), self.timeout if timeout is None else timeout)
+        try:
+            self._queue.put_nowait(request)
+        except asyncio.QueueFull:
+            self._counts["rejected"] += 1
+            raise ServiceBusy("%d requests queued" % (self._queue.qsize(),)) from None
+        try:
+            while True:
+                message = await request.out.get()
+                yield message
+                if message[0] != "windows":
+                    return
+        finally:
+            request.cancelled = True
+            # unblock a worker slot waiting to hand over more steps
+            while not request.out.empty():
+                request.out.get_nowait()
+
+    async def _deliver(self, request, message):
+        if not request.cancelled:
+            await request.out.put(message)
+
+    async def _run_slot(self, index):
+        while True:
+            request = await self._queue.get()
+            if request.cancelled:
+                continue
+            if request.deadline is not None and time.time() > request.deadline:
+                self._counts["timeout"] += 1
+                await self._deliver(request, ("error", "timed out in the queue", True, True))
+                continue
+            self._busy += 1
+            try:
+                await self._serve(index, request)
+            finally:
+                self._busy -= 1
+
+    async def _serve(self, index, request):
+        worker = self._slots[index]
+        request.started = time.time()
+        cancel_sent = False
+        try:
+            worker.conn.send((request.params, request.deadline))
+            while True:
+                limit = None if request.deadline is None else request.deadline + self.grace - time.time()
+                message = await _recv(worker.conn, max(limit, 0.0) if limit is not None else None)
+                if request.cancelled and message[0] == "windows" and not cancel_sent:
+                    worker.conn.send("cancel")
+                    cancel_sent = True
+                if message[0] == "done":
+                    message += (request.started - request.arrived,)
+                await self._deliver(request, message)
+                if message[0] != "windows":
+                    break
+        except asyncio.TimeoutError:
+            # stuck inside a single step: only a new process gets the slot back
+            message = ("error", "timed out", False, True)
+            await self._deliver(request, message)
+            worker.kill()
+            self._slots[index] = await self._spawn()
+        except (EOFError, OSError):
+            worker.kill()
+            message = ("error", "worker died, exit code %s" % (worker.process.exitcode,), False, False)
+            await self._deliver(request, message)
+            self._slots[index] = await self._spawn()
+        else:
+            worker.requests += 1
+            if self.max_requests is not None and worker.requests >= self.max_requests:
+                worker.stop()
+                self._slots[index] = await self._spawn()
+        if message[0] == "done":
+            self._counts["done"] += 1
+            self._latencies.append(time.time() - request.arrived)
+        elif cancel_sent:
+            self._counts["cancelled"] += 1
+        else:
+            self._counts["timeout" if message[3] else "failed"] += 1
+
+    def status(self):
+        latencies = np.array(self._latencies)
+        return {
+            "workers": len(self._slots),
+            "busy": self._busy,
+            "queued": self._queue.qsize(),
+            "queue_size": self._queue.maxsize,
+            "requests": dict(self._counts),
+            "latency_p50": float(np.percentile(latencies, 50)) if len(latencies) else None,
+            "latency_p99": float(np.percentile(latencies, 99)) if len(latencies) else None,
+        }
+
+    async def serve(self, host="127.0.0.1", port=8765, unix=None):
+        """start the workers, then answer requests until cancelled"""
+        await self.start()
+        if unix is not None:
+            server = await asyncio.start_unix_server(self._handle, path=unix)
+        else:
+            server = await asyncio.start_server(self._handle, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.close()
+
+    async def _handle(self, reader, writer):
+        try:
+            method, path, headers, body = await _read_request(reader, self.max_body)
+            if path == "/status":
+                await _send_json(writer, 200, self.status())
+            elif path != "/generate":
+                await _send_json(writer, 404, {"error": "no such path: %s" % (path,)})
+            elif method != "POST":
+                await _send_json(writer, 405, {"error": "POST a JSON object to /generate"})
+            else:
+                await self._handle_generate(reader, writer, body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except _BodyTooLarge as exc:
+            await _send_json(writer, 413, {"error": str(exc)})
+        except ValueError as exc:
+            await _send_json(writer, 400, {"error": str(exc)})
+        finally:
+            writer.close()
+
+    async def _handle_generate(self, reader, writer, body):
+        params = json.loads(body or b"null")
+        if not isinstance(params, dict):
+            raise ValueError("the body must be a JSON object of StreamMixedWireless arguments")
+        timeout = _parse_timeout(params.pop("timeout", None))
+        arrived = time.time()
+        streaming = False
+        try:
+            # closed as soon as the client goes away, which frees the request's worker
+            async with contextlib.aclosing(self.generate(params, timeout)) as messages:
+                async for message in messages:
+                    if message[0] == "error":
+                        _, error, before_first, timed_out = message
+                        if not streaming:
+                            status = 504 if timed_out else (400 if before_first else 500)
+                            await _send_json(writer, status, {"error": error})
+                            return
+                        line = {"error": error}
+                    elif message[0] == "done":
+                        line = {"done": True, "windows": message[1],
+                                "queued": message[2], "seconds": time.time() - arrived}
+                    else:
+                        chunk = message[1]
+                        line = {"windows": len(chunk), "time_window": chunk.time_window,
+                                "metrics": result_columns(chunk)}
+                    if not streaming:
+                        writer.write(_status_line(200, {"Content-Type": "application/x-ndjson",
+                                                        "Transfer-Encoding": "chunked"}))
+                        streaming = True
+                    data = (json.dumps(line) + "\n").encode()
+                    writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+                    # a slow client holds back this request's worker, nothing else
+                    await writer.drain()
+                    # drain() does not raise once the peer has gone
+                    if writer.is_closing() or reader.at_eof():
+                        raise ConnectionResetError("the client went away")
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        except ServiceBusy as exc:
+            await _send_json(writer, 503, {"error": str(exc)}, {"Retry-After": "1"})
+
+
+def _parse_timeout(value):
+    """a request's timeout in seconds, None for the service default; ValueError when unusable"""
+    if value is None:
+        return None
+    # a JSON number: float("5") would take a string, and True is an int
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError("timeout must be a number of seconds, got %r" % (value,))
+    timeout = float(value)
+    if not math.isfinite(timeout) or timeout <= 0:
+        raise ValueError("timeout must be positive and finite, got %r" % (value,))
+    return timeout
+
+
+async def _read_request(reader, max_body=MAX_BODY):
+    request_line = (await reader.readline()).decode("latin-1").split()
+    if len(request_line) != 3:
+        raise ValueError("malformed request line")
+    method, path, _ = request_line
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > max_body:
+        # refused before reading it
+        raise _BodyTooLarge("a body of %d bytes, at most %d accepted" % (length, max_body))
+    body = await reader.readexactly(length)
+    return method, path.split("?")[0], headers, body
+
+
+def _status_line(status, headers):
+    lines = ["HTTP/1.1 %d %s" % (status, _REASONS[status]), "Connection: close"]
+    lines += ["%s: %s" % item for item in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def _send_json(writer, status, value, headers=None):
+    data = json.dumps(value).encode()
+    writer.write(_status_line(status, dict(headers or {}, **{
+        "Content-Type": "application/json", "Content-Length": len(data)})))
+    writer.write(data)
+    await writer.drain()
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def _connect(address, timeout):
+    if isinstance(address, str):
+        return _UnixHTTPConnection(address, timeout)
+    return http.client.HTTPConnection(*address, timeout=timeout)
+
+
+def request(address, params, timeout=None):
+    """
+        a blocking client: POST params to the service at address (a Unix socket path or a
+        (host, port) pair) and yield the response lines as dicts while they arrive.
+        raises RuntimeError with the service's message on an error status.
+    """
+    conn = _connect(address, timeout)
+    try:
+        conn.request("POST", "/generate", body=json.dumps(params),
+                     headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        if response.status != 200:
+            raise RuntimeError("%d %s" % (response.status, json.loads(response.read())["error"]))
+        for line in response:
+            yield json.loads(line)
+    finally:
+        conn.close()
+
+
+def status(address, timeout=None):
+    conn = _connect(address, timeout)
+    try:
+        conn.request("GET", "/status")
+        return json.loads(conn.getresponse().read())
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="serve MixedWireless runs from warm workers")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--unix", default=None, help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--queue-size", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=300.0, help="default per-request timeout (s)")
+    parser.add_argument("--grace", type=float, default=5.0)
+    parser.add_argument("--max-requests", type=int, default=None, help="replace a worker after this many")
+    parser.add_argument("--max-body", type=int, default=MAX_BODY, help="largest request body (bytes)")
+    args = parser.parse_args(argv)
+
+    if args.unix is not None and os.path.exists(args.unix):
+        os.remove(args.unix)
+    service = GenerationService(args.workers, args.queue_size, args.timeout, args.grace, args.max_requests,
+                                args.max_body)
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
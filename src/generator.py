@@ -1,4 +1,6 @@
 
+import math
+import random
 import time
 
 
@@ -11,289 +13,195 @@ except ModuleNotFoundError:
         " or your PYTHONPATH might not be properly configured"
     )
 import cppyy
+import numpy as np
 import os
 
+import build_tracker
+import mobility as mobility_paths
+import profiling
+from event_log import EventCapture, EventLog, check_event_layout
+from result_cache import ResultCache
+from results import WINDOW_DTYPE, DeviceWindows, WindowResult, check_sketch_layout, check_window_layout
+
 os.environ["CPPYY_UNCAUGHT_QUIET"] = "1"
 
 _cpp_initialized = False
 
+TRACE_MODES = ("context", "device")
+TOPOLOGY_BUILDERS = ("native", "python")
+# see topology_builder.h, the python builder only has the first of each
+ROUTING_BACKENDS = ("olsr", "aodv", "global")
+CHANNEL_BACKENDS = ("yans", "spectrum", "cutoff")
+# RandomDirection2d models, or the same motion precomputed in mobility.py
+MOBILITY_MODELS = ("random", "waypoint")
+# see interference/interference_models.h: raw-PHY transmitters, or complete nodes
+INTERFERER_KINDS = ("phy", "node")
+# the traffic of a MixedWireless run starts at 3 s and stops 1 s before a fixed duration
+MIN_DURATION = 10.0
+
+# which path initialize_cpp() took and how long it took, for reporting startup cost
+cpp_init_info = {"backend": None, "seconds": None}
+
+
+def _load_prebuilt_cpp():
+    """load libstatistic_tracker.so and declare it from the header, True on success"""
+    if os.environ.get("NS3_GEN_FORCE_JIT") == "1" or not build_tracker.library_is_current():
+        return False
+    try:
+        cppyy.load_library(build_tracker.LIBRARY_PATH)
+    except Exception as exc:
+        print("Failed to load %s (%s), falling back to the JIT" % (build_tracker.LIBRARY_PATH, exc))
+        return False
+    for header in build_tracker.CPP_HEADERS:
+        cppyy.include(header)
+    return True
+
+
 def initialize_cpp():
     global _cpp_initialized
     if _cpp_initialized:
         return
-    ns.cppyy.cppdef("""
-        #include "ns3/callback.h"
-        #include "ns3/packet.h"
-        #include "ns3/ipv4.h"
-        #include "ns3/ipv4-address.h"
-        #include "ns3/node.h"
-        #include <vector>
-        #include <map>
-        
-        using namespace ns3;
-                    
-        // Ipv4Address getIpv4AddressFromNode(Ptr<Node> node){
-        // return node->GetObject<Ipv4>()->GetAddress(1,0).GetLocal();
-        // }
-                    
-        Ipv4Address getIpv4AddressFromNode(Ptr<Node> node) {
-            Ptr<Ipv4> ipv4 = node->GetObject<Ipv4>();
-            if (!ipv4) {
-                return Ipv4Address();
-            }
-            return ipv4->GetAddress(1, 0).GetLocal();
-        }
-                    
-        struct WindowMetrics {
-                    // counter part
-                    int rxCount;
-                    int txCount;
-                    double rxSum;
-                    double txSum;
-                    
-                    // ap data info, statistics
-                    int RadioRXBitsPeak;
-                    int RadioTXBitsPeak;
-                    double RadioRXBitsMean;
-                    double RadioTXBitsMean;
-                    
-
-                    double radioUtilization;
-                    double meanRatioUtilization;
-                    
-                    int ratioAssociationClientsPeak;
-                    double meanRatioAssociationClients;
-
-                    int channelPeakRx;
-                    int channelPeakTx;
-                    int channelThroughput;
-                    double channelInterference;
-                    
-                    double channelBusyRate;
-                    // terminal data info 
-                    int deviceRxPeak;
-                    int deviceTxPeak;
-                    int RetriedRx;
-                    int RetriedTx;
-
-                    WindowMetrics() :
-                        rxCount(0),
-                        txCount(0),
-                        rxSum(0.0),
-                        txSum(0.0),
-                        RadioRXBitsPeak(0),
-                        RadioTXBitsPeak(0),
-                        RadioRXBitsMean(0.0),
-                        RadioTXBitsMean(0.0) {}
-        };
-                    
-        struct StatisticTracker {
-            double timeWindow;
-            double currentTime;
-            double lastWindowEnd;
-            WindowMetrics currentMetrics;
-            std::map<double, WindowMetrics> windowStatistics;
-                    
-            StatisticTracker(double window=1.0): // can set the window size as up to 60 seconds
-                    timeWindow(window),
-                    currentTime(0.0),
-                    lastWindowEnd(0.0) {}
-                
-            void updatePeaks(double time, int rxSize, int txSize) {
-                    currentTime = time;
-                    double windowEnd = std::floor(time / timeWindow) * timeWindow;
-                    if (windowEnd > lastWindowEnd) {
-
-                        if (currentMetrics.rxCount > 0) {
-                            currentMetrics.RadioRXBitsMean = currentMetrics.rxSum / currentMetrics.rxCount;
-                        }
-                        if (currentMetrics.txCount > 0) {
-                            currentMetrics.RadioTXBitsMean = currentMetrics.txSum / currentMetrics.txCount;
-                        }
-
-                        // Save metrics for the previous window
-                        if (lastWindowEnd >= 0) {
-                            windowStatistics[lastWindowEnd] = currentMetrics;
-                        }
-                        // Reset metrics for new window
-                        currentMetrics = WindowMetrics();
-                        lastWindowEnd = windowEnd;
-                    }
-
-                    currentMetrics.RadioRXBitsPeak = std::max(currentMetrics.RadioRXBitsPeak, rxSize);
-                    currentMetrics.RadioTXBitsPeak = std::max(currentMetrics.RadioTXBitsPeak, txSize);
-
-                    // Update sums and counts for mean calculation
-                    if (rxSize > 0) {
-                        currentMetrics.rxSum += rxSize;
-                        currentMetrics.rxCount++;
-                    }
-                    if (txSize > 0) {
-                        currentMetrics.txSum += txSize;
-                        currentMetrics.txCount++;
-                    }
-                }
-            
-            void updateChannelMetrics(double time, double interference, double utilization, double busyRate) {
-                currentTime = time;
-                double windowEnd = std::floor(time / timeWindow) * timeWindow;
-
-                // If we've moved to a new window
-                if (windowEnd > lastWindowEnd) {
-                    if (lastWindowEnd >= 0) {
-                        windowStatistics[lastWindowEnd] = currentMetrics;
-                    }
-                    currentMetrics = WindowMetrics();
-                    lastWindowEnd = windowEnd;
-                }
-                
-                currentMetrics.channelInterference = interference;
-                currentMetrics.radioUtilization = utilization;
-                currentMetrics.channelBusyRate = busyRate;
-            }
-        };
-                    
-        static StatisticTracker* g_statistic_tracker = nullptr;
-        
-        void InitializeStatisticTracker(double window) {
-            if (g_statistic_tracker != nullptr) {
-                    delete g_statistic_tracker;
-            }
-             g_statistic_tracker = new StatisticTracker(window);
-        }
-        
-        void DevRxTraceCallback(std::string context, Ptr<const Packet> packet) {
-            int size = packet->GetSize();
-            double now = Simulator::Now().GetSeconds();
-            g_statistic_tracker->updatePeaks(now, size, 0);
-        }
-        
-        void DevTxTraceCallback(std::string context, Ptr<const Packet> packet) {
-            int size = packet->GetSize();
-            double now = Simulator::Now().GetSeconds();
-            g_statistic_tracker->updatePeaks(now, 0, size);
-        }
-                    
-        // get all the metrics
-        std::map<double, WindowMetrics> GetWindowMetrics() {
-            return g_statistic_tracker->windowStatistics;
-        }
-                    
-        void PhyRxOkTrace(std::string context, 
-                        Ptr<const Packet> packet, 
-                        double snr,
-                        WifiMode mode,
-                        WifiPreamble preamble) {
-            std::string wifi_mode = mode.GetUniqueName();
-            int size = packet->GetSize();
-        }
-        
-        static std::vector<std::pair<int, int>> g_tx_events;
-                    
-        void PhyTxTrace(std::string context, 
-                        Ptr<const Packet> packet, 
-                        WifiMode mode,
-                        WifiPreamble preamble,
-                        uint8_t txPower) {
-            g_tx_events.push_back(std::make_pair(packet->GetSize(), (int) txPower));
-        }
-        
-        std::vector<std::pair<int, int>> GetTxEvents() {
-            return g_tx_events;
-        }
-                    
-      //   void ClearStatistics() {
-      //       g_statistic_tracker = StatisticTracker(1.0);
-      //       g_statistic_tracker.currentTime = 0.0;
-      //       g_statistic_tracker.lastWindowEnd = 0.0;
-      //   }
-        
-        void PhyTxTraceWrapper(std::string context, 
-                        Ptr<const Packet> packet, 
-                        WifiMode mode,
-                        WifiPreamble preamble,
-                        int txPowerInt) {
-            uint8_t txPower = static_cast<uint8_t>(txPowerInt);
-            PhyTxTrace(context, packet, mode, preamble, txPower);
-        }
-                    
-        
-    """)
-
-    # ns.cppyy.cppdef(
-    #     """
-    #     Ipv4Address getIpv4AddressFromNode(Ptr<Node> node){
-    #     return node->GetObject<Ipv4>()->GetAddress(1,0).GetLocal();
-    #     }
-    # """
-    # )
+    start = time.perf_counter()
+    cppyy.add_include_path(build_tracker.SRC_DIR)
+    if _load_prebuilt_cpp():
+        cpp_init_info["backend"] = "aot"
+    else:
+        # no usable prebuilt library (see build_tracker.py): let Cling compile the sources,
+        # in one transaction since they call each other (statistic_tracker.cc closes the
+        # phy event capture, phy_event_log.cc uses FindWifiDevices)
+        cppyy.cppdef("".join('#include "%s"\n' % source for source in build_tracker.CPP_SOURCES))
+        cpp_init_info["backend"] = "jit"
+    cpp_init_info["seconds"] = time.perf_counter() - start
+    # every trace callback is C++, so Run can let other python threads (a
+    # dataset_writer.DatasetWriter) work while the simulation runs
+    ns.Simulator.Run.__release_gil__ = True
+    check_window_layout(ns.cppyy.gbl.GetWindowMetricsLayout())
+    check_sketch_layout(ns.cppyy.gbl.GetSketchLayout())
+    check_event_layout(ns.cppyy.gbl.GetPhyEventLayout())
     _cpp_initialized = True
 
-# ns.cppyy.cppdef("""
-#     #include "ns3/callback.h"
-#     #include "ns3/packet.h"
-#     #include "ns3/wifi-module.h"
-#     using namespace ns3;
-
-#     // Define a type for our callback
-#     typedef void (*PhyTxCallback_t)(std::string, Ptr<const Packet>, WifiMode, WifiPreamble, int);
-    
-#     // Global function pointer (initially null)
-#     PhyTxCallback_t MyPhyTxTraceCallback = 0;
-
-#     // Wrapper that converts txPower and calls the global callback if set
-#     void PhyTxTraceCallbackWrapper(std::string context, 
-#           Ptr<const Packet> packet, WifiMode mode, WifiPreamble preamble, uint8_t txPower) {
-#          if (MyPhyTxTraceCallback) {
-#              MyPhyTxTraceCallback(context, packet, mode, preamble, static_cast<int>(txPower));
-#          }
-#     }
-# """)
 
+def _start_run(sampleCts, seed=None, stream_capacity=0, sketches=False, run=None):
+    """reset the simulator and the tracker for a new run, returns the window size"""
+    ns.Simulator.Destroy()
+    initialize_cpp() # intialize the cpp module
+    if seed is not None or run is not None:
+        if seed is not None:
+            ns.RngSeedManager.SetSeed(int(seed))
+        # the run number outlives the run, put back ns-3's default when none is given
+        ns.RngSeedManager.SetRun(int(run) if run is not None else 1)
+        ns.RngSeedManager.ResetNextStreamIndex()
 
-# def rx_trace_callback(context, packet):
-#     rx_packet_sizes.append(packet.GetSize())
+    timeWindow = float(7.0/sampleCts)
+    ns.cppyy.gbl.InitializeStatisticTracker(timeWindow)
+    if sketches:
+        ns.cppyy.gbl.EnableWindowSketches()
+    if stream_capacity:
+        ns.cppyy.gbl.EnableWindowStreaming(int(stream_capacity))
+    return timeWindow
 
-# def rx_phy_callback(context, packet, snr, mode, pre_amble):
-#     rx_events.append({
-#         'packet_size': packet.GetSize(),
-#         'mode': mode.GetUniqueName(),
-#     })
 
+PORT = 9  #  Discard port(RFC 863)
 
 
-def MixedWireless(numofbackbone, numofInfra, numofLan, duration, sampleCts):
+def _build_scenario(numofbackbone, numofInfra, numofLan, duration, builder="native", **backends):
     """
-        the simulation params are predefined. we can set a logic here to choose the params 
-        based on the requestFlag. for instance, if it requst the channel interference then 
-        we can set two ap or we if not then we can just passed the config.
+        create the backbone/infra topology and the OnOff traffic of a MixedWireless run.
+        returns the python-side objects that must outlive Simulator.Run. with duration
+        None the traffic lasts until the simulator is stopped.
     """
-    from ctypes import c_double, c_int
-    
-    ns.Simulator.Destroy()
-    initialize_cpp() # intialize the cpp module
-    # ns.cppyy.gbl.ClearStatistics()
-    
+    if duration is not None and duration < MIN_DURATION:
+        raise ValueError("use a simulation stop time >= %g seconds, got %r" % (MIN_DURATION, duration))
 
-    ns.cppyy.gbl.InitializeStatisticTracker(float(7.0/sampleCts))
+    tempRef = _build_topology(numofbackbone, numofInfra, numofLan, builder, **backends)
 
-    backboneNodes = c_int(numofbackbone)
-    infraNodes = c_int(numofInfra)
-    lanNodes = c_int(numofLan)
-    stopTime = c_double(duration)
+    #  Create the OnOff application to send UDP datagrams of size
+    #  210 bytes at a rate of 448 Kb/s, between two nodes
+    stations = _station_nodes(numofbackbone, numofInfra, numofLan)
+    appSource = stations[0]
+    appSink = stations[-1]
+    tempRef.extend(_install_onoff(appSource, appSink, 3, None if duration is None else duration - 1))
+
+    #  Create a packet sink to receive these packets
+    tempRef.extend(_install_sinks([appSink], 2)) # from 2 to 10 simulate 8 seconds
+    return tempRef
+
+
+def _station_nodes(numofbackbone, numofInfra, numofLan):
+    """the non-backbone nodes, the ones traffic is sent between"""
+    lastNodeIndex = (
+        numofbackbone
+        + numofbackbone * (numofLan - 1)
+        + numofbackbone * (numofInfra - 1)
+        - 1
+    )
+    return [ns.NodeList.GetNode(i) for i in range(numofbackbone, lastNodeIndex + 1)]
+
+
+def _install_onoff(source, sink, start, stop):
+    """an OnOff UDP flow from source to sink's first address between start and stop (None: the end)"""
+    # Let's fetch the IP address of the last node, which is on Ipv4Interface 1
+    remoteAddr = ns.cppyy.gbl.getIpv4AddressFromNode(sink)
+    socketAddr = ns.InetSocketAddress(remoteAddr, PORT)
+    onoff = ns.OnOffHelper("ns3::UdpSocketFactory", socketAddr.ConvertTo())
+    apps = onoff.Install(ns.NodeContainer(source))
+    apps.Start(ns.Seconds(start))
+    if stop is not None:
+        apps.Stop(ns.Seconds(stop))
+    return [onoff, apps]
+
+
+def _install_sinks(nodes, start):
+    """a UDP PacketSink on PORT of every node, running until the end"""
+    sink = ns.PacketSinkHelper(
+        "ns3::UdpSocketFactory",
+        ns.InetSocketAddress(ns.InetSocketAddress(ns.Ipv4Address.GetAny(), PORT)).ConvertTo(),
+    )
+    sinkContainer = ns.NodeContainer()
+    for node in nodes:
+        sinkContainer.Add(node)
+    apps = sink.Install(sinkContainer)
+    apps.Start(ns.Seconds(start))
+    return [sink, sinkContainer, apps]
+
+
+def _build_topology(numofbackbone, numofInfra, numofLan, builder="native", routing="olsr",
+                    channel="yans", cutoff_range=250.0, mobility="random"):
+    """
+        the backbone/infra nodes, devices, addresses and mobility, without traffic.
+        "native" builds them with one call into topology_builder.cc, "python" helper call
+        by helper call; both give the same network. routing, channel and mobility pick the
+        backends described in topology_builder.h, native builder only. returns the
+        python-side objects that must outlive Simulator.Run.
+    """
+    if builder not in TOPOLOGY_BUILDERS:
+        raise ValueError("unknown topology builder: %r" % (builder,))
+    if routing not in ROUTING_BACKENDS:
+        raise ValueError("unknown routing backend: %r" % (routing,))
+    if channel not in CHANNEL_BACKENDS:
+        raise ValueError("unknown channel backend: %r" % (channel,))
+    if mobility not in MOBILITY_MODELS:
+        raise ValueError("unknown mobility: %r" % (mobility,))
+    if builder == "python" and (routing, channel, mobility) != (ROUTING_BACKENDS[0], CHANNEL_BACKENDS[0],
+                                                                 MOBILITY_MODELS[0]):
+        raise ValueError("the python topology builder only does olsr over yans, random mobility")
 
-    
-    # statistic_events = collections.defaultdict(list)
-    # if not requestFlag:
-    #     statistic_events['TimeWindow'] = []
-    statistic_events = []
-    
     ns.Config.SetDefault("ns3::OnOffApplication::PacketSize", ns.StringValue("1024"))
     ns.Config.SetDefault("ns3::OnOffApplication::DataRate", ns.StringValue("100kb/s"))
 
-    if stopTime.value < 10:
-        print("Use a simulation stop time >= 10 seconds")
-        exit(1)
+    if builder == "native":
+        spec = ns.cppyy.gbl.TopologySpec(numofbackbone, numofInfra, numofLan, routing, channel, float(cutoff_range),
+                                         mobility)
+        ns.cppyy.gbl.BuildMixedTopology(spec)
+        return []
+    return _build_topology_python(numofbackbone, numofInfra, numofLan)
+
+
+def _build_topology_python(numofbackbone, numofInfra, numofLan):
+    from ctypes import c_int
+
+    backboneNodes = c_int(numofbackbone)
+    infraNodes = c_int(numofInfra)
 
     backbone = ns.NodeContainer()
     backbone.Create(backboneNodes.value)
@@ -350,64 +258,11 @@ def MixedWireless(numofbackbone, numofInfra, numofLan, duration, sampleCts):
     )
     mobility.Install(backbone)
 
-    # ## construct the LANs # future simulation can introduce the LAN network
-    # #  Reset the address base-- all of the CSMA networks will be in
-    # #  the "172.16 address space
-    # ipAddrs.SetBase(ns.Ipv4Address("172.16.0.0"), ns.Ipv4Mask("255.255.255.0"))
-
-    # for i in range(backboneNodes.value):
-    #     print("Configuring local area network for backbone node ", i)
-    #     #
-    #     #  Create a container to manage the nodes of the LAN.  We need
-    #     #  two containers here; one with all of the new nodes, and one
-    #     #  with all of the nodes including new and existing nodes
-    #     #
-    #     newLanNodes = ns.NodeContainer()
-    #     newLanNodes.Create(lanNodes.value - 1)
-    #     #  Now, create the container with all nodes on this link
-    #     lan = ns.NodeContainer(ns.NodeContainer(backbone.Get(i)), newLanNodes)
-    #     #
-    #     #  Create the CSMA net devices and install them into the nodes in our
-    #     #  collection.
-    #     #
-    #     csma = ns.CsmaHelper()
-    #     csma.SetChannelAttribute("DataRate", ns.DataRateValue(ns.DataRate(5000000)))
-    #     csma.SetChannelAttribute("Delay", ns.TimeValue(ns.MilliSeconds(2)))
-    #     lanDevices = csma.Install(lan)
-    #     #
-    #     #  Add the IPv4 protocol stack to the new LAN nodes
-    #     #
-    #     internet.Install(newLanNodes)
-    #     #
-    #     #  Assign IPv4 addresses to the device drivers(actually to the
-    #     #  associated IPv4 interfaces) we just created.
-    #     #
-    #     ipAddrs.Assign(lanDevices)
-    #     #
-    #     #  Assign a new network prefix for the next LAN, according to the
-    #     #  network mask initialized above
-    #     #
-    #     ipAddrs.NewNetwork()
-    #     #
-    #     # The new LAN nodes need a mobility model so we aggregate one
-    #     # to each of the nodes we just finished building.
-    #     #
-    #     mobilityLan = ns.MobilityHelper()
-    #     positionAlloc = ns.ListPositionAllocator()
-    #     for j in range(newLanNodes.GetN()):
-    #         positionAlloc.Add(ns.Vector(0.0, (j * 10 + 10), 0.0))
-
-    #     mobilityLan.SetPositionAllocator(positionAlloc)
-    #     mobilityLan.PushReferenceMobilityModel(backbone.Get(i))
-    #     mobilityLan.SetMobilityModel("ns3::ConstantPositionMobilityModel")
-    #     mobilityLan.Install(newLanNodes)
-
     #  Reset the address base-- all of the 802.11 networks will be in
     #  the "10.0" address space
     ipAddrs.SetBase(ns.Ipv4Address("10.0.0.0"), ns.Ipv4Mask("255.255.255.0"))
     tempRef = []  # list of references to be held to prevent garbage collection
     for i in range(backboneNodes.value):
-        print("Configuring wireless network for backbone node ", i)
         #
         #  Create a container to manage the nodes of the LAN.  We need
         #  two containers here; one with all of the new nodes, and one
@@ -475,119 +330,393 @@ def MixedWireless(numofbackbone, numofInfra, numofLan, duration, sampleCts):
         )
         mobility.Install(stas)
 
-    #  Create the OnOff application to send UDP datagrams of size
-    #  210 bytes at a rate of 448 Kb/s, between two nodes
-    port = 9  #  Discard port(RFC 863)
+    # the simulation runs after this function returns, hold on to the helpers as well
+    tempRef.extend([backbone, backboneDevices, wifiChannel, wifiPhy, mobility, internet, olsr])
+    return tempRef
 
-    appSource = ns.NodeList.GetNode(backboneNodes.value)
-    lastNodeIndex = (
-        backboneNodes.value
-        + backboneNodes.value * (lanNodes.value - 1)
-        + backboneNodes.value * (infraNodes.value - 1)
-        - 1
-    )
-    appSink = ns.NodeList.GetNode(lastNodeIndex)
 
-    # Let's fetch the IP address of the last node, which is on Ipv4Interface 1
-    remoteAddr = ns.cppyy.gbl.getIpv4AddressFromNode(appSink)
-    socketAddr = ns.InetSocketAddress(remoteAddr, port)
-    onoff = ns.OnOffHelper("ns3::UdpSocketFactory", socketAddr.ConvertTo())
-    apps = onoff.Install(ns.NodeContainer(appSource))
-    apps.Start(ns.Seconds(3))
-    apps.Stop(ns.Seconds(stopTime.value - 1))
+def _connect_traces(trace_mode="context", channel_metrics=True):
+    """
+        hook the trackers to the MAC trace sources. "context" feeds every device into the
+        global tracker through Config.Connect; "device" additionally keeps one tracker per
+        wifi device and connects without the per-packet context string.
+        channel_metrics also connects the phy state, rx outcome and AP association
+        sources, all handled in C++ (see ConnectChannelTraces).
+    """
+    # ====================================================== MacRx recording
 
-    #  Create a packet sink to receive these packets
-    sink = ns.PacketSinkHelper(
-        "ns3::UdpSocketFactory",
-        ns.InetSocketAddress(ns.InetSocketAddress(ns.Ipv4Address.GetAny(), port)).ConvertTo(),
-    )
-    sinkContainer = ns.NodeContainer(appSink)
-    apps = sink.Install(sinkContainer)
-    apps.Start(ns.Seconds(2)) # from 2 to 10 simulate 8 seconds 
+    if trace_mode == "device":
+        # one tracker per device, no per-packet context string
+        ns.cppyy.gbl.ConnectDeviceTraces()
+    else:
+        # same as Config.Connect(path, MakeCallback(DevRxTraceCallback)), see
+        # statistic_tracker.h for why it is done in C++
+        ns.cppyy.gbl.ConnectContextTraces()
 
-    # ====================================================== MacRx recording
+    # ====================================================== Phy state/rx, AP association
+    if channel_metrics:
+        ns.cppyy.gbl.ConnectChannelTraces()
 
-    ns.Config.Connect(
-    "/NodeList/*/DeviceList/*/Mac/MacRx",
-    ns.MakeCallback(ns.cppyy.gbl.DevRxTraceCallback)
-    )
-    ns.Config.Connect(
-    "/NodeList/*/DeviceList/*/Mac/MacTx",
-    ns.MakeCallback(ns.cppyy.gbl.DevTxTraceCallback)
-    )
 
-    # ns.Config.Connect(
-    # "/NodeList/*/DeviceList/*/Phy/State/RxOk",
-    # ns.MakeCallback(ns.cppyy.gbl.PhyRxOkTrace)
-    # )
-
-    # ns.Config.Connect(
-    # "/NodeList/*/DeviceList/*/Phy/State/Tx",
-    # ns.MakeCallback(ns.cppyy.gbl.PhyTxTraceWrapper)
-    # )
-
-    # ns.Config.Connect(
-    #     "/NodeList/*/DeviceList/*/Mac/MacRx",
-    #     ns.MakeCallback(rx_trace_callback)
-    # )
-    # ns.Config.Connect(
-    #     "/NodeList/*/DeviceList/*/Mac/MacTx",
-    #     ns.MakeCallback(tx_trace_callback)
-    # )
-
-    # ====================================================== Phy Rx recording
-    # ns.Config.Connect(
-    #     "/NodeList/*/DeviceList/*/Phy/State/RxOk",
-    #     ns.MakeCallback(rx_phy_callback)
-    # )
-
-    # ns.Config.Connect(
-    #     "/NodeList/*/DeviceList/*/Phy/State/Tx",
-    #     ns.MakeCallback(tx_phy_callback)
-    # )
-
-    ns.Simulator.Stop(ns.Seconds(stopTime.value))
+def _add_interferers(count, duty_cycle, kind="phy"):
+    """
+        count interferers around the access points, each on the air duty_cycle of the
+        time (see AddAccessPointInterferers). after _connect_traces, so the interferers'
+        own devices stay out of the statistics.
+    """
+    if kind not in INTERFERER_KINDS:
+        raise ValueError("unknown interferer kind: %r" % (kind,))
+    if not 0.0 < duty_cycle <= 1.0:
+        raise ValueError("duty_cycle must be in (0, 1], got %r" % (duty_cycle,))
+    if count > 0:
+        ns.cppyy.gbl.ns3.AddAccessPointInterferers(int(count), float(duty_cycle), kind)
+
+
+def _early_stop(timeWindow, duration, windows, converge, tolerance, patience, warmup):
+    """
+        hand the stop conditions to the tracker (see EnableEarlyStop), returns the time
+        to stop the simulator at anyway: duration, or the end of the requested windows
+        when that comes first or duration is None.
+    """
+    converge = list(converge or ())
+    if windows is None and not converge:
+        if duration is None:
+            raise ValueError("a run needs a duration, or windows to stop after")
+        return float(duration)
+    if windows is None and duration is None:
+        raise ValueError("a converging run still needs a duration or windows to bound it")
+    if windows is not None and windows < 1:
+        raise ValueError("windows must be at least 1, got %r" % (windows,))
+    if converge and patience < 1:
+        raise ValueError("patience must be at least 1, got %r" % (patience,))
+    offsets, types = [], ""
+    for name in converge:
+        if name not in WINDOW_DTYPE.names:
+            raise ValueError("unknown window field: %r" % (name,))
+        dtype, offset = WINDOW_DTYPE.fields[name][:2]
+        offsets.append(offset)
+        types += "d" if dtype.kind == "f" else "i"
+
+    stop = math.inf if duration is None else float(duration)
+    if windows is not None:
+        firstWindow = math.ceil(warmup / timeWindow - 1e-9)
+        stop = min(stop, (firstWindow + windows) * timeWindow)
+    ns.cppyy.gbl.EnableEarlyStop(float(warmup), int(windows or 0), float(tolerance),
+                                 int(patience) if converge else 0,
+                                 ns.cppyy.gbl.std.vector["size_t"](offsets), types)
+    return stop
+
+
+def _load_trajectories(numofbackbone, numofInfra, stop, seed, run, cache):
+    """the waypoints of a mobility="waypoint" run until stop, see mobility.py"""
+    paths = mobility_paths.trajectories(
+        numofbackbone, numofInfra, stop, seed, run,
+        directory=os.path.join(cache.directory, "trajectories") if cache is not None else None)
+    ns.cppyy.gbl.LoadWaypoints(0, len(paths.counts), paths.counts, paths.times, paths.x, paths.y)
+
+
+def _simulated_seconds(stop):
+    """the simulated time a run took: where the tracker stopped it, or stop"""
+    stopped = float(ns.cppyy.gbl.GetEarlyStopTime())
+    return stopped if stopped >= 0 else stop
+
+
+def _detach_device_results(timeWindow):
+    """the per-device windows after a "device" mode run, as results.DeviceWindows"""
+    devices = []
+    for index in range(int(ns.cppyy.gbl.GetDeviceCount())):
+        info = ns.cppyy.gbl.GetDeviceInfo(index)
+        windows = WindowResult.from_buffer(ns.cppyy.gbl.DetachDeviceWindowMetrics(index), timeWindow)
+        devices.append(DeviceWindows(int(info.nodeId), int(info.ifIndex), windows))
+    return devices
+
+
+def _add_rollups(timeWindow, resolutions):
+    """register the coarser window sizes (seconds) with the tracker, returns them in order"""
+    resolutions = sorted(set(float(r) for r in resolutions or ()))
+    for seconds in resolutions:
+        factor = int(round(seconds / timeWindow))
+        if factor < 1 or abs(factor * timeWindow - seconds) > 1e-9 * seconds:
+            raise ValueError("resolution %gs is not a multiple of the %gs window" % (seconds, timeWindow))
+        ns.cppyy.gbl.AddWindowRollup(factor)
+    return resolutions
+
+
+def MixedWireless(numofbackbone, numofInfra, numofLan, duration, sampleCts, seed=None,
+                  result_format="field_mapping", trace_mode="context", resolutions=None,
+                  sketches=False, channel_metrics=True, cache=None, profile=False,
+                  topology_builder="native", routing="olsr", channel="yans", cutoff_range=250.0,
+                  interferers=0, interferer_duty_cycle=0.1, interferer_kind="phy", events=None,
+                  run=None, windows=None, converge=None, tolerance=0.01, patience=5, warmup=3.0,
+                  mobility="random"):
+    """
+        the simulation params are predefined. we can set a logic here to choose the params
+        based on the requestFlag. for instance, if it requst the channel interference then
+        we can set two ap or we if not then we can just passed the config.
+
+        seed: optional ns-3 RNG seed. when given the stream index is reset as well, so a
+        scenario gives the same result whether it runs in a fresh or in a reused process.
+        run: the ns-3 RNG run number (substream) under that seed, 1 by default. runs of
+        the same seed are independent, see generation_job.py.
+        result_format: "field_mapping" returns the legacy dict of [timestamp, str(value)]
+        lists, "windows" a results.WindowResult backed by the tracker's own memory.
+        trace_mode: "context" (Config.Connect) or "device", which also fills
+        result.devices with the windows of every wifi device (see _connect_traces).
+        resolutions: extra window sizes in seconds, multiples of the 7/sampleCts window,
+        aggregated in the same run from the base windows. result.rollups maps each size
+        to its WindowResult.
+        sketches: keep fixed-size quantile sketches of packet sizes and throughput with
+        every window (and rollup window), see WindowResult.quantiles. throughput is
+        sampled per tenth of the window, results.THROUGHPUT_SLICES.
+        channel_metrics: compute radioUtilization, channelBusyRate, channelInterference,
+        meanSnrDb and the associated clients per AP from the phy and AP traces; without
+        them those columns stay 0.
+        cache: a result_cache.ResultCache, or the directory of one, to look the run up in
+        before simulating it and store it in after. only runs with a seed are cached, the
+        others are not reproducible. cached windows are memory-mapped read-only.
+        profile: also return an instrumentation report, (output, report): wall and cpu
+        time per phase, executed ns-3 events, trace callback counts and time, windows and result
+        bytes (see profiling.py). cheap enough to leave on.
+        topology_builder: "native" (topology_builder.cc, one call) or "python" (helper by
+        helper through cppyy); the network and so the result are the same.
+        routing: "olsr", "aodv" or "global" (static routes computed once).
+        channel: "yans", "spectrum" or "cutoff" (spectrum, receivers beyond cutoff_range
+        meters are skipped). see topology_builder.h; anything but olsr over yans needs
+        the native builder.
+        interferers: transmitters spread round robin over the access points, each on the
+        air interferer_duty_cycle of the time. interferer_kind "phy" sends raw frames
+        from a bare wifi phy, "node" runs a full node (IP stack, OnOff broadcast) per
+        interferer, far more expensive for the same air time.
+        events: capture every phy transmission and reception of the network into a file,
+        an event_log.EventCapture or just its path (default capacity, no sampling).
+        result.events is then the event_log.EventLog over it; such runs are not cached.
+        windows: stop once this many complete windows past warmup seconds have closed,
+        instead of running to duration; duration may then be None.
+        converge: window fields (see results.WINDOW_FIELDS) whose running mean over the
+        windows past warmup is watched; the run stops once every one has stayed within
+        tolerance (relative) for patience windows, or at duration / windows otherwise.
+        the windows before warmup are still returned. result.simulated_seconds is the
+        simulated time the run took (the report's simulated_seconds with profile=True).
+        mobility: "random" (ns-3's RandomDirection2d models) or "waypoint", the same
+        motion precomputed in numpy and replayed without events (see mobility.py); the
+        trajectories are cached per topology, seed and run, under cache when given.
+    """
+    if result_format not in ("field_mapping", "windows"):
+        raise ValueError("unknown result_format: %r" % (result_format,))
+    if trace_mode not in TRACE_MODES:
+        raise ValueError("unknown trace_mode: %r" % (trace_mode,))
+
+    timer = profiling.PhaseTimer()
+
+    def finish(result, base_time, **report):
+        output = result if result_format == "windows" else result.field_mapping(base_time)
+        if not profile:
+            return output
+        timer.mark("convert")
+        return output, profiling.build_report(timer, result, backend=cpp_init_info["backend"], **report)
+
+    if events is not None and not isinstance(events, EventCapture):
+        events = EventCapture(events)
+
+    key = None
+    if cache is not None and seed is not None and events is None:
+        if not isinstance(cache, ResultCache):
+            cache = ResultCache(cache)
+        params = dict(numofbackbone=numofbackbone, numofInfra=numofInfra, numofLan=numofLan,
+                      duration=duration, sampleCts=sampleCts, seed=seed, trace_mode=trace_mode,
+                      resolutions=resolutions or (), sketches=sketches,
+                      channel_metrics=channel_metrics, routing=routing, channel=channel,
+                      cutoff_range=cutoff_range if channel == "cutoff" else None)
+        if run is not None:
+            params["run"] = run
+        if mobility != "random":
+            params["mobility"] = mobility
+        if windows is not None or converge:
+            params.update(windows=windows, converge=list(converge or ()), warmup=warmup,
+                          tolerance=tolerance if converge else None, patience=patience if converge else None)
+        if interferers:
+            params.update(interferers=interferers, interferer_duty_cycle=interferer_duty_cycle,
+                          interferer_kind=interferer_kind)
+        key = cache.key(**params)
+        result = cache.get(key)
+        if result is not None:
+            timer.mark("cache")
+            # the events of the run that filled the cache are not kept: None, not 0
+            return finish(result, int(time.time()), cache_hit=True, events_executed=None,
+                          simulated_seconds=result.simulated_seconds)
+
+    heap_start = profiling.heap_mb() if profile else None
+    timeWindow = _start_run(sampleCts, seed, sketches=sketches, run=run)
+    if profile:
+        ns.cppyy.gbl.EnableCallbackProfiling(profiling.CALLBACK_SAMPLE_EVERY)
+    resolutions = _add_rollups(timeWindow, resolutions)
+    timer.mark("start")
+    tempRef = _build_scenario(numofbackbone, numofInfra, numofLan, duration, topology_builder,
+                              routing=routing, channel=channel, cutoff_range=cutoff_range, mobility=mobility)
+    timer.mark("build")
+    _connect_traces(trace_mode, channel_metrics)
+    if events is not None:
+        events.open(ns.cppyy.gbl, seed)
+        ns.cppyy.gbl.ConnectPhyEventCapture()
+    _add_interferers(interferers, interferer_duty_cycle, interferer_kind)
+    stop = _early_stop(timeWindow, duration, windows, converge, tolerance, patience, warmup)
+    if mobility == "waypoint":
+        _load_trajectories(numofbackbone, numofInfra, stop, seed, run, cache if key is not None else None)
+    timer.mark("connect")
+
+    ns.Simulator.Stop(ns.Seconds(stop))
     ns.Simulator.Run()
+    # the last window is still open when the simulator stops
+    ns.cppyy.gbl.FlushStatisticTracker()
+    if events is not None:
+        ns.cppyy.gbl.ClosePhyEventCapture()
+    event_count = int(ns.Simulator.GetEventCount())
+    simulated_seconds = _simulated_seconds(stop)
+    rss_mb = profiling.rss_mb() if profile else None
+    heap_mb = profiling.heap_mb() if profile else None
+    if heap_mb is not None:
+        heap_mb -= heap_start
+    timer.mark("run")
 
     base_time = int(time.time())
-    # 
 
-    
-    events = ns.cppyy.gbl.GetWindowMetrics()
-
-    field_mapping = {
-        'ap_status': [],
-        'radio_tx_bits': [],
-        'radio_rx_bits': [],
-        'radio_utilization': [],
-        'radio_associated_clients': [],
-        'channel_tx_rate': [],
-        'channel_rx_rate': [],
-        'channel_throughput': [],
-        'channel_busy_rate': [],
-        'channel_interference_rate': []
-    }
-    for time_window, val in events:
-        tstamp = base_time + int(time_window)*180
-        field_mapping['ap_status'].append([tstamp, str(1)])
-        field_mapping['radio_tx_bits'].append([tstamp, str(val.txSum)])
-        field_mapping['radio_rx_bits'].append([tstamp, str(val.rxSum)])
-        field_mapping['radio_utilization'].append([tstamp, str(0.8)])
-        field_mapping['radio_associated_clients'].append([tstamp, str(3)])
-        field_mapping['channel_tx_rate'].append([tstamp, str(val.RadioTXBitsMean)])
-        field_mapping['channel_rx_rate'].append([tstamp, str(val.RadioRXBitsMean)])
-        field_mapping['channel_throughput'].append([tstamp, str((val.RadioRXBitsPeak+val.RadioTXBitsPeak)//2)])
-        field_mapping['channel_busy_rate'].append([tstamp, str(0.8)])
-        field_mapping['channel_interference_rate'].append([tstamp, str(0.1)])
-
-        # statistic_events['TimeWindow'].append(time_window)
-        # statistic_events['RadioRXBitsPeak'].append(val.RadioRXBitsPeak)
-        # statistic_events['RadioRXBitsMean'].append(val.RadioRXBitsMean)
-        # statistic_events['RadioTXBitsPeak'].append(val.RadioTXBitsPeak)
-        # statistic_events['RadioTXBitsMean'].append(val.RadioTXBitsMean)
-        # for k, v in val.items():
-        #     statistic_events[k].append(v)
-    
+    result = WindowResult.from_buffer(ns.cppyy.gbl.DetachWindowMetrics(), timeWindow)
+    result.simulated_seconds = simulated_seconds
+    if events is not None:
+        result.events = EventLog(events.path)
+    if trace_mode == "device":
+        result.devices = _detach_device_results(timeWindow)
+    if resolutions:
+        result.rollups = {
+            seconds: WindowResult.from_buffer(ns.cppyy.gbl.DetachRollupWindowMetrics(index), seconds)
+            for index, seconds in enumerate(resolutions)
+        }
+
+    callbacks = profiling.callback_profile(ns.cppyy.gbl) if profile else None
     ns.Simulator.Destroy()
 
-    return field_mapping
+    if key is not None:
+        cache.put(key, result, params)
+    timer.mark("extract")
+
+    return finish(result, base_time, callbacks=callbacks, events_executed=event_count, simulated_seconds=simulated_seconds,
+                  rss_mb=rss_mb, heap_mb=heap_mb)
+
+
+def MultiSampleMixedWireless(numofbackbone, numofInfra, numofLan, sampleCts, samples,
+                             segment=10.0, warmup=3.0, gap=1.0, seed=None,
+                             result_format="field_mapping", sketches=False, channel_metrics=True,
+                             topology_builder="native", routing="olsr", channel="yans",
+                             cutoff_range=250.0, run=None):
+    """
+        samples independent samples of the MixedWireless network from a single run, instead
+        of one run (topology build, OLSR convergence, app start) per sample.
+
+        the topology is built once and left warmup seconds to converge. then every sample
+        gets its own segment seconds of OnOff traffic between two stations picked at random
+        (seeded by seed), followed by gap seconds of silence so its packets do not spill
+        into the next sample. segments are rounded up to whole windows.
+
+        returns a list of samples, each shaped like a MixedWireless result of its own:
+        windows counted from the segment start, so window 0 is the first of the segment.
+    """
+    if result_format not in ("field_mapping", "windows"):
+        raise ValueError("unknown result_format: %r" % (result_format,))
+    if samples < 1:
+        raise ValueError("samples must be at least 1, got %r" % (samples,))
+    if segment <= 0:
+        raise ValueError("segment must be positive, got %r" % (segment,))
+
+    timeWindow = _start_run(sampleCts, seed, sketches=sketches, run=run)
+    segmentWindows = int(math.ceil(segment / timeWindow - 1e-9))
+    strideWindows = int(math.ceil((segment + gap) / timeWindow - 1e-9))
+    firstWindow = int(math.ceil(warmup / timeWindow - 1e-9))
+
+    tempRef = _build_topology(numofbackbone, numofInfra, numofLan, topology_builder,
+                              routing=routing, channel=channel, cutoff_range=cutoff_range)
+    stations = _station_nodes(numofbackbone, numofInfra, numofLan)
+    if len(stations) < 2:
+        raise ValueError("need at least two stations to send traffic between")
+    # every station may be picked as a sink, one PacketSink each (a second one on the
+    # same port would fail to bind)
+    tempRef.extend(_install_sinks(stations, min(2.0, warmup)))
+
+    rng = random.Random(seed)
+    firsts = []
+    for i in range(samples):
+        first = firstWindow + i * strideWindows
+        source, sink = rng.sample(stations, 2)
+        tempRef.extend(_install_onoff(source, sink, first * timeWindow, (first + segmentWindows) * timeWindow))
+        firsts.append(first)
+    _connect_traces("context", channel_metrics)
+
+    ns.Simulator.Stop(ns.Seconds((firsts[-1] + segmentWindows) * timeWindow))
+    ns.Simulator.Run()
+    ns.cppyy.gbl.FlushStatisticTracker()
+
+    base_time = int(time.time())
+    result = WindowResult.from_buffer(ns.cppyy.gbl.DetachWindowMetrics(), timeWindow)
+    ns.Simulator.Destroy()
+
+    out = []
+    for first in firsts:
+        # window k of the run is result.records[k], copy the segment out and rebase it
+        records = np.array(result.records[first:first + segmentWindows])
+        records["windowStart"] -= first * timeWindow
+        sketches_ = None
+        if result.sketches is not None:
+            sketches_ = np.array(result.sketches[first:first + segmentWindows])
+        sample = WindowResult(records, timeWindow, sketches=sketches_)
+        out.append(sample if result_format == "windows" else sample.field_mapping(base_time))
+    return out
+
+
+def StreamMixedWireless(numofbackbone, numofInfra, numofLan, duration, sampleCts, seed=None,
+                        step=None, capacity=None, sketches=False, channel_metrics=True,
+                        topology_builder="native", routing="olsr", channel="yans", cutoff_range=250.0,
+                        run=None, windows=None, converge=None, tolerance=0.01, patience=5, warmup=3.0,
+                        mobility="random"):
+    """
+        same scenario as MixedWireless, but yields the windows while the simulation runs
+        instead of returning them at the end. windows, converge, tolerance, patience and
+        warmup stop it early as in MixedWireless; the last WindowResult yielded carries
+        the simulated_seconds of the run. mobility as in MixedWireless.
+
+        the simulator is advanced step simulated seconds at a time (one window by default);
+        the windows closed during a step are yielded as a results.WindowResult, the final
+        partial window once the stop time is reached. closed windows wait in a ring buffer
+        of capacity windows inside the tracker, so memory stays constant however long the
+        run is. if a step closes more windows than fit, the oldest are dropped and
+        counted by GetDroppedWindowCount().
+    """
+    timeWindow = float(7.0/sampleCts)
+    step = float(step or timeWindow)
+    if capacity is None:
+        capacity = int(math.ceil(step / timeWindow)) + 2
+
+    _start_run(sampleCts, seed, stream_capacity=capacity, sketches=sketches, run=run)
+    try:
+        tempRef = _build_scenario(numofbackbone, numofInfra, numofLan, duration, topology_builder,
+                                  routing=routing, channel=channel, cutoff_range=cutoff_range, mobility=mobility)
+        _connect_traces(channel_metrics=channel_metrics)
+        stop = _early_stop(timeWindow, duration, windows, converge, tolerance, patience, warmup)
+        if mobility == "waypoint":
+            _load_trajectories(numofbackbone, numofInfra, stop, seed, run, None)
+
+        now = 0.0
+        while now < stop:
+            now = min(now + step, stop)
+            ns.Simulator.Stop(ns.Seconds(now) - ns.Simulator.Now())
+            ns.Simulator.Run()
+            last = now >= stop or ns.cppyy.gbl.GetEarlyStopTime() >= 0
+            if last:
+                ns.cppyy.gbl.FlushStatisticTracker()
+            drained = WindowResult.from_buffer(ns.cppyy.gbl.DrainWindowMetrics(), timeWindow)
+            if last:
+                drained.simulated_seconds = _simulated_seconds(stop)
+            if len(drained) or last:
+                yield drained
+            if last:
+                break
+    finally:
+        ns.Simulator.Destroy()
@@ -0,0 +1,137 @@
+"""
+    precomputed node trajectories for MixedWireless(mobility="waypoint").
+
+    every backbone and station node of MixedWireless moves like ns-3's
+    RandomDirection2dMobilityModel: straight ahead at a constant speed until it meets the
+    bounds, a pause there, then a new direction drawn uniformly from the half plane that
+    points away from the nearest side. with mobility="waypoint" that motion is drawn
+    here, one leg at a time for all nodes of a kind at once, and handed to ns-3 as
+    WaypointMobilityModels with LazyNotify set: they schedule no events and only
+    interpolate when a position is asked for. stations keep moving relative to their
+    access point, like the hierarchical models of the default.
+
+    the paths follow the same law, not ns-3's random streams: a seeded run is
+    reproducible, but its trajectories are not those of the mobility="random" run with
+    that seed.
+
+    trajectories depend on the backbone and infra sizes, the stop time, the seed and the
+    run only, so scenarios that differ in routing, channel, traffic or windows share
+    them. they are kept in a small in-process LRU, and on disk under a ResultCache's
+    directory when the run has one.
+"""
+
+import collections
+import os
+import uuid
+
+import numpy as np
+
+
+# must match the RandomDirection2dMobilityModel attributes in topology_builder.cc
+Kind = collections.namedtuple("Kind", ["bounds", "speed", "pause"])  # bounds: xmin, xmax, ymin, ymax
+BACKBONE = Kind((-500.0, 500.0, -500.0, 500.0), 2.0, 0.2)
+STATION = Kind((-10.0, 10.0, -10.0, 10.0), 3.0, 0.4)
+
+# waypoints of consecutive nodes back to back: node i has counts[i] of them, times in ns
+Trajectories = collections.namedtuple("Trajectories", ["counts", "times", "x", "y"])
+
+# bump when the motion drawn for a scenario changes
+TRAJECTORY_FORMAT = 1
+MEMORY_ENTRIES = 16
+
+_memory = collections.OrderedDict()
+
+
+def random_direction(start, kind, horizon, rng):
+    """
+        the waypoints of len(start) nodes moving from start ((n, 2) positions) until at
+        least horizon seconds, as Trajectories
+    """
+    xmin, xmax, ymin, ymax = kind.bounds
+    low, high = np.array([xmin, ymin]), np.array([xmax, ymax])
+    position = np.clip(np.asarray(start, dtype=float).reshape(-1, 2), low, high)
+    nodes = len(position)
+    now = np.zeros(nodes)
+    times, points = [now], [position]
+    # the first leg may head anywhere, like DoInitializePrivate
+    direction = rng.uniform(0.0, 2 * np.pi, nodes)
+    while nodes and now.min() < horizon:
+        velocity = kind.speed * np.stack([np.cos(direction), np.sin(direction)], axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            to_side = np.where(velocity > 0, (high - position) / velocity,
+                               np.where(velocity < 0, (low - position) / velocity, np.inf))
+        travel = np.maximum(to_side.min(axis=1), 0.0)
+        position = np.clip(position + travel[:, None] * velocity, low, high)
+        now = now + travel
+        times.append(now)
+        points.append(position)
+        now = now + kind.pause
+        times.append(now)
+        points.append(position)
+        # right, left, top, bottom: turn away from the nearest one
+        distance = np.stack([xmax - position[:, 0], position[:, 0] - xmin,
+                             ymax - position[:, 1], position[:, 1] - ymin], axis=1)
+        turn = np.array([np.pi / 2, -np.pi / 2, np.pi, 0.0])[distance.argmin(axis=1)]
+        direction = rng.uniform(0.0, np.pi, nodes) + turn
+
+    times = np.rint(np.stack(times, axis=1) * 1e9).astype(np.int64)
+    points = np.stack(points, axis=1)
+    keep = np.ones(times.shape, dtype=bool)
+    # up to the first waypoint at or past the horizon, which covers the rest of the run
+    keep[:, 1:] = times[:, :-1] < horizon * 1e9
+    # WaypointMobilityModel wants strictly increasing times: a leg shorter than 1 ns goes
+    keep[:, 1:] &= times[:, 1:] > times[:, :-1]
+    return Trajectories(keep.sum(axis=1).astype(np.uint32), times[keep], points[keep][:, 0], points[keep][:, 1])
+
+
+def concatenate(parts):
+    return Trajectories(*(np.concatenate(field) for field in zip(*parts)))
+
+
+def scenario_trajectories(numofbackbone, numofInfra, horizon, rng):
+    """
+        the trajectories of all nodes of a MixedWireless topology, in node id order: the
+        backbone nodes, then the stations of every access point, relative to it
+    """
+    index = np.arange(numofbackbone)
+    # GridPositionAllocator MinX/MinY 20, DeltaX/DeltaY 20, GridWidth 5, RowFirst
+    grid = np.stack([20.0 + 20.0 * (index % 5), 20.0 + 20.0 * (index // 5)], axis=1)
+    # the ListPositionAllocator of every infra network: (0, j), the stations' position
+    # relative to their access point (MobilityHelper sets it on the hierarchical child)
+    stations = np.tile(np.stack([np.zeros(numofInfra - 1), np.arange(numofInfra - 1.0)], axis=1),
+                       (numofbackbone, 1))
+    return concatenate([random_direction(grid, BACKBONE, horizon, rng),
+                        random_direction(stations, STATION, horizon, rng)])
+
+
+def trajectories(numofbackbone, numofInfra, horizon, seed=None, run=None, directory=None):
+    """
+        scenario_trajectories for a seed and run, from the cache when they were drawn
+        before. without a seed they are drawn afresh and not kept. directory, if given,
+        keeps them across processes.
+    """
+    if seed is None:
+        return scenario_trajectories(numofbackbone, numofInfra, horizon, np.random.default_rng())
+    key = "b%d-i%d-t%r-s%d-r%d-v%d" % (numofbackbone, numofInfra, float(horizon), int(seed),
+                                      int(run) if run is not None else 1, TRAJECTORY_FORMAT)
+    if key in _memory:
+        _memory.move_to_end(key)
+        return _memory[key]
+
+    path = os.path.join(directory, key + ".npz") if directory is not None else None
+    if path is not None and os.path.exists(path):
+        with np.load(path) as data:
+            paths = Trajectories(*(data[field] for field in Trajectories._fields))
+    else:
+        rng = np.random.default_rng([int(seed), int(run) if run is not None else 1])
+        paths = scenario_trajectories(numofbackbone, numofInfra, horizon, rng)
+        if path is not None:
+            os.makedirs(directory, exist_ok=True)
+            tmp = "%s.tmp-%s.npz" % (path[:-4], uuid.uuid4().hex[:8])
+            np.savez(tmp, **paths._asdict())
+            os.replace(tmp, path)
+
+    _memory[key] = paths
+    while len(_memory) > MEMORY_ENTRIES:
+        _memory.popitem(last=False)
+    return paths
@@ -0,0 +1,207 @@
+// phy_event_log.cc
+#include "phy_event_log.h"
+
+#include <cerrno>
+#include <cmath>
+#include <cstring>
+#include <fcntl.h>
+#include <limits>
+#include <random>
+#include <sstream>
+#include <sys/mman.h>
+#include <unistd.h>
+
+static const char kPhyEventMagic[8] = {'N', 'S', '3', 'P', 'H', 'Y', 'E', 'V'};
+
+// the open capture; records points just past the header in the mapping. the log is
+// written to tmpPath and renamed to path on close
+struct PhyEventCapture {
+    int fd = -1;
+    std::string path;
+    std::string tmpPath;
+    size_t mappedBytes = 0;
+    PhyEventLogHeader* header = nullptr;
+    PhyEventRecord* records = nullptr;
+    std::vector<DeviceTraceInfo> devices;
+    std::mt19937_64 rng;
+
+    bool open() const {
+        return header != nullptr;
+    }
+
+    double uniform() {
+        return (rng() >> 11) * 0x1.0p-53;
+    }
+
+    // the slot for a new event, nullptr when it is not kept
+    PhyEventRecord* slot() {
+        header->seen++;
+        if (header->sampleRate < 1.0 && uniform() >= header->sampleRate) {
+            return nullptr;
+        }
+        header->sampled++;
+        if (header->count < header->capacity) {
+            return &records[header->count++];
+        }
+        if (!header->reservoir) {
+            return nullptr;
+        }
+        // algorithm R: the i-th sampled event replaces a random record with probability capacity/i
+        uint64_t j = rng() % header->sampled;
+        return j < header->capacity ? &records[j] : nullptr;
+    }
+};
+
+static PhyEventCapture g_event_capture;
+
+static uint8_t McsOf(const WifiMode& mode) {
+    return mode.GetModulationClass() >= WIFI_MOD_CLASS_HT ? mode.GetMcsValue() : kNoMcs;
+}
+
+static void FillEvent(PhyEventRecord* record, uint32_t device, PhyEventKind kind, uint32_t size) {
+    const DeviceTraceInfo& info = g_event_capture.devices[device];
+    record->time = Simulator::Now().GetSeconds();
+    record->snrDb = std::numeric_limits<double>::quiet_NaN();
+    record->txPowerDbm = std::numeric_limits<double>::quiet_NaN();
+    record->rateMbps = 0.0f;
+    record->nodeId = info.nodeId;
+    record->size = size;
+    record->ifIndex = info.ifIndex;
+    record->kind = kind;
+    record->mcs = kNoMcs;
+    record->modulation = WIFI_MOD_CLASS_UNKNOWN;
+}
+
+static void PhyTxEventCallback(uint32_t device, WifiConstPsduMap psdus, WifiTxVector txVector, double txPowerW) {
+    for (const auto& psdu : psdus) {
+        PhyEventRecord* record = g_event_capture.slot();
+        if (record == nullptr) {
+            continue;
+        }
+        WifiMode mode = txVector.GetMode(psdu.first);
+        FillEvent(record, device, kPhyEventTx, psdu.second->GetSize());
+        record->txPowerDbm = 10.0 * std::log10(txPowerW) + 30.0;
+        record->rateMbps = mode.GetDataRate(txVector, psdu.first) / 1e6;
+        record->mcs = McsOf(mode);
+        record->modulation = mode.GetModulationClass();
+    }
+}
+
+static void PhyRxOkEventCallback(uint32_t device, Ptr<const Packet> packet, double snr, WifiMode mode,
+                                 WifiPreamble preamble) {
+    PhyEventRecord* record = g_event_capture.slot();
+    if (record == nullptr) {
+        return;
+    }
+    FillEvent(record, device, kPhyEventRxOk, packet->GetSize());
+    record->snrDb = 10.0 * std::log10(snr);
+    // the channel width of the reception is not traced, only non-HT rates are known from the mode
+    if (mode.GetModulationClass() < WIFI_MOD_CLASS_HT) {
+        record->rateMbps = mode.GetDataRate(20) / 1e6;
+    }
+    record->mcs = McsOf(mode);
+    record->modulation = mode.GetModulationClass();
+}
+
+static void PhyRxErrorEventCallback(uint32_t device, Ptr<const Packet> packet, double snr) {
+    PhyEventRecord* record = g_event_capture.slot();
+    if (record == nullptr) {
+        return;
+    }
+    FillEvent(record, device, kPhyEventRxError, packet->GetSize());
+    record->snrDb = 10.0 * std::log10(snr);
+}
+
+void OpenPhyEventCapture(const std::string& path, uint64_t capacity, double sampleRate, bool reservoir,
+                         uint64_t seed) {
+    ClosePhyEventCapture();
+    NS_ABORT_MSG_IF(capacity == 0, "event capture needs a capacity");
+    NS_ABORT_MSG_IF(sampleRate <= 0.0 || sampleRate > 1.0, "sample rate " << sampleRate << " not in (0, 1]");
+
+    // never truncate path itself: an EventLog of an earlier run may still map it, and
+    // reading a truncated mapping is a SIGBUS. the new log replaces it by rename on close,
+    // the old mapping keeps the old file
+    std::ostringstream tmp;
+    tmp << path << ".tmp-" << ::getpid();
+    std::string tmpPath = tmp.str();
+    int fd = ::open(tmpPath.c_str(), O_RDWR | O_CREAT | O_TRUNC, 0644);
+    NS_ABORT_MSG_IF(fd < 0, "cannot open " << tmpPath << ": " << std::strerror(errno));
+    size_t bytes = sizeof(PhyEventLogHeader) + capacity * sizeof(PhyEventRecord);
+    // sparse: pages are only backed once records reach them
+    NS_ABORT_MSG_IF(::ftruncate(fd, bytes) != 0, "cannot size " << path << ": " << std::strerror(errno));
+    void* mapping = ::mmap(nullptr, bytes, PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+    NS_ABORT_MSG_IF(mapping == MAP_FAILED, "cannot map " << path << ": " << std::strerror(errno));
+
+    g_event_capture.fd = fd;
+    g_event_capture.path = path;
+    g_event_capture.tmpPath = tmpPath;
+    g_event_capture.mappedBytes = bytes;
+    g_event_capture.header = static_cast<PhyEventLogHeader*>(mapping);
+    g_event_capture.records = reinterpret_cast<PhyEventRecord*>(g_event_capture.header + 1);
+    g_event_capture.rng.seed(seed);
+
+    PhyEventLogHeader* header = g_event_capture.header;
+    std::memcpy(header->magic, kPhyEventMagic, sizeof(header->magic));
+    header->version = kPhyEventLogVersion;
+    header->recordSize = sizeof(PhyEventRecord);
+    header->capacity = capacity;
+    header->count = 0;
+    header->seen = 0;
+    header->sampled = 0;
+    header->sampleRate = sampleRate;
+    header->reservoir = reservoir;
+    header->reserved = 0;
+}
+
+size_t ConnectPhyEventCapture() {
+    NS_ABORT_MSG_IF(!g_event_capture.open(), "OpenPhyEventCapture first");
+    std::vector<DeviceTraceInfo> info;
+    std::vector<Ptr<WifiNetDevice>> devices = FindWifiDevices(info);
+    g_event_capture.devices = info;
+    for (uint32_t i = 0; i < devices.size(); i++) {
+        for (uint8_t p = 0; p < devices[i]->GetNPhys(); p++) {
+            Ptr<WifiPhy> phy = devices[i]->GetPhy(p);
+            phy->TraceConnectWithoutContext("PhyTxPsduBegin", MakeBoundCallback(&PhyTxEventCallback, i));
+            phy->GetState()->TraceConnectWithoutContext("RxOk", MakeBoundCallback(&PhyRxOkEventCallback, i));
+            phy->GetState()->TraceConnectWithoutContext("RxError", MakeBoundCallback(&PhyRxErrorEventCallback, i));
+        }
+    }
+    return devices.size();
+}
+
+uint64_t ClosePhyEventCapture() {
+    if (!g_event_capture.open()) {
+        return 0;
+    }
+    uint64_t count = g_event_capture.header->count;
+    ::msync(g_event_capture.header, g_event_capture.mappedBytes, MS_SYNC);
+    ::munmap(g_event_capture.header, g_event_capture.mappedBytes);
+    // give back the space the run did not fill
+    if (::ftruncate(g_event_capture.fd, sizeof(PhyEventLogHeader) + count * sizeof(PhyEventRecord)) != 0) {
+        NS_LOG_UNCOND("event capture: could not truncate the log, " << std::strerror(errno));
+    }
+    ::close(g_event_capture.fd);
+    if (::rename(g_event_capture.tmpPath.c_str(), g_event_capture.path.c_str()) != 0) {
+        NS_LOG_UNCOND("event capture: could not move the log to " << g_event_capture.path << ", "
+                                                                   << std::strerror(errno));
+    }
+    g_event_capture = PhyEventCapture();
+    return count;
+}
+
+std::vector<size_t> GetPhyEventLayout() {
+    return {
+        offsetof(PhyEventRecord, time),
+        offsetof(PhyEventRecord, snrDb),
+        offsetof(PhyEventRecord, txPowerDbm),
+        offsetof(PhyEventRecord, rateMbps),
+        offsetof(PhyEventRecord, nodeId),
+        offsetof(PhyEventRecord, size),
+        offsetof(PhyEventRecord, ifIndex),
+        offsetof(PhyEventRecord, kind),
+        offsetof(PhyEventRecord, mcs),
+        offsetof(PhyEventRecord, modulation),
+        sizeof(PhyEventRecord),
+        sizeof(PhyEventLogHeader),
+    };
+}
@@ -0,0 +1,68 @@
+// phy_event_log.h
+//
+// optional raw capture of every phy transmission and reception into a memory-mapped
+// file of fixed-size records, read back from python as a numpy memmap (event_log.py).
+//
+// the file is a PhyEventLogHeader followed by capacity PhyEventRecords, sized once when
+// the capture opens, so a run never holds more than that. events can be sampled
+// (each kept with probability sampleRate) and, once the file is full, either dropped or
+// kept as a uniform reservoir sample of everything sampled (records then stop being in
+// time order). closing writes the header and truncates the file to the records written;
+// InitializeStatisticTracker closes any capture left open, so one never spans two runs.
+#pragma once
+
+#include "statistic_tracker.h"
+
+#include <cstdint>
+#include <string>
+#include <vector>
+
+enum PhyEventKind : uint8_t {
+    kPhyEventTx,
+    kPhyEventRxOk,
+    kPhyEventRxError,
+};
+
+// one event. read as event_log.EVENT_DTYPE, keep the two in sync
+struct PhyEventRecord {
+    double time;        // seconds
+    double snrDb;       // receptions, NaN for transmissions
+    double txPowerDbm;  // transmissions, NaN for receptions
+    float rateMbps;     // data rate of the mode, 0 where the reception does not tell
+    uint32_t nodeId;
+    uint32_t size;      // bytes: the PSDU sent, the packet received
+    uint16_t ifIndex;
+    uint8_t kind;       // PhyEventKind
+    uint8_t mcs;        // HT and later modulations, kNoMcs before
+    uint8_t modulation; // WifiModulationClass
+};
+
+static const uint8_t kNoMcs = 255;
+static const uint32_t kPhyEventLogVersion = 1;
+
+struct PhyEventLogHeader {
+    char magic[8];      // "NS3PHYEV"
+    uint32_t version;
+    uint32_t recordSize;
+    uint64_t capacity;
+    uint64_t count;     // records written
+    uint64_t seen;      // events offered to the capture
+    uint64_t sampled;   // events that passed the sampler, count of them kept
+    double sampleRate;
+    uint32_t reservoir;
+    uint32_t reserved;
+};
+
+// start a log for capacity records in a temporary file next to path, aborts when it
+// cannot be mapped. path itself is only replaced on close, so earlier logs stay readable
+void OpenPhyEventCapture(const std::string& path, uint64_t capacity, double sampleRate=1.0,
+                         bool reservoir=false, uint64_t seed=1);
+// the tx and rx traces of every wifi device in the NodeList, returns the number of devices
+size_t ConnectPhyEventCapture();
+// finish the file and rename it to path, returns the number of records in it; nothing
+// to do when not open
+uint64_t ClosePhyEventCapture();
+
+// offsetof() of every PhyEventRecord field, sizeof(PhyEventRecord), then
+// sizeof(PhyEventLogHeader), for event_log.check_event_layout
+std::vector<size_t> GetPhyEventLayout();
@@ -0,0 +1,121 @@
+"""
+    the instrumentation report of MixedWireless(..., profile=True).
+
+    {
+        "phases": {name: {"wall": s, "cpu": s}, ...},   # start, build, connect, run, extract, convert
+        "events_executed": ns-3 events executed by Simulator::Run, not the ones
+        scheduled (None on a cache hit), "simulated_seconds": ...,
+        "callbacks": {trace source: {"calls": n, "timed": k, "seconds": estimated}, ...},
+        "callback_seconds": estimated time inside all trace callbacks,
+        "windows": windows produced, "result_bytes": bytes of record/sketch arrays,
+        "rss_mb": resident memory of the process as the run ends, before Simulator::Destroy,
+        "heap_mb": growth of the heap in use from the start of the run to that point
+        (glibc only, else None): unlike rss_mb it is the run's own memory, not the
+        high-water mark of the process,
+        "backend": "aot" or "jit", "cache_hit": bool,
+    }
+
+    callback time is measured on one call in sample_every (see CallbackTimer in
+    statistic_tracker.cc) and scaled up to all calls.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import resource
+import time
+
+
+CALLBACK_SAMPLE_EVERY = 64
+
+
+class PhaseTimer:
+    """wall and cpu seconds of consecutive phases; mark(name) ends the phase called name"""
+
+    def __init__(self):
+        self.phases = {}
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    def mark(self, name):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        self.phases[name] = {"wall": wall - self._wall, "cpu": cpu - self._cpu}
+        self._wall = wall
+        self._cpu = cpu
+
+
+def callback_profile(gbl):
+    """the per trace source callback counts from the C++ side, time extrapolated"""
+    profile = {}
+    for source in range(int(gbl.GetTraceSourceCount())):
+        counts = gbl.GetCallbackProfile(source)
+        calls, timed = int(counts.calls), int(counts.timed)
+        profile[str(gbl.GetTraceSourceName(source))] = {
+            "calls": calls,
+            "timed": timed,
+            "seconds": counts.timedSeconds * calls / timed if timed else 0.0,
+        }
+    return profile
+
+
+def result_bytes(result):
+    """bytes of numpy data in a WindowResult, its devices and rollups included"""
+    total = result.records.nbytes
+    if result.sketches is not None:
+        total += result.sketches.nbytes
+    for device in result.devices or ():
+        total += result_bytes(device.windows)
+    for rollup in (result.rollups or {}).values():
+        total += result_bytes(rollup)
+    return total
+
+
+def rss_mb():
+    """resident memory of this process in MB, its peak where the current size is unknown"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2.0**20
+    except OSError:
+        # kilobytes on linux, bytes on macos
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+class _MallInfo2(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_size_t) for name in (
+        "arena", "ordblks", "smblks", "hblks", "hblkhd", "usmblks", "fsmblks", "uordblks", "fordblks", "keepcost")]
+
+
+_mallinfo2 = None
+try:
+    _mallinfo2 = ctypes.CDLL(ctypes.util.find_library("c")).mallinfo2
+    _mallinfo2.restype = _MallInfo2
+except (OSError, AttributeError):
+    # not glibc, or older than 2.33
+    pass
+
+
+def heap_mb():
+    """bytes malloc has handed out and not got back, in MB; None without glibc's mallinfo2"""
+    if _mallinfo2 is None:
+        return None
+    info = _mallinfo2()
+    return (info.uordblks + info.hblkhd) / 2.0**20
+
+
+def build_report(timer, result, callbacks=None, events_executed=0, simulated_seconds=0.0, backend=None,
+                 cache_hit=False, rss_mb=None, heap_mb=None):
+    callbacks = callbacks or {}
+    return {
+        "phases": timer.phases,
+        "events_executed": events_executed,
+        "simulated_seconds": simulated_seconds,
+        "callbacks": callbacks,
+        "callback_seconds": sum(c["seconds"] for c in callbacks.values()),
+        "windows": len(result),
+        "result_bytes": result_bytes(result),
+        "rss_mb": rss_mb,
+        "heap_mb": heap_mb,
+        "backend": backend,
+        "cache_hit": cache_hit,
+    }
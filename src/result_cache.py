@@ -0,0 +1,226 @@
+"""
+    on-disk cache of MixedWireless results.
+
+    a scenario with a fixed seed always produces the same windows, so MixedWireless(...,
+    cache=ResultCache()) looks the run up before simulating it. the key is a hash of the
+    normalized scenario parameters, the seed, the sources that decide the result (the C++
+    tracker, generator.py, results.py) and the ns-3 version: editing any of them starts a
+    new set of entries.
+
+    every entry is a directory of .npy arrays (the window records, sketches, device and
+    rollup windows) with a meta.json. hits are memory-mapped read-only rather than read,
+    and mark the entry as recently used; once the cache grows past max_bytes the least
+    recently used entries are removed.
+
+        cache = ResultCache("/data/ns3-cache", max_bytes=20 * 2**30)
+        result = generator.MixedWireless(10, 3, 1, 30, 7, seed=4, cache=cache)
+        cache.stats()
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+
+import build_tracker
+from results import DeviceWindows, WindowResult
+
+
+CACHE_DIR = os.environ.get(
+    "NS3_GEN_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ns3_simulation"))
+
+# bump when the entry layout changes
+CACHE_FORMAT = 1
+
+# besides the C++ sources, these decide what a scenario produces
+_RESULT_SOURCES = ["generator.py", "mobility.py", "results.py"]
+
+_source_hash = None
+
+
+def source_hash():
+    """sha256 of the tracker sources and the python scenario code, computed once"""
+    global _source_hash
+    if _source_hash is None:
+        digest = hashlib.sha256()
+        for name in build_tracker.CPP_SOURCES + build_tracker.CPP_HEADERS + _RESULT_SOURCES:
+            digest.update(name.encode())
+            with open(os.path.join(build_tracker.SRC_DIR, name), "rb") as f:
+                digest.update(f.read())
+        _source_hash = digest.hexdigest()
+    return _source_hash
+
+
+# the installed ns-3 version, looked up once per process
+ns3_version = build_tracker.ns3_version
+
+
+def _normalize(value):
+    # 10 and 10.0 are the same duration, tuples and lists the same resolutions. list order
+    # is kept, it can matter (e.g. waypoints); json.dumps(sort_keys=True) orders dict keys
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    raise TypeError("cannot key a cache entry on %r" % (value,))
+
+
+class ResultCache:
+    """
+        size-bounded LRU cache of WindowResults in directory. max_bytes bounds the total
+        size of the entries; stats() has the hit/miss counts of this object.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=4 * 2**30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, **params):
+        """the entry name for a run with the given MixedWireless parameters"""
+        ident = {
+            "params": {name: _normalize(value) for name, value in params.items()},
+            "sources": source_hash(),
+            "ns3": ns3_version(),
+            "format": CACHE_FORMAT,
+        }
+        return hashlib.sha256(json.dumps(ident, sort_keys=True).encode()).hexdigest()[:32]
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        """the cached WindowResult, its arrays memory-mapped, or None on a miss"""
+        path = self._path(key)
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            self.misses += 1
+            return None
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+            result = self._load(path, meta)
+        except (OSError, ValueError, KeyError):
+            # a damaged entry, e.g. from a full disk: drop it and simulate again
+            shutil.rmtree(path, ignore_errors=True)
+            self.misses += 1
+            return None
+        os.utime(os.path.join(path, "meta.json"))
+        self.hits += 1
+        return result
+
+    def _load(self, path, meta):
+        def load(name):
+            return np.load(os.path.join(path, name), mmap_mode="r")
+
+        result = WindowResult(load("records.npy"), meta["time_window"],
+                              simulated_seconds=meta.get("simulated_seconds"))
+        if meta["sketches"]:
+            result.sketches = load("sketches.npy")
+        if meta["devices"] is not None:
+            result.devices = [
+                DeviceWindows(node, device, WindowResult(load("device-%d.npy" % i), meta["time_window"]))
+                for i, (node, device) in enumerate(meta["devices"])
+            ]
+        if meta["rollups"] is not None:
+            result.rollups = {
+                seconds: WindowResult(load("rollup-%d.npy" % i), seconds)
+                for i, seconds in enumerate(meta["rollups"])
+            }
+        return result
+
+    def put(self, key, result, params=None, strict=False):
+        """
+            store a WindowResult under key, then evict down to max_bytes. a run that
+            cannot be stored (a full disk) is skipped, or with strict its OSError raised.
+        """
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        # written aside and renamed into place, so readers never see half an entry
+        tmp = os.path.join(self.directory, ".tmp-%s-%s" % (key, uuid.uuid4().hex[:8]))
+        os.makedirs(tmp)
+        try:
+            np.save(os.path.join(tmp, "records.npy"), result.records)
+            if result.sketches is not None:
+                np.save(os.path.join(tmp, "sketches.npy"), result.sketches)
+            for i, device in enumerate(result.devices or ()):
+                np.save(os.path.join(tmp, "device-%d.npy" % i), device.windows.records)
+            rollups = sorted(result.rollups) if result.rollups is not None else None
+            for i, seconds in enumerate(rollups or ()):
+                np.save(os.path.join(tmp, "rollup-%d.npy" % i), result.rollups[seconds].records)
+            meta = {
+                "time_window": result.time_window,
+                "sketches": result.sketches is not None,
+                "devices": None if result.devices is None else [[d.node, d.device] for d in result.devices],
+                "rollups": rollups,
+                "simulated_seconds": result.simulated_seconds,
+                "params": params,
+                "bytes": sum(os.path.getsize(os.path.join(tmp, name)) for name in os.listdir(tmp)),
+            }
+            with open(os.path.join(tmp, "meta.json"), "w") as f:
+                json.dump(meta, f)
+            os.rename(tmp, path)
+        except OSError:
+            # another process stored the same run first, or the disk is full
+            shutil.rmtree(tmp, ignore_errors=True)
+            if strict and not os.path.exists(os.path.join(path, "meta.json")):
+                raise
+            return
+        self.stores += 1
+        self.evict()
+
+    def entries(self):
+        """(last used, bytes, key) of every entry, least recently used first"""
+        entries = []
+        for key in os.listdir(self.directory):
+            meta_path = os.path.join(self._path(key), "meta.json")
+            if key.startswith(".") or not os.path.exists(meta_path):
+                continue
+            try:
+                with open(meta_path) as f:
+                    size = json.load(f)["bytes"]
+                entries.append((os.path.getmtime(meta_path), size, key))
+            except (OSError, ValueError, KeyError):
+                continue
+        return sorted(entries)
+
+    def evict(self, max_bytes=None):
+        """remove least recently used entries until the cache holds at most max_bytes"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= max_bytes:
+                break
+            # an open memory map keeps the data alive, removing the files is safe
+            shutil.rmtree(self._path(key), ignore_errors=True)
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        self.evict(0)
+
+    def stats(self):
+        entries = self.entries()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,235 @@
+"""
+    columnar view of the windows a MixedWireless run produced.
+
+    the tracker keeps its closed windows in a contiguous std::vector<WindowMetrics>.
+    WindowResult exposes that memory to numpy as a structured array without copying it;
+    the legacy field_mapping dict of [timestamp, str(value)] pairs is only built when a
+    caller asks for it.
+"""
+
+import collections
+import time
+
+import numpy as np
+
+
+# must match struct WindowMetrics in statistic_tracker.h, field for field
+WINDOW_FIELDS = [
+    ("windowStart", "f8"),
+    ("rxCount", "i4"),
+    ("txCount", "i4"),
+    ("rxSum", "f8"),
+    ("txSum", "f8"),
+    ("RadioRXBitsPeak", "i4"),
+    ("RadioTXBitsPeak", "i4"),
+    ("RadioRXBitsMean", "f8"),
+    ("RadioTXBitsMean", "f8"),
+    ("radioUtilization", "f8"),
+    ("meanRatioUtilization", "f8"),
+    ("ratioAssociationClientsPeak", "i4"),
+    ("meanRatioAssociationClients", "f8"),
+    ("channelPeakRx", "i4"),
+    ("channelPeakTx", "i4"),
+    ("channelThroughput", "i4"),
+    ("channelInterference", "f8"),
+    ("channelBusyRate", "f8"),
+    ("deviceRxPeak", "i4"),
+    ("deviceTxPeak", "i4"),
+    ("RetriedRx", "i4"),
+    ("RetriedTx", "i4"),
+    ("rxOkCount", "i4"),
+    ("rxErrorCount", "i4"),
+    ("meanSnrDb", "f8"),
+]
+WINDOW_DTYPE = np.dtype(WINDOW_FIELDS, align=True)
+
+FIELD_MAPPING_KEYS = [
+    'ap_status',
+    'radio_tx_bits',
+    'radio_rx_bits',
+    'radio_utilization',
+    'radio_associated_clients',
+    'channel_tx_rate',
+    'channel_rx_rate',
+    'channel_throughput',
+    'channel_busy_rate',
+    'channel_interference_rate',
+]
+
+
+# per-window quantile sketches, must match QuantileSketch/WindowSketches in statistic_tracker.h
+SKETCH_KINDS = ("rxSize", "txSize", "throughput")
+SKETCH_ACCURACY = 0.02
+SKETCH_BUCKETS = 560
+SKETCH_GAMMA = (1.0 + SKETCH_ACCURACY) / (1.0 - SKETCH_ACCURACY)
+# throughput is sketched per slice of a window: the rx + tx bytes of each
+# time_window / THROUGHPUT_SLICES, see kThroughputSlices
+THROUGHPUT_SLICES = 10
+
+# the windows of one wifi device, from a trace_mode="device" run
+DeviceWindows = collections.namedtuple("DeviceWindows", ["node", "device", "windows"])
+
+
+def check_window_layout(layout):
+    """
+        compare WINDOW_DTYPE with the compiled struct, layout being GetWindowMetricsLayout():
+        the offset of every field followed by the struct size.
+    """
+    layout = [int(x) for x in layout]
+    expected = [WINDOW_DTYPE.fields[name][1] for name, _ in WINDOW_FIELDS] + [WINDOW_DTYPE.itemsize]
+    if layout != expected:
+        raise RuntimeError(
+            "WindowMetrics layout %s does not match results.WINDOW_DTYPE %s" % (layout, expected))
+
+
+def check_sketch_layout(layout):
+    """
+        compare the sketch constants with GetSketchLayout(): buckets, accuracy,
+        sizeof(WindowSketches), throughput slices
+    """
+    buckets, accuracy, size, slices = [float(x) for x in layout]
+    expected = (SKETCH_BUCKETS, SKETCH_ACCURACY, len(SKETCH_KINDS) * SKETCH_BUCKETS * 4, THROUGHPUT_SLICES)
+    if (int(buckets), accuracy, int(size), int(slices)) != expected:
+        raise RuntimeError("WindowSketches layout %s does not match results %s" % (layout, expected))
+
+
+def sketch_bucket_values():
+    """
+        the value each sketch bucket stands for: 0 for bucket 0, else the DDSketch midpoint
+        of (gamma^(i-1), gamma^i], bucket 1 holding 1 as well (see QuantileSketch)
+    """
+    values = 2.0 * SKETCH_GAMMA ** np.arange(SKETCH_BUCKETS) / (SKETCH_GAMMA + 1.0)
+    values[0] = 0.0
+    return values
+
+
+def sketch_quantiles(counts, qs):
+    """
+        quantiles qs of sketch counts (..., SKETCH_BUCKETS), for every leading index at once;
+        sum counts over any axis first to merge sketches. nan where a sketch is empty.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+    cumulative = np.cumsum(counts, axis=-1)
+    total = cumulative[..., -1:]
+    values = sketch_bucket_values()
+    out = np.empty(counts.shape[:-1] + qs.shape)
+    for i, q in enumerate(qs):
+        rank = q * (total - 1)
+        out[..., i] = values[np.argmax(cumulative > rank, axis=-1)]
+    out[total[..., 0] == 0] = np.nan
+    return out
+
+
+class _CppArray:
+    # numpy array interface over memory owned by a C++ object, which it keeps alive:
+    # every array made from it has this view (and so the owner) at the end of its base chain
+    def __init__(self, address, shape, dtype, owner):
+        self.owner = owner
+        self.__array_interface__ = {
+            "version": 3,
+            "shape": shape,
+            "typestr": dtype.str,
+            "descr": dtype.descr,
+            "data": (address, False),
+        }
+
+
+class WindowResult:
+    """
+        the windows of one run. result.records is a numpy structured array (WINDOW_DTYPE),
+        result["rxSum"] a single column, len(result) the number of windows.
+        result.devices holds a DeviceWindows per wifi device when the run tracked them,
+        result.rollups the coarser resolutions of the same run by window size.
+        result.sketches holds the sketch counts, (windows, len(SKETCH_KINDS), SKETCH_BUCKETS)
+        uint32, when the run kept them. result.events is the event_log.EventLog of a run
+        that captured its raw phy events. result.simulated_seconds is how far the run
+        got, which is short of its duration when it stopped early.
+    """
+
+    def __init__(self, records, time_window=None, devices=None, rollups=None, sketches=None, events=None,
+                 simulated_seconds=None):
+        self.records = records
+        self.time_window = time_window
+        self.devices = devices
+        self.rollups = rollups
+        self.sketches = sketches
+        self.events = events
+        self.simulated_seconds = simulated_seconds
+
+    @classmethod
+    def from_buffer(cls, buffer, time_window=None):
+        """wrap a WindowRecordBuffer* returned by DetachWindowMetrics(), taking ownership of it"""
+        buffer.__python_owns__ = True
+        count = int(buffer.size())
+        if count == 0:
+            return cls(np.zeros(0, WINDOW_DTYPE), time_window)
+        records = np.asarray(
+            _CppArray(int(buffer.data()), (count,), WINDOW_DTYPE, buffer)).view(WINDOW_DTYPE)
+        sketches = None
+        if int(buffer.sketchCount()):
+            sketches = np.asarray(_CppArray(
+                int(buffer.sketchData()), (count, len(SKETCH_KINDS), SKETCH_BUCKETS),
+                np.dtype(np.uint32), buffer))
+        return cls(records, time_window, sketches=sketches)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, name):
+        return self.records[name]
+
+    @property
+    def fields(self):
+        return list(self.records.dtype.names)
+
+    def sketch(self, kind):
+        """the sketch counts of one kind (see SKETCH_KINDS), one row per window"""
+        if self.sketches is None:
+            raise ValueError("this run kept no sketches, pass sketches=True to MixedWireless")
+        return self.sketches[:, SKETCH_KINDS.index(kind)]
+
+    def quantiles(self, kind, qs=(0.5, 0.95, 0.99), merge=False):
+        """
+            quantiles of kind per window, shape (windows, len(qs)), or over the whole run
+            with merge=True. throughput quantiles are of the bytes per time_window /
+            THROUGHPUT_SLICES slice, those of a rollup over the slices of its base
+            windows. to merge several runs, add up their sketch(kind) rows and use
+            sketch_quantiles.
+        """
+        counts = self.sketch(kind)
+        if merge:
+            counts = counts.sum(axis=0)
+        return sketch_quantiles(counts, qs)
+
+    def __reduce__(self):
+        # the C++ buffer does not cross process boundaries, ship a copy of the records
+        sketches = None if self.sketches is None else np.array(self.sketches)
+        return (WindowResult, (np.array(self.records), self.time_window, self.devices, self.rollups, sketches,
+                               self.events, self.simulated_seconds))
+
+    def field_mapping(self, base_time=None):
+        """
+            the legacy output: metric name -> [[timestamp, str(value)], ...], one entry per
+            window, timestamps 180 s apart per second of window start from base_time.
+            the radio and channel rates are 0 when the run had channel_metrics=False.
+        """
+        if base_time is None:
+            base_time = int(time.time())
+        tstamps = (base_time + self['windowStart'].astype(np.int64) * 180).tolist()
+        columns = {
+            'ap_status': [1] * len(tstamps),
+            'radio_tx_bits': self['txSum'].tolist(),
+            'radio_rx_bits': self['rxSum'].tolist(),
+            'radio_utilization': self['radioUtilization'].tolist(),
+            'radio_associated_clients': self['meanRatioAssociationClients'].tolist(),
+            'channel_tx_rate': self['RadioTXBitsMean'].tolist(),
+            'channel_rx_rate': self['RadioRXBitsMean'].tolist(),
+            'channel_throughput': ((self['RadioRXBitsPeak'] + self['RadioTXBitsPeak']) // 2).tolist(),
+            'channel_busy_rate': self['channelBusyRate'].tolist(),
+            'channel_interference_rate': self['channelInterference'].tolist(),
+        }
+        return {
+            key: [[tstamp, str(value)] for tstamp, value in zip(tstamps, columns[key])]
+            for key in FIELD_MAPPING_KEYS
+        }
@@ -0,0 +1,828 @@
+// statistic_tracker.cc
+#include "statistic_tracker.h"
+#include "phy_event_log.h"
+
+#include <algorithm>
+#include <chrono>
+#include <cmath>
+#include <cstddef>
+#include <cstring>
+
+// Ipv4Address getIpv4AddressFromNode(Ptr<Node> node){
+// return node->GetObject<Ipv4>()->GetAddress(1,0).GetLocal();
+// }
+
+Ipv4Address getIpv4AddressFromNode(Ptr<Node> node) {
+    Ptr<Ipv4> ipv4 = node->GetObject<Ipv4>();
+    if (!ipv4) {
+        return Ipv4Address();
+    }
+    return ipv4->GetAddress(1, 0).GetLocal();
+}
+
+static const double kSketchLogGamma = std::log((1.0 + kSketchAccuracy) / (1.0 - kSketchAccuracy));
+
+QuantileSketch::QuantileSketch() {
+    clear();
+}
+
+void QuantileSketch::add(double value) {
+    int bucket = 0;
+    if (value >= 1.0) {
+        // log(1) / log(gamma) is 0: 1 itself closes bucket 1, see the header
+        bucket = static_cast<int>(std::ceil(std::log(value) / kSketchLogGamma));
+        bucket = std::min(std::max(bucket, 1), kSketchBuckets - 1);
+    }
+    counts[bucket]++;
+}
+
+void QuantileSketch::merge(const QuantileSketch& other) {
+    for (int i = 0; i < kSketchBuckets; i++) {
+        counts[i] += other.counts[i];
+    }
+}
+
+void QuantileSketch::clear() {
+    std::fill(counts, counts + kSketchBuckets, 0u);
+}
+
+void WindowSketches::merge(const WindowSketches& other) {
+    rxSize.merge(other.rxSize);
+    txSize.merge(other.txSize);
+    throughput.merge(other.throughput);
+}
+
+void WindowSketches::clear() {
+    rxSize.clear();
+    txSize.clear();
+    throughput.clear();
+}
+
+WindowStore::WindowStore() :
+        sketching(false),
+        ringCapacity(0),
+        ringHead(0),
+        ringCount(0),
+        dropped(0) {}
+
+void WindowStore::push(const WindowMetrics& window, const WindowSketches* windowSketches) {
+    if (ringCapacity == 0) {
+        windows.push_back(window);
+        if (sketching) {
+            sketches.push_back(*windowSketches);
+        }
+        return;
+    }
+    size_t slot = (ringHead + ringCount) % ringCapacity;
+    windows[slot] = window;
+    if (sketching) {
+        sketches[slot] = *windowSketches;
+    }
+    if (ringCount == ringCapacity) {
+        ringHead = (ringHead + 1) % ringCapacity;
+        dropped++;
+    } else {
+        ringCount++;
+    }
+}
+
+void WindowStore::enableSketches() {
+    sketching = true;
+    sketches.assign(ringCapacity, WindowSketches());
+}
+
+void WindowStore::enableStreaming(size_t capacity) {
+    ringCapacity = std::max<size_t>(capacity, 1);
+    windows.assign(ringCapacity, WindowMetrics());
+    if (sketching) {
+        sketches.assign(ringCapacity, WindowSketches());
+    }
+    ringHead = 0;
+    ringCount = 0;
+    dropped = 0;
+}
+
+void WindowStore::drain(WindowRecordBuffer& out) {
+    out.records.reserve(out.records.size() + ringCount);
+    for (size_t i = 0; i < ringCount; i++) {
+        out.records.push_back(windows[(ringHead + i) % ringCapacity]);
+        if (sketching) {
+            out.sketches.push_back(sketches[(ringHead + i) % ringCapacity]);
+        }
+    }
+    ringHead = 0;
+    ringCount = 0;
+}
+
+void WindowStore::detach(WindowRecordBuffer& out) {
+    if (ringCapacity > 0) {
+        drain(out);
+        return;
+    }
+    out.records.swap(windows);
+    out.sketches.swap(sketches);
+    windows.clear();
+    sketches.clear();
+}
+
+static void finishWindow(WindowMetrics& window) {
+    if (window.rxCount > 0) {
+        window.RadioRXBitsMean = window.rxSum / window.rxCount;
+    }
+    if (window.txCount > 0) {
+        window.RadioTXBitsMean = window.txSum / window.txCount;
+    }
+    int received = window.rxOkCount + window.rxErrorCount;
+    if (received > 0) {
+        window.channelInterference = (double) window.rxErrorCount / received;
+    }
+    // summed until here
+    if (window.rxOkCount > 0) {
+        window.meanSnrDb /= window.rxOkCount;
+    }
+}
+
+void mergeWindow(WindowMetrics& into, const WindowMetrics& window) {
+    into.rxCount += window.rxCount;
+    into.txCount += window.txCount;
+    into.rxSum += window.rxSum;
+    into.txSum += window.txSum;
+    into.RadioRXBitsPeak = std::max(into.RadioRXBitsPeak, window.RadioRXBitsPeak);
+    into.RadioTXBitsPeak = std::max(into.RadioTXBitsPeak, window.RadioTXBitsPeak);
+
+    into.radioUtilization += window.radioUtilization;
+    into.meanRatioUtilization += window.meanRatioUtilization;
+    into.ratioAssociationClientsPeak = std::max(into.ratioAssociationClientsPeak, window.ratioAssociationClientsPeak);
+    into.meanRatioAssociationClients += window.meanRatioAssociationClients;
+
+    into.channelPeakRx = std::max(into.channelPeakRx, window.channelPeakRx);
+    into.channelPeakTx = std::max(into.channelPeakTx, window.channelPeakTx);
+    into.channelThroughput += window.channelThroughput;
+    into.channelBusyRate += window.channelBusyRate;
+
+    into.deviceRxPeak = std::max(into.deviceRxPeak, window.deviceRxPeak);
+    into.deviceTxPeak = std::max(into.deviceTxPeak, window.deviceTxPeak);
+    into.RetriedRx += window.RetriedRx;
+    into.RetriedTx += window.RetriedTx;
+
+    // channelInterference and meanSnrDb are recomputed from these when the window closes
+    into.rxOkCount += window.rxOkCount;
+    into.rxErrorCount += window.rxErrorCount;
+    into.meanSnrDb += window.meanSnrDb * window.rxOkCount;
+}
+
+WindowRollup::WindowRollup(int factor, double baseWindow, bool sketching) :
+        factor(factor),
+        timeWindow(factor * baseWindow),
+        currentIndex(0),
+        merged(0) {
+    if (sketching) {
+        store.enableSketches();
+    }
+}
+
+void WindowRollup::add(int64_t baseIndex, const WindowMetrics& window, const WindowSketches* windowSketches) {
+    int64_t index = baseIndex / factor;
+    if (index > currentIndex) {
+        // the tracker's windows are dense, so the rollup's are too
+        saveCurrentWindow();
+        currentIndex = index;
+    }
+    mergeWindow(currentMetrics, window);
+    if (windowSketches != nullptr) {
+        currentSketches.merge(*windowSketches);
+    }
+    merged++;
+}
+
+void WindowRollup::saveCurrentWindow() {
+    if (merged > 0) {
+        currentMetrics.radioUtilization /= merged;
+        currentMetrics.meanRatioUtilization /= merged;
+        currentMetrics.meanRatioAssociationClients /= merged;
+        currentMetrics.channelBusyRate /= merged;
+    }
+    finishWindow(currentMetrics);
+    currentMetrics.windowStart = currentIndex * timeWindow;
+    store.push(currentMetrics, &currentSketches);
+    currentMetrics = WindowMetrics();
+    if (store.sketching) {
+        currentSketches.clear();
+    }
+    merged = 0;
+}
+
+void WindowRollup::flush() {
+    if (merged > 0) {
+        saveCurrentWindow();
+    }
+}
+
+void ChannelTime::add(WifiPhyState state, double seconds) {
+    switch (state) {
+    case WifiPhyState::TX:
+        tx += seconds;
+        break;
+    case WifiPhyState::RX:
+        rx += seconds;
+        break;
+    case WifiPhyState::CCA_BUSY:
+        ccaBusy += seconds;
+        break;
+    default:
+        break;
+    }
+}
+
+StatisticTracker::StatisticTracker(double window) :
+        timeWindow(window),
+        currentTime(0.0),
+        currentIndex(0),
+        windowOpen(false),
+        sketching(false),
+        currentSlice(0),
+        sliceBytes(0.0),
+        radios(0),
+        aps(0),
+        clients(0.0),
+        clientsPeak(0),
+        clientsSince(0.0),
+        clientTime(0.0),
+        earlyStop(nullptr) {}
+
+void StatisticTracker::advance(double time) {
+    currentTime = time;
+    int64_t index = static_cast<int64_t>(std::floor(time / timeWindow));
+    // windows nobody wrote to are kept, empty, so that window k stays at index k
+    while (index > currentIndex) {
+        saveCurrentWindow((currentIndex + 1) * timeWindow);
+        currentIndex++;
+        openWindow();
+    }
+    windowOpen = true;
+}
+
+void StatisticTracker::closeWindowsBefore(int64_t index) {
+    while (index > currentIndex) {
+        saveCurrentWindow((currentIndex + 1) * timeWindow);
+        currentIndex++;
+        openWindow();
+    }
+}
+
+void StatisticTracker::openWindow() {
+    auto pending = pendingChannel.find(currentIndex);
+    if (pending != pendingChannel.end()) {
+        currentChannel = pending->second;
+        pendingChannel.erase(pending);
+    }
+    currentMetrics.ratioAssociationClientsPeak = clientsPeak;
+}
+
+void StatisticTracker::updatePeaks(double time, int rxSize, int txSize) {
+    advance(time);
+
+    currentMetrics.RadioRXBitsPeak = std::max(currentMetrics.RadioRXBitsPeak, rxSize);
+    currentMetrics.RadioTXBitsPeak = std::max(currentMetrics.RadioTXBitsPeak, txSize);
+
+    // Update sums and counts for mean calculation
+    if (rxSize > 0) {
+        currentMetrics.rxSum += rxSize;
+        currentMetrics.rxCount++;
+        if (sketching) {
+            currentSketches.rxSize.add(rxSize);
+        }
+    }
+    if (txSize > 0) {
+        currentMetrics.txSum += txSize;
+        currentMetrics.txCount++;
+        if (sketching) {
+            currentSketches.txSize.add(txSize);
+        }
+    }
+    if (sketching) {
+        double sliceLength = timeWindow / kThroughputSlices;
+        int slice = static_cast<int>(std::floor((time - currentIndex * timeWindow) / sliceLength));
+        closeSlicesBefore(std::min(slice, kThroughputSlices - 1));
+        sliceBytes += rxSize + txSize;
+    }
+}
+
+void StatisticTracker::closeSlicesBefore(int slice) {
+    while (currentSlice < slice) {
+        currentSketches.throughput.add(sliceBytes);
+        sliceBytes = 0.0;
+        currentSlice++;
+    }
+}
+
+void StatisticTracker::updatePhyState(double time, double start, double duration, WifiPhyState state) {
+    advance(time);
+
+    double end = start + duration;
+    double windowEnd = (currentIndex + 1) * timeWindow;
+    currentChannel.add(state, std::min(end, windowEnd) - start);
+    // tx periods are reported when they start
+    for (int64_t k = currentIndex + 1; k * timeWindow < end; k++) {
+        pendingChannel[k].add(state, std::min(end, (k + 1) * timeWindow) - k * timeWindow);
+    }
+}
+
+void StatisticTracker::updateRxOutcome(double time, bool ok, double snr) {
+    advance(time);
+
+    if (ok) {
+        currentMetrics.rxOkCount++;
+        currentMetrics.meanSnrDb += 10.0 * std::log10(snr); // averaged in finishWindow
+    } else {
+        currentMetrics.rxErrorCount++;
+    }
+}
+
+void StatisticTracker::updateClients(double time, double level, int peak) {
+    advance(time);
+
+    clientTime += clients * (time - clientsSince);
+    clientsSince = time;
+    clients = level;
+    clientsPeak = peak;
+    currentMetrics.ratioAssociationClientsPeak = std::max(currentMetrics.ratioAssociationClientsPeak, peak);
+}
+
+void StatisticTracker::saveCurrentWindow(double windowEnd) {
+    double windowStart = currentIndex * timeWindow;
+    double windowLength = windowEnd - windowStart;
+    if (windowLength > 0) {
+        if (radios > 0) {
+            double capacity = radios * windowLength;
+            currentMetrics.radioUtilization = std::min(1.0, (currentChannel.tx + currentChannel.rx) / capacity);
+            currentMetrics.channelBusyRate = std::min(
+                1.0, (currentChannel.tx + currentChannel.rx + currentChannel.ccaBusy) / capacity);
+        }
+        clientTime += clients * (windowEnd - clientsSince);
+        currentMetrics.meanRatioAssociationClients = clientTime / windowLength;
+    }
+    currentChannel = ChannelTime();
+    clientsSince = windowEnd;
+    clientTime = 0.0;
+
+    finishWindow(currentMetrics);
+    currentMetrics.windowStart = windowStart;
+    if (earlyStop != nullptr) {
+        earlyStop->windowClosed(currentIndex, currentMetrics);
+    }
+    const WindowSketches* windowSketches = nullptr;
+    if (sketching) {
+        // the slices the window covers, fewer when the run ends inside it
+        int slices = static_cast<int>(std::ceil(windowLength / (timeWindow / kThroughputSlices) - 1e-9));
+        closeSlicesBefore(std::max(currentSlice + 1, std::min(slices, kThroughputSlices)));
+        windowSketches = &currentSketches;
+    }
+    store.push(currentMetrics, windowSketches);
+    for (WindowRollup& rollup : rollups) {
+        rollup.add(currentIndex, currentMetrics, windowSketches);
+    }
+    currentMetrics = WindowMetrics();
+    if (sketching) {
+        currentSketches.clear();
+        currentSlice = 0;
+        sliceBytes = 0.0;
+    }
+    windowOpen = false;
+}
+
+void StatisticTracker::addRollup(int factor) {
+    rollups.push_back(WindowRollup(factor, timeWindow, sketching));
+}
+
+void StatisticTracker::enableSketches() {
+    sketching = true;
+    store.enableSketches();
+}
+
+void StatisticTracker::flush(double endTime) {
+    if (windowOpen) {
+        // the last window ends with the simulation
+        double windowEnd = std::min(endTime, (currentIndex + 1) * timeWindow);
+        if (windowEnd <= currentIndex * timeWindow) {
+            windowEnd = (currentIndex + 1) * timeWindow;
+        }
+        saveCurrentWindow(windowEnd);
+    }
+    for (WindowRollup& rollup : rollups) {
+        rollup.flush();
+    }
+}
+
+static bool g_profiling = false;
+static uint32_t g_profile_sample_every = 64;
+static CallbackProfile g_callback_profiles[kTraceSourceCount];
+
+static const char* kTraceSourceNames[kTraceSourceCount] = {
+    "MacRx", "MacTx", "PhyState", "PhyRxOk", "PhyRxError", "Association",
+};
+
+// counts the callback it is declared in and, for one call in g_profile_sample_every,
+// measures it until the end of the scope
+struct CallbackTimer {
+    CallbackProfile* profile;
+    std::chrono::steady_clock::time_point start;
+
+    CallbackTimer(TraceSourceId source) : profile(nullptr) {
+        if (!g_profiling) {
+            return;
+        }
+        CallbackProfile& p = g_callback_profiles[source];
+        if (p.calls++ % g_profile_sample_every == 0) {
+            profile = &p;
+            start = std::chrono::steady_clock::now();
+        }
+    }
+
+    ~CallbackTimer() {
+        if (profile != nullptr) {
+            std::chrono::duration<double> elapsed = std::chrono::steady_clock::now() - start;
+            profile->timed++;
+            profile->timedSeconds += elapsed.count();
+        }
+    }
+};
+
+void EnableCallbackProfiling(uint32_t sampleEvery) {
+    g_profiling = true;
+    g_profile_sample_every = std::max<uint32_t>(sampleEvery, 1);
+}
+
+size_t GetTraceSourceCount() {
+    return kTraceSourceCount;
+}
+
+std::string GetTraceSourceName(size_t source) {
+    return kTraceSourceNames[source];
+}
+
+CallbackProfile GetCallbackProfile(size_t source) {
+    return g_callback_profiles[source];
+}
+
+StatisticTracker* g_statistic_tracker = nullptr;
+
+static EarlyStop g_early_stop = EarlyStop();
+
+static double WindowField(const WindowMetrics& window, size_t offset, char type) {
+    const char* field = reinterpret_cast<const char*>(&window) + offset;
+    if (type == 'd') {
+        double value;
+        std::memcpy(&value, field, sizeof(value));
+        return value;
+    }
+    int32_t value;
+    std::memcpy(&value, field, sizeof(value));
+    return value;
+}
+
+void EarlyStop::windowClosed(int64_t index, const WindowMetrics& window) {
+    if (met || index < firstWindow) {
+        return;
+    }
+    counted++;
+    if (windows > 0 && counted >= windows) {
+        met = true;
+        reason = "windows";
+        return;
+    }
+    if (patience == 0) {
+        return;
+    }
+    std::vector<double> mean(offsets.size());
+    for (size_t i = 0; i < offsets.size(); i++) {
+        sums[i] += WindowField(window, offsets[i], types[i]);
+        mean[i] = sums[i] / counted;
+    }
+    means.push_back(mean);
+    if (means.size() > patience + 1) {
+        means.erase(means.begin());
+    }
+    if (means.size() <= patience) {
+        return;
+    }
+    for (size_t i = 0; i < offsets.size(); i++) {
+        for (const std::vector<double>& earlier : means) {
+            if (std::fabs(earlier[i] - mean[i]) > tolerance * std::fabs(mean[i])) {
+                return;
+            }
+        }
+    }
+    met = true;
+    reason = "converged";
+}
+
+static void ScheduleEarlyStopCheck(int64_t index);
+
+// runs at the end of window index - 1: closes it, then stops the run or waits for the next
+static void EarlyStopCheck(int64_t index) {
+    g_statistic_tracker->closeWindowsBefore(index);
+    if (!g_early_stop.met) {
+        ScheduleEarlyStopCheck(index + 1);
+        return;
+    }
+    g_early_stop.stopTime = Simulator::Now().GetSeconds();
+    // whatever happened at the stop time itself starts a window that is not returned
+    g_statistic_tracker->windowOpen = false;
+    Simulator::Stop();
+}
+
+static void ScheduleEarlyStopCheck(int64_t index) {
+    // on the window boundary or just past it, never before: a window closes complete
+    int64_t at = static_cast<int64_t>(std::ceil(index * g_statistic_tracker->timeWindow * 1e9));
+    Simulator::Schedule(NanoSeconds(at) - Simulator::Now(), &EarlyStopCheck, index);
+}
+
+void EnableEarlyStop(double warmup, int64_t windows, double tolerance, uint32_t patience,
+                     const std::vector<size_t>& offsets, const std::string& types) {
+    NS_ABORT_MSG_IF(offsets.size() != types.size(), "one type per watched field");
+    NS_ABORT_MSG_IF(windows <= 0 && (patience == 0 || offsets.empty()), "nothing to stop on");
+    g_early_stop = EarlyStop();
+    g_early_stop.firstWindow = static_cast<int64_t>(std::ceil(warmup / g_statistic_tracker->timeWindow - 1e-9));
+    g_early_stop.windows = windows;
+    g_early_stop.tolerance = tolerance;
+    g_early_stop.patience = offsets.empty() ? 0 : patience;
+    g_early_stop.offsets = offsets;
+    g_early_stop.types = types;
+    g_early_stop.sums.assign(offsets.size(), 0.0);
+    g_statistic_tracker->earlyStop = &g_early_stop;
+    ScheduleEarlyStopCheck(g_early_stop.firstWindow + 1);
+}
+
+double GetEarlyStopTime() {
+    return g_early_stop.stopTime;
+}
+
+std::string GetEarlyStopReason() {
+    return g_early_stop.reason;
+}
+
+void InitializeStatisticTracker(double window) {
+    if (g_statistic_tracker != nullptr) {
+            delete g_statistic_tracker;
+    }
+     g_statistic_tracker = new StatisticTracker(window);
+     g_device_trackers.clear();
+     g_device_info.clear();
+     g_ap_clients.clear();
+     g_early_stop = EarlyStop();
+     g_profiling = false;
+     std::fill(g_callback_profiles, g_callback_profiles + kTraceSourceCount, CallbackProfile{0, 0, 0.0});
+     // a capture belongs to one run
+     ClosePhyEventCapture();
+}
+
+void DevRxTraceCallback(std::string context, Ptr<const Packet> packet) {
+    CallbackTimer timer(kTraceMacRx);
+    int size = packet->GetSize();
+    double now = Simulator::Now().GetSeconds();
+    g_statistic_tracker->updatePeaks(now, size, 0);
+}
+
+void DevTxTraceCallback(std::string context, Ptr<const Packet> packet) {
+    CallbackTimer timer(kTraceMacTx);
+    int size = packet->GetSize();
+    double now = Simulator::Now().GetSeconds();
+    g_statistic_tracker->updatePeaks(now, 0, size);
+}
+
+void ConnectContextTraces() {
+    Config::Connect("/NodeList/*/DeviceList/*/Mac/MacRx", MakeCallback(&DevRxTraceCallback));
+    Config::Connect("/NodeList/*/DeviceList/*/Mac/MacTx", MakeCallback(&DevTxTraceCallback));
+}
+
+std::vector<StatisticTracker> g_device_trackers;
+std::vector<DeviceTraceInfo> g_device_info;
+
+void InitializeDeviceTrackers(size_t count) {
+    g_device_trackers.assign(count, StatisticTracker(g_statistic_tracker->timeWindow));
+    g_device_info.assign(count, DeviceTraceInfo{0, 0});
+}
+
+void DeviceRxTraceCallback(uint32_t device, Ptr<const Packet> packet) {
+    CallbackTimer timer(kTraceMacRx);
+    int size = packet->GetSize();
+    double now = Simulator::Now().GetSeconds();
+    g_statistic_tracker->updatePeaks(now, size, 0);
+    g_device_trackers[device].updatePeaks(now, size, 0);
+}
+
+void DeviceTxTraceCallback(uint32_t device, Ptr<const Packet> packet) {
+    CallbackTimer timer(kTraceMacTx);
+    int size = packet->GetSize();
+    double now = Simulator::Now().GetSeconds();
+    g_statistic_tracker->updatePeaks(now, 0, size);
+    g_device_trackers[device].updatePeaks(now, 0, size);
+}
+
+// every wifi device in the NodeList, in the order device indices are given out
+std::vector<Ptr<WifiNetDevice>> FindWifiDevices(std::vector<DeviceTraceInfo>& info) {
+    std::vector<Ptr<WifiNetDevice>> devices;
+    for (uint32_t n = 0; n < NodeList::GetNNodes(); n++) {
+        Ptr<Node> node = NodeList::GetNode(n);
+        for (uint32_t d = 0; d < node->GetNDevices(); d++) {
+            Ptr<WifiNetDevice> device = DynamicCast<WifiNetDevice>(node->GetDevice(d));
+            if (device) {
+                devices.push_back(device);
+                info.push_back(DeviceTraceInfo{node->GetId(), d});
+            }
+        }
+    }
+    return devices;
+}
+
+size_t ConnectDeviceTraces() {
+    std::vector<DeviceTraceInfo> info;
+    std::vector<Ptr<WifiNetDevice>> devices = FindWifiDevices(info);
+
+    InitializeDeviceTrackers(devices.size());
+    g_device_info = info;
+    for (uint32_t i = 0; i < devices.size(); i++) {
+        Ptr<WifiMac> mac = devices[i]->GetMac();
+        mac->TraceConnectWithoutContext("MacRx", MakeBoundCallback(&DeviceRxTraceCallback, i));
+        mac->TraceConnectWithoutContext("MacTx", MakeBoundCallback(&DeviceTxTraceCallback, i));
+    }
+    return devices.size();
+}
+
+std::vector<int> g_ap_clients;
+
+void PhyStateTraceCallback(uint32_t device, Time start, Time duration, WifiPhyState state) {
+    CallbackTimer timer(kTracePhyState);
+    double now = Simulator::Now().GetSeconds();
+    g_statistic_tracker->updatePhyState(now, start.GetSeconds(), duration.GetSeconds(), state);
+    if (device < g_device_trackers.size()) {
+        g_device_trackers[device].updatePhyState(now, start.GetSeconds(), duration.GetSeconds(), state);
+    }
+}
+
+void PhyRxOkTraceCallback(uint32_t device, Ptr<const Packet> packet, double snr, WifiMode mode,
+                          WifiPreamble preamble) {
+    CallbackTimer timer(kTracePhyRxOk);
+    double now = Simulator::Now().GetSeconds();
+    g_statistic_tracker->updateRxOutcome(now, true, snr);
+    if (device < g_device_trackers.size()) {
+        g_device_trackers[device].updateRxOutcome(now, true, snr);
+    }
+}
+
+void PhyRxErrorTraceCallback(uint32_t device, Ptr<const Packet> packet, double snr) {
+    CallbackTimer timer(kTracePhyRxError);
+    double now = Simulator::Now().GetSeconds();
+    g_statistic_tracker->updateRxOutcome(now, false, snr);
+    if (device < g_device_trackers.size()) {
+        g_device_trackers[device].updateRxOutcome(now, false, snr);
+    }
+}
+
+static void UpdateApClients(uint32_t device, int change) {
+    CallbackTimer timer(kTraceAssociation);
+    g_ap_clients[device] = std::max(g_ap_clients[device] + change, 0);
+    double now = Simulator::Now().GetSeconds();
+
+    // the global tracker sees the mean and the largest association count over the APs
+    int total = 0;
+    int peak = 0;
+    for (int count : g_ap_clients) {
+        total += count;
+        peak = std::max(peak, count);
+    }
+    g_statistic_tracker->updateClients(now, (double) total / g_statistic_tracker->aps, peak);
+    if (device < g_device_trackers.size()) {
+        g_device_trackers[device].updateClients(now, g_ap_clients[device], g_ap_clients[device]);
+    }
+}
+
+void ApAssociatedTraceCallback(uint32_t device, uint16_t aid, Mac48Address address) {
+    UpdateApClients(device, 1);
+}
+
+void ApDeassociatedTraceCallback(uint32_t device, uint16_t aid, Mac48Address address) {
+    UpdateApClients(device, -1);
+}
+
+size_t ConnectChannelTraces() {
+    std::vector<DeviceTraceInfo> info;
+    std::vector<Ptr<WifiNetDevice>> devices = FindWifiDevices(info);
+
+    g_ap_clients.assign(devices.size(), 0);
+    g_statistic_tracker->radios = 0;
+    g_statistic_tracker->aps = 0;
+    for (uint32_t i = 0; i < devices.size(); i++) {
+        for (uint8_t p = 0; p < devices[i]->GetNPhys(); p++) {
+            Ptr<WifiPhyStateHelper> state = devices[i]->GetPhy(p)->GetState();
+            state->TraceConnectWithoutContext("State", MakeBoundCallback(&PhyStateTraceCallback, i));
+            state->TraceConnectWithoutContext("RxOk", MakeBoundCallback(&PhyRxOkTraceCallback, i));
+            state->TraceConnectWithoutContext("RxError", MakeBoundCallback(&PhyRxErrorTraceCallback, i));
+        }
+        g_statistic_tracker->radios += devices[i]->GetNPhys();
+        if (i < g_device_trackers.size()) {
+            g_device_trackers[i].radios = devices[i]->GetNPhys();
+        }
+
+        Ptr<ApWifiMac> ap = DynamicCast<ApWifiMac>(devices[i]->GetMac());
+        if (ap) {
+            ap->TraceConnectWithoutContext("AssociatedSta", MakeBoundCallback(&ApAssociatedTraceCallback, i));
+            ap->TraceConnectWithoutContext("DeAssociatedSta", MakeBoundCallback(&ApDeassociatedTraceCallback, i));
+            g_statistic_tracker->aps++;
+        }
+    }
+    return devices.size();
+}
+
+size_t GetDeviceCount() {
+    return g_device_trackers.size();
+}
+
+DeviceTraceInfo GetDeviceInfo(size_t device) {
+    return g_device_info.at(device);
+}
+
+WindowRecordBuffer* DetachDeviceWindowMetrics(size_t device) {
+    WindowRecordBuffer* buffer = new WindowRecordBuffer();
+    g_device_trackers.at(device).store.detach(*buffer);
+    return buffer;
+}
+
+WindowRecordBuffer* DetachWindowMetrics() {
+    WindowRecordBuffer* buffer = new WindowRecordBuffer();
+    g_statistic_tracker->store.detach(*buffer);
+    return buffer;
+}
+
+void EnableWindowStreaming(size_t capacity) {
+    g_statistic_tracker->store.enableStreaming(capacity);
+}
+
+WindowRecordBuffer* DrainWindowMetrics() {
+    WindowRecordBuffer* buffer = new WindowRecordBuffer();
+    g_statistic_tracker->store.drain(*buffer);
+    return buffer;
+}
+
+uint64_t GetDroppedWindowCount() {
+    return g_statistic_tracker->store.dropped;
+}
+
+void FlushStatisticTracker() {
+    double now = Simulator::Now().GetSeconds();
+    g_statistic_tracker->flush(now);
+    for (StatisticTracker& tracker : g_device_trackers) {
+        tracker.flush(now);
+    }
+}
+
+size_t AddWindowRollup(int factor) {
+    g_statistic_tracker->addRollup(factor);
+    return g_statistic_tracker->rollups.size() - 1;
+}
+
+WindowRecordBuffer* DetachRollupWindowMetrics(size_t rollup) {
+    WindowRecordBuffer* buffer = new WindowRecordBuffer();
+    g_statistic_tracker->rollups.at(rollup).store.detach(*buffer);
+    return buffer;
+}
+
+void EnableWindowSketches() {
+    g_statistic_tracker->enableSketches();
+}
+
+std::vector<double> GetSketchLayout() {
+    return {(double) kSketchBuckets, kSketchAccuracy, (double) sizeof(WindowSketches), (double) kThroughputSlices};
+}
+
+std::vector<size_t> GetWindowMetricsLayout() {
+    return {
+        offsetof(WindowMetrics, windowStart),
+        offsetof(WindowMetrics, rxCount),
+        offsetof(WindowMetrics, txCount),
+        offsetof(WindowMetrics, rxSum),
+        offsetof(WindowMetrics, txSum),
+        offsetof(WindowMetrics, RadioRXBitsPeak),
+        offsetof(WindowMetrics, RadioTXBitsPeak),
+        offsetof(WindowMetrics, RadioRXBitsMean),
+        offsetof(WindowMetrics, RadioTXBitsMean),
+        offsetof(WindowMetrics, radioUtilization),
+        offsetof(WindowMetrics, meanRatioUtilization),
+        offsetof(WindowMetrics, ratioAssociationClientsPeak),
+        offsetof(WindowMetrics, meanRatioAssociationClients),
+        offsetof(WindowMetrics, channelPeakRx),
+        offsetof(WindowMetrics, channelPeakTx),
+        offsetof(WindowMetrics, channelThroughput),
+        offsetof(WindowMetrics, channelInterference),
+        offsetof(WindowMetrics, channelBusyRate),
+        offsetof(WindowMetrics, deviceRxPeak),
+        offsetof(WindowMetrics, deviceTxPeak),
+        offsetof(WindowMetrics, RetriedRx),
+        offsetof(WindowMetrics, RetriedTx),
+        offsetof(WindowMetrics, rxOkCount),
+        offsetof(WindowMetrics, rxErrorCount),
+        offsetof(WindowMetrics, meanSnrDb),
+        sizeof(WindowMetrics),
+    };
+}
@@ -0,0 +1,370 @@
+// statistic_tracker.h
+//
+// per-window statistics collected from the ns-3 trace sources by MixedWireless.
+// generator.py either loads the prebuilt libstatistic_tracker.so (see build_tracker.py)
+// and only includes this header, or JIT-compiles statistic_tracker.cc through cppyy.
+#pragma once
+
+#include "ns3/core-module.h"
+#include "ns3/network-module.h"
+#include "ns3/internet-module.h"
+#include "ns3/wifi-module.h"
+
+#include <cstdint>
+#include <map>
+#include <string>
+#include <utility>
+#include <vector>
+
+using namespace ns3;
+
+Ipv4Address getIpv4AddressFromNode(Ptr<Node> node);
+
+// one closed window. records are stored back to back and read from python as a numpy
+// structured array (results.WINDOW_DTYPE), keep the two in sync when adding fields.
+struct WindowMetrics {
+    double windowStart;
+
+    // counter part
+    int rxCount;
+    int txCount;
+    double rxSum;
+    double txSum;
+
+    // ap data info, statistics
+    int RadioRXBitsPeak;
+    int RadioTXBitsPeak;
+    double RadioRXBitsMean;
+    double RadioTXBitsMean;
+
+
+    double radioUtilization;
+    double meanRatioUtilization;
+
+    int ratioAssociationClientsPeak;
+    double meanRatioAssociationClients;
+
+    int channelPeakRx;
+    int channelPeakTx;
+    int channelThroughput;
+    double channelInterference;
+
+    double channelBusyRate;
+    // terminal data info
+    int deviceRxPeak;
+    int deviceTxPeak;
+    int RetriedRx;
+    int RetriedTx;
+
+    // phy receptions, channelInterference is the share of them that failed
+    int rxOkCount;
+    int rxErrorCount;
+    double meanSnrDb; // over the successful receptions
+
+    WindowMetrics() :
+        windowStart(0.0),
+        rxCount(0),
+        txCount(0),
+        rxSum(0.0),
+        txSum(0.0),
+        RadioRXBitsPeak(0),
+        RadioTXBitsPeak(0),
+        RadioRXBitsMean(0.0),
+        RadioTXBitsMean(0.0),
+        radioUtilization(0.0),
+        meanRatioUtilization(0.0),
+        ratioAssociationClientsPeak(0),
+        meanRatioAssociationClients(0.0),
+        channelPeakRx(0),
+        channelPeakTx(0),
+        channelThroughput(0),
+        channelInterference(0.0),
+        channelBusyRate(0.0),
+        deviceRxPeak(0),
+        deviceTxPeak(0),
+        RetriedRx(0),
+        RetriedTx(0),
+        rxOkCount(0),
+        rxErrorCount(0),
+        meanSnrDb(0.0) {}
+};
+
+// fixed-memory quantile sketch (DDSketch with a bounded bucket range). bucket i > 1 counts
+// the values in (gamma^(i-1), gamma^i] and bucket 1 those in [1, gamma], which bounds the
+// relative error of any quantile by kSketchAccuracy; bucket 0 counts values below 1 (a
+// packet or slice of 0 bytes). values past the last bucket are counted in it. sketches of
+// the same kind merge by adding their counts, across windows or runs.
+const double kSketchAccuracy = 0.02;
+const int kSketchBuckets = 560; // gamma^559 is about 5e9, enough for bytes per window
+
+struct QuantileSketch {
+    uint32_t counts[kSketchBuckets];
+
+    QuantileSketch();
+    void add(double value);
+    void merge(const QuantileSketch& other);
+    void clear();
+};
+
+// the sketches kept with every window when sketching is enabled. a window is cut into
+// kThroughputSlices equal slices and throughput gets the rx + tx bytes of each one, empty
+// slices included, so its quantiles describe the traffic inside the window. a rollup
+// window merges the slices of its base windows.
+const int kThroughputSlices = 10;
+
+struct WindowSketches {
+    QuantileSketch rxSize;
+    QuantileSketch txSize;
+    QuantileSketch throughput;
+
+    void merge(const WindowSketches& other);
+    void clear();
+};
+
+// owns the closed windows of a run once they are handed over to python. sketches is
+// either empty or holds one entry per record.
+struct WindowRecordBuffer {
+    std::vector<WindowMetrics> records;
+    std::vector<WindowSketches> sketches;
+
+    uintptr_t data() const { return reinterpret_cast<uintptr_t>(records.data()); }
+    size_t size() const { return records.size(); }
+    uintptr_t sketchData() const { return reinterpret_cast<uintptr_t>(sketches.data()); }
+    size_t sketchCount() const { return sketches.size(); }
+};
+
+// closed windows of one resolution. normally every window is kept, windows[k] being
+// window number k. in streaming mode the windows go to a ring of fixed size instead and
+// are taken out with drain(); when the ring is full the oldest window is overwritten and
+// counted in dropped.
+struct WindowStore {
+    std::vector<WindowMetrics> windows;
+    std::vector<WindowSketches> sketches; // parallel to windows when sketching
+    bool sketching;
+    size_t ringCapacity;
+    size_t ringHead;
+    size_t ringCount;
+    uint64_t dropped;
+
+    WindowStore();
+
+    void push(const WindowMetrics& window, const WindowSketches* windowSketches);
+    void enableSketches();
+    void enableStreaming(size_t capacity);
+    void drain(WindowRecordBuffer& out);
+    void detach(WindowRecordBuffer& out);
+};
+
+// add a closed window into a coarser one: counts and sums add up, peaks take the max,
+// rates are summed here and divided by the number of merged windows when it closes
+void mergeWindow(WindowMetrics& into, const WindowMetrics& window);
+
+// a coarser resolution of the same run, built from the tracker's closed windows: window
+// number k of the rollup covers the tracker's windows k*factor .. (k+1)*factor-1
+struct WindowRollup {
+    int factor;
+    double timeWindow;
+    int64_t currentIndex;
+    int merged;
+    WindowMetrics currentMetrics;
+    WindowSketches currentSketches;
+    WindowStore store;
+
+    WindowRollup(int factor, double baseWindow, bool sketching);
+
+    void add(int64_t baseIndex, const WindowMetrics& window, const WindowSketches* windowSketches);
+    void saveCurrentWindow();
+    void flush();
+};
+
+// phy time spent per state in one window, summed over the radios of a tracker
+struct ChannelTime {
+    double tx;
+    double rx;
+    double ccaBusy;
+
+    ChannelTime() : tx(0.0), rx(0.0), ccaBusy(0.0) {}
+    void add(WifiPhyState state, double seconds);
+};
+
+struct EarlyStop;
+
+struct StatisticTracker {
+    double timeWindow;
+    double currentTime;
+    int64_t currentIndex; // window number of currentMetrics, floor(time / timeWindow)
+    WindowMetrics currentMetrics;
+    bool windowOpen; // something was recorded into currentMetrics since it was last saved
+    bool sketching;
+    WindowSketches currentSketches;
+    int currentSlice;  // throughput slice of the current window that sliceBytes belongs to
+    double sliceBytes;
+    WindowStore store;
+    std::vector<WindowRollup> rollups;
+
+    // channel metrics, fed by ConnectChannelTraces. radioUtilization (tx + rx) and
+    // channelBusyRate (tx + rx + cca busy) are the phy time of the window over
+    // radios * window length; meanRatioAssociationClients is the time average of clients.
+    int radios;
+    int aps; // the global tracker averages clients over its APs
+    ChannelTime currentChannel;
+    std::map<int64_t, ChannelTime> pendingChannel; // reported ahead for later windows
+    double clients;      // associated clients (per AP for the global tracker)
+    int clientsPeak;     // clients of the busiest AP
+    double clientsSince; // last change of clients, or start of the window
+    double clientTime;   // integral of clients over the window so far
+    EarlyStop* earlyStop; // the global tracker's, while EnableEarlyStop is in effect
+
+    StatisticTracker(double window=1.0); // can set the window size as up to 60 seconds
+
+    void updatePeaks(double time, int rxSize, int txSize);
+    // a phy state period [start, start + duration], as reported by WifiPhyStateHelper
+    // "State": periods cut by window boundaries are split between the windows, the part
+    // falling into windows already closed is counted in the current one
+    void updatePhyState(double time, double start, double duration, WifiPhyState state);
+    void updateRxOutcome(double time, bool ok, double snr);
+    void updateClients(double time, double level, int peak);
+    // move to the window of time, closing the current one (and any empty ones in between)
+    void advance(double time);
+    // close every window before index without opening window index for writing
+    void closeWindowsBefore(int64_t index);
+    void openWindow();
+    // add the throughput of the slices before slice to the sketch
+    void closeSlicesBefore(int slice);
+    void saveCurrentWindow(double windowEnd);
+    void addRollup(int factor);
+    // keep WindowSketches for every window, call before adding rollups
+    void enableSketches();
+
+    // save the window that is still open, e.g. when the simulation stops at endTime
+    void flush(double endTime);
+};
+
+extern StatisticTracker* g_statistic_tracker;
+
+void InitializeStatisticTracker(double window);
+
+void DevRxTraceCallback(std::string context, Ptr<const Packet> packet);
+void DevTxTraceCallback(std::string context, Ptr<const Packet> packet);
+
+// Config::Connect the two callbacks above to MacRx/MacTx of every device. done here rather
+// than with ns.MakeCallback from python, whose callbacks break the next run in the same
+// process after Simulator::Destroy.
+void ConnectContextTraces();
+
+// per-device mode. every wifi device gets its own tracker, and its MacRx/MacTx sources are
+// connected without a context string to callbacks bound to the device's index, which
+// update that tracker and the global one.
+struct DeviceTraceInfo {
+    uint32_t nodeId;
+    uint32_t ifIndex;
+};
+
+extern std::vector<StatisticTracker> g_device_trackers;
+extern std::vector<DeviceTraceInfo> g_device_info;
+
+void InitializeDeviceTrackers(size_t count);
+void DeviceRxTraceCallback(uint32_t device, Ptr<const Packet> packet);
+void DeviceTxTraceCallback(uint32_t device, Ptr<const Packet> packet);
+// every wifi device in the NodeList, in device index order, its node id and ifIndex in info
+std::vector<Ptr<WifiNetDevice>> FindWifiDevices(std::vector<DeviceTraceInfo>& info);
+// connect every wifi device in the NodeList, returns the number of devices
+size_t ConnectDeviceTraces();
+size_t GetDeviceCount();
+DeviceTraceInfo GetDeviceInfo(size_t device);
+WindowRecordBuffer* DetachDeviceWindowMetrics(size_t device);
+
+// channel metrics: the phy State/RxOk/RxError and AP association sources of every wifi
+// device, connected without context to callbacks bound to the device's index. they feed
+// the global tracker and, after ConnectDeviceTraces, the device trackers. returns the
+// number of devices.
+extern std::vector<int> g_ap_clients; // associated stations of every device, 0 unless an AP
+
+void PhyStateTraceCallback(uint32_t device, Time start, Time duration, WifiPhyState state);
+void PhyRxOkTraceCallback(uint32_t device, Ptr<const Packet> packet, double snr, WifiMode mode,
+                          WifiPreamble preamble);
+void PhyRxErrorTraceCallback(uint32_t device, Ptr<const Packet> packet, double snr);
+void ApAssociatedTraceCallback(uint32_t device, uint16_t aid, Mac48Address address);
+void ApDeassociatedTraceCallback(uint32_t device, uint16_t aid, Mac48Address address);
+size_t ConnectChannelTraces();
+
+// hand all the closed windows over to the caller, who owns (and frees) the buffer.
+// the tracker is left empty.
+WindowRecordBuffer* DetachWindowMetrics();
+
+// streaming mode, see WindowStore
+void EnableWindowStreaming(size_t capacity);
+// the windows closed since the last drain, oldest first; the caller owns the buffer
+WindowRecordBuffer* DrainWindowMetrics();
+uint64_t GetDroppedWindowCount();
+
+void FlushStatisticTracker();
+
+// early termination. the tracker closes its windows as they end, from the end of the
+// warm-up on, and stops the simulator once windows (> 0) windows past the warm-up are
+// closed, or once the running mean over those windows of every watched field has stayed
+// within tolerance (relative) of its latest value for the last patience windows. the
+// watched fields are given by offset into WindowMetrics and type, 'd' double or 'i'
+// int32_t; patience 0 leaves convergence out. call after InitializeStatisticTracker.
+struct EarlyStop {
+    int64_t firstWindow = 0; // the first window past the warm-up
+    int64_t windows = 0;
+    double tolerance = 0.0;
+    uint32_t patience = 0;
+    std::vector<size_t> offsets;
+    std::string types;
+    std::vector<double> sums;
+    std::vector<std::vector<double>> means; // running means after each of the last windows
+    int64_t counted = 0; // windows closed past the warm-up
+    bool met = false;
+    std::string reason;  // "windows" or "converged" once met
+    double stopTime = -1.0; // simulated seconds at the stop
+
+    void windowClosed(int64_t index, const WindowMetrics& window);
+};
+
+void EnableEarlyStop(double warmup, int64_t windows, double tolerance, uint32_t patience,
+                     const std::vector<size_t>& offsets, const std::string& types);
+// the simulated time the tracker stopped the run at, -1 when it did not
+double GetEarlyStopTime();
+std::string GetEarlyStopReason();
+
+// multi-resolution: also aggregate windows factor times the tracker's window size.
+// returns the rollup's number, used to detach its windows after the run.
+size_t AddWindowRollup(int factor);
+WindowRecordBuffer* DetachRollupWindowMetrics(size_t rollup);
+
+// per-window quantile sketches, see WindowSketches. call before AddWindowRollup.
+void EnableWindowSketches();
+// kSketchBuckets, kSketchAccuracy, sizeof(WindowSketches) and kThroughputSlices, for the
+// check in python
+std::vector<double> GetSketchLayout();
+
+// optional instrumentation: every callback is counted per trace source, and one call in
+// sampleEvery is timed, which keeps the overhead low enough to leave on. the totals are
+// extrapolated from the timed calls in python (profiling.callback_profile).
+enum TraceSourceId {
+    kTraceMacRx,
+    kTraceMacTx,
+    kTracePhyState,
+    kTracePhyRxOk,
+    kTracePhyRxError,
+    kTraceAssociation,
+    kTraceSourceCount
+};
+
+struct CallbackProfile {
+    uint64_t calls;
+    uint64_t timed;
+    double timedSeconds;
+};
+
+// reset by InitializeStatisticTracker, enable it afterwards
+void EnableCallbackProfiling(uint32_t sampleEvery);
+size_t GetTraceSourceCount();
+std::string GetTraceSourceName(size_t source);
+CallbackProfile GetCallbackProfile(size_t source);
+
+// offsetof() of every WindowMetrics field followed by sizeof(WindowMetrics), so python
+// can check its dtype against the compiled layout
+std::vector<size_t> GetWindowMetricsLayout();
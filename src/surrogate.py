@@ -0,0 +1,406 @@
+"""
+    a statistical surrogate of MixedWireless for bulk synthetic windows.
+
+    a SurrogateModel is fitted to real runs of one scenario class (the MixedWireless
+    arguments other than seed and duration). it keeps, for every window field, the
+    empirical marginal of the windows past the warm-up, and couples the fields with a
+    Gaussian copula: the normal scores of the fields follow a VAR(1), fitted by
+    Yule-Walker, which carries the fields' cross-correlation and their lag-1
+    autocorrelation. sampling draws the normal scores, maps them through the normal
+    cdf onto the marginals, and copies the
+    warm-up windows from a random real run. everything is numpy, vectorized over the
+    runs sampled at once: many runs per call are what makes it fast.
+
+        library = SurrogateLibrary("surrogates/")
+        library.fit(dict(numofbackbone=3, numofInfra=3, numofLan=1, sampleCts=7), seeds=range(1, 21), duration=60)
+        out = SurrogateMixedWireless(3, 3, 1, 60, 7, seed=5, library=library)     # like MixedWireless
+        records = library.get(scenario).sample(windows=60, runs=100000)          # (runs, windows) WINDOW_DTYPE
+
+    validation_report() compares the surrogate with held-out simulated runs: mean,
+    standard deviation, two-sample Kolmogorov-Smirnov statistic and lag-1
+    autocorrelation per field.
+"""
+
+import hashlib
+import json
+import math
+import os
+
+import numpy as np
+
+from results import WINDOW_DTYPE, WindowResult
+
+
+# the MixedWireless arguments a scenario class is made of, with the defaults of the optional ones
+REQUIRED_KEYS = ("numofbackbone", "numofInfra", "sampleCts")
+CLASS_KEYS = {
+    "numofLan": 1,
+    "routing": "olsr",
+    "channel": "yans",
+    "cutoff_range": 250.0,
+    "channel_metrics": True,
+    "interferers": 0,
+    "interferer_duty_cycle": 0.1,
+    "interferer_kind": "phy",
+}
+FIELDS = [name for name in WINDOW_DTYPE.names if name != "windowStart"]
+MODEL_VERSION = 1
+
+# ridge on the scores' covariance, and the largest eigenvalue the VAR(1) may have
+_RIDGE = 1e-3
+_MAX_RADIUS = 0.98
+# runs sampled together
+_CHUNK_RUNS = 4096
+
+
+def scenario_class(scenario):
+    """the class parameters of a scenario dict, defaults filled in"""
+    missing = [key for key in REQUIRED_KEYS if scenario.get(key) is None]
+    if missing:
+        raise ValueError("scenario lacks %s" % (", ".join(missing),))
+    params = {key: scenario[key] for key in REQUIRED_KEYS}
+    params.update((key, scenario.get(key, default)) for key, default in CLASS_KEYS.items())
+    if params["channel"] != "cutoff":
+        params["cutoff_range"] = None
+    if not params["interferers"]:
+        params["interferer_duty_cycle"] = params["interferer_kind"] = None
+    return params
+
+
+def class_key(scenario):
+    return hashlib.sha256(json.dumps(scenario_class(scenario), sort_keys=True).encode()).hexdigest()[:16]
+
+
+# the standard normal cdf and its inverse, vectorized; numpy has neither and scipy is not a dependency
+
+def normal_cdf(z):
+    """Phi(z), absolute error below 1.5e-7 (Abramowitz and Stegun 7.1.26)"""
+    z = np.asarray(z, dtype=float)
+    x = np.abs(z) / math.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erfc = poly * np.exp(-x * x)
+    return np.where(z >= 0, 1.0 - 0.5 * erfc, 0.5 * erfc)
+
+
+_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+      1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+      6.680131188771972e+01, -1.328068155288572e+01)
+_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+      -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00, 3.754408661907416e+00)
+
+
+def normal_ppf(p):
+    """Phi^-1(p) for p in (0, 1), relative error below 1.2e-9 (Acklam's algorithm)"""
+    p = np.asarray(p, dtype=float)
+    out = np.empty_like(p)
+    low = p < 0.02425
+    high = p > 1 - 0.02425
+    mid = ~(low | high)
+    q = p[mid] - 0.5
+    r = q * q
+    out[mid] = (((((_A[0] * r + _A[1]) * r + _A[2]) * r + _A[3]) * r + _A[4]) * r + _A[5]) * q / \
+        (((((_B[0] * r + _B[1]) * r + _B[2]) * r + _B[3]) * r + _B[4]) * r + 1)
+    for mask, sign, tail in ((low, 1.0, p[low]), (high, -1.0, 1 - p[high])):
+        q = np.sqrt(-2 * np.log(tail))
+        out[mask] = sign * (((((_C[0] * q + _C[1]) * q + _C[2]) * q + _C[3]) * q + _C[4]) * q + _C[5]) / \
+            ((((_D[0] * q + _D[1]) * q + _D[2]) * q + _D[3]) * q + 1)
+    return out
+
+
+def _normal_scores(values):
+    """Phi^-1 of the mid-ranks of values, ties sharing their average rank"""
+    order = np.argsort(values, kind="stable")
+    sorted_values = values[order]
+    # average rank of every run of equal values
+    starts = np.flatnonzero(np.r_[True, sorted_values[1:] != sorted_values[:-1]])
+    ends = np.r_[starts[1:], len(values)]
+    ranks = np.empty(len(values))
+    ranks[order] = np.repeat((starts + ends - 1) / 2.0, ends - starts)
+    return normal_ppf((ranks + 0.5) / len(values))
+
+
+def _psd_factor(matrix):
+    """a factor L with L L' the nearest positive semi-definite matrix to a symmetric one"""
+    values, vectors = np.linalg.eigh((matrix + matrix.T) / 2)
+    return vectors * np.sqrt(np.clip(values, 0.0, None))
+
+
+def steady_windows(result, first_window):
+    """the windows of a run past the warm-up, without a last window cut short by the stop"""
+    records = np.asarray(result.records)[first_window:]
+    if len(records) and result.simulated_seconds is not None:
+        if records["windowStart"][-1] + result.time_window > result.simulated_seconds + 1e-9:
+            records = records[:-1]
+    return records
+
+
+class SurrogateModel:
+    """see the module docstring; fit() it, then sample() or save() it"""
+
+    def __init__(self, time_window, first_window, scenario, marginals, constants, transition, innovation,
+                 stationary, warmup_windows):
+        self.time_window = time_window
+        self.first_window = first_window
+        self.scenario = scenario
+        self.marginals = marginals          # field -> sorted pooled values, the modelled fields
+        self.constants = constants          # field -> the one value of a field that never varies
+        self.transition = transition        # VAR(1) matrix of the modelled fields' scores
+        self.innovation = innovation        # factor of the VAR(1) innovation covariance
+        self.stationary = stationary        # factor of the scores' stationary covariance
+        self.warmup_windows = warmup_windows  # (runs, first_window) WINDOW_DTYPE
+
+    @property
+    def fields(self):
+        return list(self.marginals)
+
+    @classmethod
+    def fit(cls, results, warmup=3.0, scenario=None):
+        """fit to the WindowResults of runs of one scenario class (same window size)"""
+        results = list(results)
+        if not results:
+            raise ValueError("no runs to fit to")
+        time_window = results[0].time_window
+        if any(abs(r.time_window - time_window) > 1e-12 for r in results):
+            raise ValueError("the runs have different window sizes")
+        first_window = int(math.ceil(warmup / time_window - 1e-9))
+        runs = [steady_windows(r, first_window) for r in results]
+        runs = [r for r in runs if len(r) >= 2]
+        if not runs:
+            raise ValueError("no run has two windows past the %gs warm-up" % (warmup,))
+        pooled = np.concatenate(runs)
+        bounds = np.cumsum([0] + [len(r) for r in runs])
+
+        marginals, constants, scores = {}, {}, []
+        for name in FIELDS:
+            values = pooled[name].astype(float)
+            if values.min() == values.max():
+                constants[name] = values[0]
+                continue
+            marginals[name] = np.sort(values)
+            scores.append(_normal_scores(values))
+        z = np.array(scores).T.reshape(len(pooled), len(marginals))
+
+        # Yule-Walker on the lag-0 and lag-1 covariances, lag-1 pairs within runs only
+        current = np.concatenate([z[bounds[i] + 1:bounds[i + 1]] for i in range(len(runs))])
+        previous = np.concatenate([z[bounds[i]:bounds[i + 1] - 1] for i in range(len(runs))])
+        lag0 = z.T @ z / len(z)
+        lag1 = current.T @ previous / len(z)
+        # fields that move together (rx and tx peaks) make lag0 singular
+        transition = lag1 @ np.linalg.inv(lag0 + _RIDGE * np.eye(len(lag0)))
+        radius = np.abs(np.linalg.eigvals(transition)).max(initial=0.0)
+        if radius > _MAX_RADIUS:
+            transition *= _MAX_RADIUS / radius
+        innovation = _psd_factor(lag0 - transition @ lag0 @ transition.T)
+        # the covariance the sampled scores settle at, which the marginals are mapped from
+        stationary = lag0
+        for _ in range(1000):
+            following = transition @ stationary @ transition.T + innovation @ innovation.T
+            converged = np.abs(following - stationary).max(initial=0.0) < 1e-10
+            stationary = following
+            if converged:
+                break
+
+        warm = [np.asarray(r.records)[:first_window] for r in results if len(r) >= first_window]
+        warmup_windows = np.array(warm, dtype=WINDOW_DTYPE).reshape(len(warm), first_window)
+        return cls(time_window, first_window, scenario, marginals, constants, transition,
+                   innovation, _psd_factor(stationary), warmup_windows)
+
+    def sample(self, windows, runs=1, seed=None):
+        """runs independent runs of windows windows each, a (runs, windows) WINDOW_DTYPE array"""
+        rng = np.random.default_rng(seed)
+        out = np.zeros((runs, windows), dtype=WINDOW_DTYPE)
+        out["windowStart"] = np.arange(windows) * self.time_window
+        warm = min(self.first_window, windows)
+        if warm and len(self.warmup_windows):
+            out[:, :warm] = self.warmup_windows[rng.integers(len(self.warmup_windows), size=runs), :warm]
+        steady = windows - warm
+        if steady <= 0:
+            return out
+
+        # a chunk of runs at a time keeps the normal scores a fraction of the output
+        for begin in range(0, runs, _CHUNK_RUNS):
+            self._fill(out[begin:begin + _CHUNK_RUNS, warm:], rng)
+        return out
+
+    def _fill(self, out, rng):
+        runs, steady = out.shape
+        fields = len(self.marginals)
+        z = np.empty((steady, runs, fields))
+        z[0] = rng.standard_normal((runs, fields)) @ self.stationary.T
+        for t in range(1, steady):
+            z[t] = z[t - 1] @ self.transition.T + rng.standard_normal((runs, fields)) @ self.innovation.T
+        # standardized by the stationary spread, so each field keeps its marginal exactly
+        z /= np.sqrt(np.maximum((self.stationary ** 2).sum(axis=1), 1e-12))
+        for k, (name, values) in enumerate(self.marginals.items()):
+            # the inverse of the empirical cdf: only values seen in the real runs come out
+            index = np.minimum((normal_cdf(z[:, :, k]) * len(values)).astype(np.int64), len(values) - 1)
+            column = values[index].T
+            if out.dtype[name].kind == "i":
+                column = np.rint(column)
+            out[name] = column
+        for name, value in self.constants.items():
+            out[name] = value
+
+    def save(self, path):
+        meta = {
+            "version": MODEL_VERSION,
+            "time_window": self.time_window,
+            "first_window": self.first_window,
+            "scenario": self.scenario,
+            "fields": self.fields,
+            "constants": {name: float(value) for name, value in self.constants.items()},
+        }
+        if self.marginals:
+            marginals = np.array([self.marginals[name] for name in self.fields])
+        else:
+            # every field constant: reshape(0, -1) cannot infer a row length
+            marginals = np.empty((0, 0))
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f, meta=np.array(json.dumps(meta)), marginals=marginals,
+                transition=self.transition, innovation=self.innovation, stationary=self.stationary,
+                warmup_windows=self.warmup_windows)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["version"] != MODEL_VERSION:
+                raise ValueError("%s: surrogate version %r not supported" % (path, meta["version"]))
+            marginals = dict(zip(meta["fields"], data["marginals"]))
+            return cls(meta["time_window"], meta["first_window"], meta["scenario"], marginals,
+                       meta["constants"], data["transition"], data["innovation"], data["stationary"],
+                       data["warmup_windows"])
+
+
+class SurrogateLibrary:
+    """the fitted SurrogateModels of a directory, one file per scenario class"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._models = {}
+
+    def _path(self, scenario):
+        return os.path.join(self.directory, "%s.npz" % (class_key(scenario),))
+
+    def get(self, scenario):
+        """the model of the scenario's class; KeyError when none was fitted"""
+        key = class_key(scenario)
+        if key not in self._models:
+            path = self._path(scenario)
+            if not os.path.exists(path):
+                raise KeyError("no surrogate fitted for %s" % (json.dumps(scenario_class(scenario)),))
+            self._models[key] = SurrogateModel.load(path)
+        return self._models[key]
+
+    def put(self, model):
+        model.save(self._path(model.scenario))
+        self._models[class_key(model.scenario)] = model
+
+    def fit(self, scenario, seeds, duration, warmup=3.0, results=None):
+        """
+            simulate the scenario class for every seed (or take results, WindowResults of
+            such runs), fit a model to the runs and store it; returns the model
+        """
+        if results is None:
+            import generator
+            params = {key: value for key, value in scenario_class(scenario).items() if value is not None}
+            results = [generator.MixedWireless(duration=duration, seed=seed, result_format="windows", **params)
+                       for seed in seeds]
+        model = SurrogateModel.fit(results, warmup, scenario_class(scenario))
+        self.put(model)
+        return model
+
+
+def SurrogateMixedWireless(numofbackbone, numofInfra, numofLan, duration, sampleCts, seed=None,
+                           result_format="field_mapping", library=None, **scenario):
+    """
+        MixedWireless, answered by the surrogate fitted for the scenario class in library
+        (a SurrogateLibrary or its directory) instead of by ns-3. the output has the same
+        shape: ceil(duration / window) windows as a field_mapping dict or a WindowResult.
+    """
+    if result_format not in ("field_mapping", "windows"):
+        raise ValueError("unknown result_format: %r" % (result_format,))
+    if library is None:
+        raise ValueError("a surrogate needs a library of fitted models")
+    if not isinstance(library, SurrogateLibrary):
+        library = SurrogateLibrary(library)
+    model = library.get(dict(scenario, numofbackbone=numofbackbone, numofInfra=numofInfra,
+                             numofLan=numofLan, sampleCts=sampleCts))
+    windows = int(math.ceil(duration / model.time_window - 1e-9))
+    result = WindowResult(model.sample(windows, 1, seed)[0], model.time_window,
+                          simulated_seconds=float(duration))
+    return result if result_format == "windows" else result.field_mapping()
+
+
+def _ks(a, b):
+    """two-sample Kolmogorov-Smirnov statistic and its asymptotic p-value"""
+    a, b = np.sort(a), np.sort(b)
+    grid = np.concatenate([a, b])
+    d = float(np.max(np.abs(np.searchsorted(a, grid, side="right") / len(a)
+                            - np.searchsorted(b, grid, side="right") / len(b))))
+    n = len(a) * len(b) / (len(a) + len(b))
+    lam = (math.sqrt(n) + 0.12 + 0.11 / math.sqrt(n)) * d
+    if lam < 1e-3:
+        return d, 1.0
+    k = np.arange(1, 101)
+    p = float(2 * np.sum((-1) ** (k - 1) * np.exp(-2 * k * k * lam * lam)))
+    return d, min(max(p, 0.0), 1.0)
+
+
+def _lag1(runs, ranks=False):
+    """
+        lag-1 autocorrelation of a field, pairs taken within each run; ranks: of the
+        values' normal scores, which is what the copula reproduces
+    """
+    values = np.concatenate(runs).astype(float)
+    if values.min() == values.max():
+        return 0.0
+    if ranks:
+        values = _normal_scores(values)
+    bounds = np.cumsum([0] + [len(r) for r in runs])
+    current = np.concatenate([values[bounds[i] + 1:bounds[i + 1]] for i in range(len(runs))])
+    previous = np.concatenate([values[bounds[i]:bounds[i + 1] - 1] for i in range(len(runs))])
+    return float(np.corrcoef(current, previous)[0, 1])
+
+
+def validation_report(model, results, runs=1000, seed=0):
+    """
+        compare model with simulated runs of its class (best not the ones it was fitted
+        to): per field, the mean and standard deviation of both, the KS statistic and
+        p-value of the windows past the warm-up, and the lag-1 autocorrelations of both,
+        of the values and of their ranks. a few runs that stay high throughout weigh on
+        the first, which the copula does not model; it fits the second.
+    """
+    real = [steady_windows(r, model.first_window) for r in results]
+    real = [r for r in real if len(r) >= 2]
+    windows = model.first_window + max(len(r) for r in real)
+    fake = model.sample(windows, runs, seed)[:, model.first_window:]
+    report = {}
+    for name in FIELDS:
+        a = np.concatenate([r[name] for r in real]).astype(float)
+        b = fake[name].ravel().astype(float)
+        d, p = _ks(a, b)
+        report[name] = {
+            "mean": (float(a.mean()), float(b.mean())),
+            "std": (float(a.std()), float(b.std())),
+            "ks": d,
+            "p": p,
+            "lag1": (_lag1([r[name] for r in real]), _lag1(list(fake[name]))),
+            "rank_lag1": (_lag1([r[name] for r in real], True), _lag1(list(fake[name]), True)),
+        }
+    return report
+
+
+def format_report(report):
+    lines = ["%-28s %12s %12s %10s %10s %6s %7s %13s %13s" % (
+        "field", "mean sim", "mean surr", "std sim", "std surr", "KS", "p", "lag1 sim/surr", "rank sim/surr")]
+    for name, row in report.items():
+        lines.append("%-28s %12.4g %12.4g %10.4g %10.4g %6.3f %7.3f %6.2f/%6.2f %6.2f/%6.2f" % (
+            name, row["mean"][0], row["mean"][1], row["std"][0], row["std"][1], row["ks"], row["p"],
+            row["lag1"][0], row["lag1"][1], row["rank_lag1"][0], row["rank_lag1"][1]))
+    return "\n".join(lines)
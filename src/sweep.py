@@ -0,0 +1,174 @@
+"""
+    parameter sweeps over MixedWireless.
+
+    MixedWireless drives the global ns.Simulator and the global g_statistic_tracker, so
+    only one scenario can run per process. the sweep fans the scenarios out to a pool of
+    long-lived worker processes instead: every worker imports ns-3 and calls
+    initialize_cpp() once, then runs as many scenarios as it is handed.
+
+        from sweep import make_grid, run_sweep
+        grid = make_grid(numofbackbone=[5, 10], numofInfra=[3], duration=[20], sampleCts=[7], seed=[1, 2])
+        for index, scenario, result, error in run_sweep(grid, workers=32):
+            ...
+"""
+
+import functools
+import itertools
+import multiprocessing as mp
+import os
+import queue
+
+import cost_model as costs
+from event_log import EventCapture
+
+
+SCENARIO_KEYS = ("numofbackbone", "numofInfra", "numofLan", "duration", "sampleCts", "seed")
+
+_generator = None
+
+
+def make_grid(numofbackbone, numofInfra, duration, sampleCts, numofLan=(1,), seed=(None,)):
+    """
+        cartesian product of the given value lists, one scenario dict per combination.
+        the order is deterministic, so the index of a scenario identifies it in a sweep.
+    """
+    grid = []
+    for values in itertools.product(numofbackbone, numofInfra, numofLan, duration, sampleCts, seed):
+        grid.append(dict(zip(SCENARIO_KEYS, values)))
+    return grid
+
+
+def _own_event_path(index, scenario):
+    # scenarios of one sweep often share events=...: give each its own file, run.events
+    # becomes run.<index>.events, or the workers would all write the same one
+    events = scenario.get("events")
+    if events is None:
+        return scenario
+    if not isinstance(events, EventCapture):
+        events = EventCapture(events)
+    root, ext = os.path.splitext(events.path)
+    own = EventCapture("%s.%d%s" % (root, index, ext), events.capacity, events.sample_rate, events.reservoir)
+    return dict(scenario, events=own)
+
+
+def _init_worker():
+    # runs once per worker process: pay the ns-3 import and the cppyy JIT a single time
+    global _generator
+    import generator
+    generator.initialize_cpp()
+    _generator = generator
+
+
+def _run_scenario(item):
+    index, scenario = item
+    try:
+        result = _generator.MixedWireless(**scenario)
+    except (Exception, SystemExit) as exc:
+        # a failing scenario must not take the worker down with it and leave the pool
+        # waiting for a result that never comes
+        return index, scenario, None, "%s: %s" % (type(exc).__name__, exc)
+    return index, scenario, result, None
+
+
+def _run_profiled(item):
+    # _run_scenario, plus the profile report the cost model learns from
+    index, scenario = item
+    try:
+        result, report = _generator.MixedWireless(**dict(scenario, profile=True))
+    except (Exception, SystemExit) as exc:
+        return index, scenario, None, "%s: %s" % (type(exc).__name__, exc), None
+    if scenario.get("profile"):
+        result = (result, report)
+    return index, scenario, result, None, report
+
+
+def run_sweep(scenarios, workers=None, maxtasksperchild=None, cost_model=None, memory_mb=None):
+    """
+        run every scenario (a dict of MixedWireless keyword arguments) on a pool of warm
+        worker processes and yield (index, scenario, result, error) as soon as each one
+        finishes, i.e. not in submission order. error is None on success, otherwise a
+        short description and result is None.
+
+        workers defaults to os.cpu_count(). maxtasksperchild recycles a worker after that
+        many scenarios, in case ns-3 state grows across runs; None keeps workers for the
+        whole sweep.
+
+        cost_model (a cost_model.CostModel) starts the scenarios predicted to take longest
+        first, so no long one is left to run alone at the end, and learns from every run
+        that finishes. memory_mb holds a scenario back while the predicted memory of the
+        running ones plus its own would exceed it, and starts the longest one that fits;
+        it budgets the scenarios' memory, each worker process holds a few hundred MB more.
+
+        a scenario that captures events writes them to its own file, events=run.events
+        becomes run.<index>.events; the yielded scenario has that path.
+    """
+    scenarios = [_own_event_path(index, scenario) for index, scenario in enumerate(scenarios)]
+    if not scenarios:
+        return
+    workers = min(workers or os.cpu_count() or 1, len(scenarios))
+
+    # spawn, not fork: a forked child would inherit whatever ns-3/cppyy state the parent has
+    ctx = mp.get_context("spawn")
+    with ctx.Pool(workers, initializer=_init_worker, maxtasksperchild=maxtasksperchild) as pool:
+        if cost_model is None and memory_mb is None:
+            yield from _run_unordered(pool, scenarios)
+        else:
+            yield from _run_scheduled(pool, scenarios, workers, cost_model or costs.CostModel(), memory_mb)
+
+
+def _task_failed(done, index, scenario, profiled, exc):
+    out = (index, scenario, None, "%s: %s" % (type(exc).__name__, exc))
+    done.put(out + (None,) if profiled else out)
+
+
+def _run_unordered(pool, scenarios):
+    # apply_async rather than imap_unordered: a scenario whose task or result cannot be
+    # pickled (MaybeEncodingError) is reported as failed, not raised out of the sweep
+    done = queue.Queue()
+    for index, scenario in enumerate(scenarios):
+        pool.apply_async(_run_scenario, ((index, scenario),), callback=done.put,
+                         error_callback=functools.partial(_task_failed, done, index, scenario, False))
+    for _ in scenarios:
+        yield done.get()
+
+
+def _run_scheduled(pool, scenarios, workers, model, memory_mb):
+    matrix = costs.feature_matrix(scenarios)
+    pending = list(range(len(scenarios)))
+    running = {}  # index -> predicted memory
+    done = queue.Queue()
+    while pending or running:
+        # the predictions improve with every finished run, rank the rest again
+        rows = matrix[pending]
+        order = costs.longest_first([scenarios[i] for i in pending], model, rows)
+        memories = model.predict_many(rows)[:, costs.COSTS.index("memory_mb")]
+        started = set()
+        for k in order:
+            if len(running) >= workers:
+                break
+            memory = memories[k]
+            if running and memory_mb is not None and sum(running.values()) + memory > memory_mb:
+                continue
+            index = pending[k]
+            running[index] = memory
+            started.add(index)
+            # a task that cannot be pickled never reaches _run_profiled: report it too,
+            # or done.get() waits for it forever
+            pool.apply_async(_run_profiled, ((index, scenarios[index]),), callback=done.put,
+                             error_callback=functools.partial(_task_failed, done, index, scenarios[index], True))
+        pending = [i for i in pending if i not in started]
+
+        index, scenario, result, error, report = done.get()
+        del running[index]
+        if report is not None:
+            model.observe(scenario, report)
+        yield index, scenario, result, error
+
+
+def collect_sweep(scenarios, workers=None, maxtasksperchild=None):
+    """run_sweep, but wait for everything and return the (result, error) pairs in scenario order"""
+    scenarios = list(scenarios)
+    results = [None] * len(scenarios)
+    for index, _, result, error in run_sweep(scenarios, workers, maxtasksperchild):
+        results[index] = (result, error)
+    return results
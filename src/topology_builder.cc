@@ -0,0 +1,163 @@
+// topology_builder.cc
+#include "topology_builder.h"
+
+// loss above this is only reached through the range model's -1000 dBm
+static const double kCutoffMaxLossDb = 500.0;
+
+// the phy helper of the chosen channel backend; newChannel() puts the devices installed
+// after it on a channel of their own
+struct ChannelBackend {
+    std::string kind;
+    double cutoffRange;
+    YansWifiPhyHelper yansPhy;
+    YansWifiChannelHelper yansChannel;
+    SpectrumWifiPhyHelper spectrumPhy;
+
+    ChannelBackend(const std::string& kind, double cutoffRange) :
+            kind(kind),
+            cutoffRange(cutoffRange) {
+        NS_ABORT_MSG_IF(kind != "yans" && kind != "spectrum" && kind != "cutoff",
+                        "unknown channel backend " << kind);
+        phy().SetPcapDataLinkType(WifiPhyHelper::DLT_IEEE802_11_RADIO);
+        if (kind == "yans") {
+            yansChannel = YansWifiChannelHelper::Default();
+        }
+    }
+
+    WifiPhyHelper& phy() {
+        if (kind == "yans") {
+            return yansPhy;
+        }
+        return spectrumPhy;
+    }
+
+    void newChannel() {
+        if (kind == "yans") {
+            yansPhy.SetChannel(yansChannel.Create());
+            return;
+        }
+        // the loss and delay models of YansWifiChannelHelper::Default()
+        Ptr<MultiModelSpectrumChannel> channel = CreateObject<MultiModelSpectrumChannel>();
+        channel->AddPropagationLossModel(CreateObject<LogDistancePropagationLossModel>());
+        if (kind == "cutoff") {
+            Ptr<RangePropagationLossModel> range = CreateObject<RangePropagationLossModel>();
+            range->SetAttribute("MaxRange", DoubleValue(cutoffRange));
+            channel->AddPropagationLossModel(range);
+            channel->SetAttribute("MaxLossDb", DoubleValue(kCutoffMaxLossDb));
+        }
+        channel->SetPropagationDelayModel(CreateObject<ConstantSpeedPropagationDelayModel>());
+        spectrumPhy.SetChannel(channel);
+    }
+};
+
+// the mobility model of one kind of node; speed and pause must match mobility.py
+static void setMobilityModel(MobilityHelper& mobility, const std::string& kind, const Rectangle& bounds,
+                             double speed, double pause) {
+    if (kind == "waypoint") {
+        mobility.SetMobilityModel("ns3::WaypointMobilityModel", "LazyNotify", BooleanValue(true));
+        return;
+    }
+    mobility.SetMobilityModel("ns3::RandomDirection2dMobilityModel",
+                              "Bounds", RectangleValue(bounds),
+                              "Speed", StringValue("ns3::ConstantRandomVariable[Constant=" + std::to_string(speed) + "]"),
+                              "Pause", StringValue("ns3::ConstantRandomVariable[Constant=" + std::to_string(pause) + "]"));
+}
+
+uint32_t BuildMixedTopology(const TopologySpec& spec) {
+    NS_ABORT_MSG_IF(spec.routing != "olsr" && spec.routing != "aodv" && spec.routing != "global",
+                    "unknown routing backend " << spec.routing);
+    NS_ABORT_MSG_IF(spec.mobility != "random" && spec.mobility != "waypoint",
+                    "unknown mobility " << spec.mobility);
+
+    NodeContainer backbone;
+    backbone.Create(spec.backboneNodes);
+
+    WifiHelper wifi;
+    WifiMacHelper mac;
+    mac.SetType("ns3::AdhocWifiMac");
+    wifi.SetRemoteStationManager("ns3::ConstantRateWifiManager", "DataMode", StringValue("OfdmRate54Mbps"));
+
+    ChannelBackend channel(spec.channel, spec.cutoffRange);
+    channel.newChannel();
+    NetDeviceContainer backboneDevices = wifi.Install(channel.phy(), mac, backbone);
+
+    // "global" keeps the stack's default list routing (static + global)
+    InternetStackHelper internet;
+    OlsrHelper olsr;
+    AodvHelper aodv;
+    if (spec.routing == "olsr") {
+        internet.SetRoutingHelper(olsr);
+    } else if (spec.routing == "aodv") {
+        internet.SetRoutingHelper(aodv);
+    }
+    internet.Install(backbone);
+
+    Ipv4AddressHelper ipAddrs;
+    ipAddrs.SetBase(Ipv4Address("192.168.0.0"), Ipv4Mask("255.255.255.0"));
+    ipAddrs.Assign(backboneDevices);
+
+    MobilityHelper mobility;
+    mobility.SetPositionAllocator("ns3::GridPositionAllocator",
+                                  "MinX", DoubleValue(20.0),
+                                  "MinY", DoubleValue(20.0),
+                                  "DeltaX", DoubleValue(20.0),
+                                  "DeltaY", DoubleValue(20.0),
+                                  "GridWidth", UintegerValue(5),
+                                  "LayoutType", StringValue("RowFirst"));
+    setMobilityModel(mobility, spec.mobility, Rectangle(-500, 500, -500, 500), 2, 0.2);
+    mobility.Install(backbone);
+
+    // every infra network gets its own channel and a 10.0.i.0/24
+    ipAddrs.SetBase(Ipv4Address("10.0.0.0"), Ipv4Mask("255.255.255.0"));
+    for (uint32_t i = 0; i < spec.backboneNodes; i++) {
+        NodeContainer stas;
+        stas.Create(spec.infraNodes - 1);
+        NodeContainer infra(NodeContainer(backbone.Get(i)), stas);
+
+        Ssid ssid("wifi-infra" + std::to_string(i));
+        WifiHelper wifiInfra;
+        channel.newChannel();
+        WifiMacHelper macInfra;
+        macInfra.SetType("ns3::StaWifiMac", "Ssid", SsidValue(ssid));
+        NetDeviceContainer staDevices = wifiInfra.Install(channel.phy(), macInfra, stas);
+        macInfra.SetType("ns3::ApWifiMac", "Ssid", SsidValue(ssid));
+        NetDeviceContainer apDevices = wifiInfra.Install(channel.phy(), macInfra, backbone.Get(i));
+        NetDeviceContainer infraDevices(apDevices, staDevices);
+
+        internet.Install(stas);
+        ipAddrs.Assign(infraDevices);
+        ipAddrs.NewNetwork();
+
+        Ptr<ListPositionAllocator> subnetAlloc = CreateObject<ListPositionAllocator>();
+        for (uint32_t j = 0; j < infra.GetN(); j++) {
+            subnetAlloc->Add(Vector(0.0, j, 0.0));
+        }
+        // like the python builder the reference models stay pushed, only the top one is used
+        mobility.PushReferenceMobilityModel(backbone.Get(i));
+        mobility.SetPositionAllocator(subnetAlloc);
+        setMobilityModel(mobility, spec.mobility, Rectangle(-10, 10, -10, 10), 3, 0.4);
+        mobility.Install(stas);
+    }
+
+    if (spec.routing == "global") {
+        Ipv4GlobalRoutingHelper::PopulateRoutingTables();
+    }
+    return NodeList::GetNNodes();
+}
+
+void LoadWaypoints(uint32_t firstNode, uint32_t nodes, const uint32_t* counts, const int64_t* times,
+                   const double* x, const double* y) {
+    size_t k = 0;
+    for (uint32_t i = 0; i < nodes; i++) {
+        Ptr<MobilityModel> model = NodeList::GetNode(firstNode + i)->GetObject<MobilityModel>();
+        Ptr<HierarchicalMobilityModel> hierarchical = DynamicCast<HierarchicalMobilityModel>(model);
+        if (hierarchical) {
+            model = hierarchical->GetChild();
+        }
+        Ptr<WaypointMobilityModel> waypoints = DynamicCast<WaypointMobilityModel>(model);
+        NS_ABORT_MSG_IF(!waypoints, "node " << firstNode + i << " has no WaypointMobilityModel");
+        for (uint32_t j = 0; j < counts[i]; j++, k++) {
+            waypoints->AddWaypoint(Waypoint(NanoSeconds(times[k]), Vector(x[k], y[k], 0.0)));
+        }
+    }
+}
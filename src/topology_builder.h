@@ -0,0 +1,68 @@
+// topology_builder.h
+//
+// the MixedWireless backbone/infra topology built in one call from python, instead of a
+// cppyy round trip per helper call. BuildMixedTopology makes the same calls, in the same
+// order, as generator._build_topology_python, so a seeded run gives the same result
+// whichever builder made its topology.
+//
+// the native builder can also swap the routing and the channel model:
+//   routing "olsr"    proactive, HELLO/TC flooding (the default, like the python builder)
+//           "aodv"    reactive, routes only towards the destinations in use
+//           "global"  static routes computed once after addressing. every node on a
+//                     channel counts as a neighbour, and the routes never follow mobility
+//   channel "yans"    YansWifiChannel, every transmission reaches every phy on the channel
+//           "spectrum" MultiModelSpectrumChannel with the same loss and delay models
+//           "cutoff"  spectrum plus a RangePropagationLossModel: receivers further than
+//                     cutoffRange are skipped by the channel (MaxLossDb) and get no events
+//
+// and the mobility of the nodes:
+//   mobility "random"   RandomDirection2dMobilityModel, an event per leg and per pause
+//            "waypoint" WaypointMobilityModel with LazyNotify, no events; the waypoints
+//                       are precomputed (mobility.py) and handed over with LoadWaypoints
+#pragma once
+
+#include "ns3/aodv-helper.h"
+#include "ns3/core-module.h"
+#include "ns3/network-module.h"
+#include "ns3/internet-module.h"
+#include "ns3/mobility-module.h"
+#include "ns3/multi-model-spectrum-channel.h"
+#include "ns3/olsr-helper.h"
+#include "ns3/propagation-delay-model.h"
+#include "ns3/propagation-loss-model.h"
+#include "ns3/wifi-module.h"
+
+#include <cstdint>
+#include <string>
+
+using namespace ns3;
+
+struct TopologySpec {
+    uint32_t backboneNodes;
+    uint32_t infraNodes; // per backbone node, the AP (the backbone node) included
+    uint32_t lanNodes;   // the LANs are not built yet, kept for the station numbering
+    std::string routing;
+    std::string channel;
+    double cutoffRange; // meters, for channel "cutoff"
+    std::string mobility;
+
+    TopologySpec(uint32_t backbone=1, uint32_t infra=2, uint32_t lan=1,
+                 const std::string& routing="olsr", const std::string& channel="yans",
+                 double cutoffRange=250.0, const std::string& mobility="random") :
+        backboneNodes(backbone),
+        infraNodes(infra),
+        lanNodes(lan),
+        routing(routing),
+        channel(channel),
+        cutoffRange(cutoffRange),
+        mobility(mobility) {}
+};
+
+// creates the nodes, devices, addresses and mobility of spec; returns the number of nodes
+uint32_t BuildMixedTopology(const TopologySpec& spec);
+
+// adds waypoints to the WaypointMobilityModels of nodes firstNode .. firstNode + nodes - 1
+// (a station's is the child of its hierarchical model): counts[i] of them for the i-th
+// node, back to back in times (ns, strictly increasing per node), x and y
+void LoadWaypoints(uint32_t firstNode, uint32_t nodes, const uint32_t* counts, const int64_t* times,
+                   const double* x, const double* y);
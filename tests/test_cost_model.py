@@ -0,0 +1,93 @@
+import math
+
+import numpy as np
+import pytest
+
+import cost_model
+from cost_model import COSTS, FEATURES, Cost, CostModel, feature_matrix, features, longest_first, simulated_seconds
+
+
+def scenarios():
+    out = []
+    for backbone in (3, 5, 10, 20):
+        for infra in (2, 3, 5):
+            for duration in (10, 30, 60):
+                for routing in ("olsr", "aodv", "global"):
+                    for channel in ("yans", "spectrum"):
+                        out.append(dict(numofbackbone=backbone, numofInfra=infra, numofLan=1, duration=duration,
+                                        sampleCts=7, routing=routing, channel=channel))
+    return out
+
+
+def test_simulated_seconds():
+    assert simulated_seconds({"duration": 20}) == 20.0
+    # 3 s warm-up is 3 windows of 1 s, then 5 windows
+    assert simulated_seconds({"windows": 5, "sampleCts": 7, "duration": None}) == 8.0
+    assert simulated_seconds({"windows": 5, "sampleCts": 7, "duration": 6}) == 6.0
+    with pytest.raises(ValueError, match="numofbackbone"):
+        simulated_seconds({"numofbackbone": 3})
+
+
+def test_features():
+    x = features(dict(numofbackbone=4, numofInfra=3, numofLan=1, duration=20, routing="aodv"))
+    assert len(x) == len(FEATURES)
+    assert x[FEATURES.index("log_nodes")] == pytest.approx(math.log(12))
+    assert x[FEATURES.index("log_seconds")] == pytest.approx(math.log(20))
+    assert x[FEATURES.index("aodv")] == 1.0 and x[FEATURES.index("global_routing")] == 0.0
+    assert feature_matrix([]).shape == (0, len(FEATURES))
+
+
+def test_fit_recovers_the_coefficients():
+    rng = np.random.default_rng(0)
+    truth = {name: rng.normal(size=len(FEATURES)) for name in COSTS}
+    model = CostModel(prior_weight=1e-6)
+    grid = scenarios()
+    for scenario in grid:
+        x = features(scenario)
+        model.update(scenario, Cost(*(math.exp(x @ truth[name]) for name in COSTS)))
+    assert model.observations == {name: len(grid) for name in COSTS}
+
+    scenario = dict(numofbackbone=7, numofInfra=4, numofLan=1, duration=45, sampleCts=7, routing="aodv")
+    expected = np.exp(features(scenario) @ truth["wall"])
+    assert model.predict(scenario).wall == pytest.approx(expected, rel=1e-3)
+    # the interferer and trace mode flags never vary in the grid: the prior keeps them
+    index = FEATURES.index("device_traces")
+    assert model.coefficients("wall")[index] == pytest.approx(cost_model.PRIOR["wall"][index], abs=1e-3)
+
+
+def test_prior_alone_ranks_bigger_scenarios_higher():
+    model = CostModel()
+    small = dict(numofbackbone=3, numofInfra=3, numofLan=1, duration=10)
+    large = dict(numofbackbone=20, numofInfra=5, numofLan=1, duration=60)
+    assert model.predict(large).wall > model.predict(small).wall
+    assert longest_first([small, large, small], model) == [1, 0, 2]
+    matrix = feature_matrix([small, large])
+    assert longest_first([small, large], model, matrix) == [1, 0]
+
+
+def test_missing_costs_are_skipped():
+    model = CostModel()
+    model.update(dict(numofbackbone=3, numofInfra=3, duration=10), Cost(wall=2.0, events=None, memory_mb=0))
+    assert model.observations == {"wall": 1, "events": 0, "memory_mb": 0}
+
+
+def test_observe_ignores_cache_hits():
+    model = CostModel()
+    report = {"phases": {"run": {"wall": 2.0}}, "events_executed": 100, "heap_mb": 5.0, "cache_hit": True}
+    model.observe(dict(numofbackbone=3, numofInfra=3, duration=10), report)
+    assert model.observations["wall"] == 0
+    model.observe(dict(numofbackbone=3, numofInfra=3, duration=10), dict(report, cache_hit=False))
+    assert model.observations == {"wall": 1, "events": 1, "memory_mb": 1}
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "costs.json")
+    assert CostModel.load(path).observations["wall"] == 0
+    model = CostModel()
+    for scenario in scenarios()[:10]:
+        model.update(scenario, Cost(wall=scenario["duration"] / 10.0, events=1000.0, memory_mb=50.0))
+    model.save(path)
+    loaded = CostModel.load(path)
+    assert loaded.observations == model.observations
+    matrix = feature_matrix(scenarios())
+    np.testing.assert_allclose(loaded.predict_many(matrix), model.predict_many(matrix))
@@ -0,0 +1,76 @@
+import gzip
+import json
+import os
+
+import numpy as np
+import pytest
+
+from dataset_writer import DatasetWriter
+from results import WINDOW_DTYPE, WindowResult
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def make_result(windows=3):
+    records = np.zeros(windows, dtype=WINDOW_DTYPE)
+    records["windowStart"] = np.arange(windows)
+    records["rxSum"] = np.arange(windows) * 10.0
+    records["rxCount"] = np.arange(windows)
+    return WindowResult(records, 1.0)
+
+
+def read_parquet(directory):
+    manifest = json.load(open(os.path.join(directory, "manifest.json")))
+    shards = [s["path"] for s in manifest["shards"] if s["format"] == "parquet"]
+    return manifest, [pq.read_table(os.path.join(directory, name)) for name in shards]
+
+
+def test_first_run_without_windows(tmp_path):
+    directory = str(tmp_path)
+    with DatasetWriter(directory, formats=("parquet",)) as writer:
+        writer.write(make_result(0), {"seed": None, "numofbackbone": 3})
+        writer.write(make_result(3), {"seed": 4, "numofbackbone": 3})
+    manifest, (table,) = read_parquet(directory)
+    assert table.num_rows == 3
+    assert str(table.schema.field("rxSum").type) == "double"
+    assert str(table.schema.field("rxCount").type) == "int32"
+    assert table.column("seed").to_pylist() == ["4"] * 3
+    assert [run["rows"] for run in manifest["runs"]] == [0, 3]
+
+
+def test_new_scenario_keys_start_a_shard(tmp_path):
+    directory = str(tmp_path)
+    with DatasetWriter(directory, formats=("jsonl", "parquet")) as writer:
+        writer.write(make_result(), {"numofbackbone": 3, "routing": "aodv"})
+        # fewer keys fit the shard, with nulls
+        writer.write(make_result(), {"numofbackbone": 4})
+        writer.write(make_result(), {"numofbackbone": 5, "cache": object()})
+    manifest, tables = read_parquet(directory)
+    assert [t.num_rows for t in tables] == [6, 3]
+    assert tables[0].column("routing").to_pylist() == ["aodv"] * 3 + [None] * 3
+    assert tables[1].column("cache").to_pylist()[0].startswith("<object")
+    assert [run["shards"]["parquet"] for run in manifest["runs"]] == \
+        ["part-00000.parquet", "part-00000.parquet", "part-00001.parquet"]
+    # jsonl has no schema, one shard holds them all
+    with gzip.open(os.path.join(directory, "part-00000.jsonl.gz")) as f:
+        assert len(f.readlines()) == 3
+
+
+def test_mixed_result_forms(tmp_path):
+    directory = str(tmp_path)
+    with DatasetWriter(directory, formats=("parquet",)) as writer:
+        writer.write(make_result(), {"seed": 1})
+        writer.write(make_result().field_mapping(base_time=0), {"seed": 2})
+        writer.write(make_result(2), {"seed": 3})
+    _, tables = read_parquet(directory)
+    assert [t.num_rows for t in tables] == [3, 3, 2]
+    assert str(tables[1].schema.field("timestamp").type) == "int64"
+    assert str(tables[1].schema.field("radio_rx_bits").type) == "double"
+
+
+def test_exit_keeps_the_exception_in_flight(tmp_path):
+    with pytest.raises(KeyError):
+        with DatasetWriter(str(tmp_path)) as writer:
+            writer.write(make_result(), {"seed": 1})
+            raise KeyError("in flight")
+    assert os.path.exists(os.path.join(str(tmp_path), "manifest.json"))
@@ -0,0 +1,145 @@
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+
+import sweep
+from generation_job import GenerationJob, run_number, scenario_id, shard_of
+from results import WINDOW_DTYPE, WindowResult
+
+
+GRID = [dict(numofbackbone=b, numofInfra=3, numofLan=1, duration=20, sampleCts=7) for b in (3, 4, 5, 6)]
+
+
+@pytest.fixture
+def fake_runs(monkeypatch):
+    # drive() in this process, with a result per scenario instead of an ns-3 run
+    calls = []
+
+    def run_scenario(item):
+        ident, scenario = item
+        calls.append(scenario)
+        if scenario["numofbackbone"] == 5:
+            return ident, scenario, None, "RuntimeError: no"
+        records = np.zeros(2, dtype=WINDOW_DTYPE)
+        records["rxSum"] = scenario["numofbackbone"]
+        return ident, scenario, WindowResult(records, 1.0), None
+
+    monkeypatch.setattr(sweep, "_init_worker", lambda: None)
+    monkeypatch.setattr(sweep, "_run_scenario", run_scenario)
+    return calls
+
+
+def test_scenario_id_is_stable():
+    assert scenario_id({"a": 1, "b": [2, 3]}) == scenario_id({"b": (2.0, 3), "a": 1.0})
+    assert scenario_id({"a": 1}) != scenario_id({"a": 2})
+    ident = scenario_id(GRID[0])
+    assert 0 < run_number(ident) < 2 ** 60 + 1
+    assert 0 <= shard_of(ident, 4) < 4
+
+
+def test_create_rejects_objects_and_drops_profile(tmp_path):
+    with pytest.raises(ValueError, match="cache"):
+        GenerationJob.create(str(tmp_path / "a"), [dict(GRID[0], cache=object())])
+    job = GenerationJob.create(str(tmp_path / "b"), [dict(GRID[0], profile=True, seed=np.int64(2))])
+    (scenario,) = job.scenarios.values()
+    assert "profile" not in scenario
+    assert scenario["seed"] == 2 and type(scenario["seed"]) is int
+
+
+def test_create_reopens_the_same_job_only(tmp_path):
+    GenerationJob.create(str(tmp_path), GRID, seed=3)
+    assert set(GenerationJob.create(str(tmp_path), GRID[::-1], seed=3).scenarios) == {scenario_id(s) for s in GRID}
+    with pytest.raises(ValueError):
+        GenerationJob.create(str(tmp_path), GRID, seed=4)
+    with pytest.raises(ValueError):
+        GenerationJob.create(str(tmp_path), GRID[:2], seed=3)
+
+
+def test_arguments(tmp_path):
+    job = GenerationJob.create(str(tmp_path), [GRID[0], dict(GRID[1], seed=9)], seed=3)
+    first, second = (job.arguments(scenario_id(s)) for s in (GRID[0], dict(GRID[1], seed=9)))
+    assert first["seed"] == 3 and first["run"] == run_number(scenario_id(GRID[0]))
+    assert second["seed"] == 9
+    assert first["result_format"] == "windows"
+
+
+def test_claim_is_exclusive(tmp_path):
+    job = GenerationJob.create(str(tmp_path), GRID)
+    other = GenerationJob(str(tmp_path))
+    ident = scenario_id(GRID[0])
+    assert job.claim(ident)
+    assert not other.claim(ident)
+    job.release(ident)
+    assert other.claim(ident)
+
+
+def test_stale_claims_are_taken_over(tmp_path):
+    job = GenerationJob.create(str(tmp_path), GRID)
+    ident = scenario_id(GRID[0])
+    claim = os.path.join(str(tmp_path), "claims", ident)
+
+    # a process of this host that no longer exists
+    with open(claim, "w") as f:
+        json.dump({"host": job.host, "pid": 2 ** 22 + 12345, "time": time.time()}, f)
+    assert job.claim(ident)
+
+    # another host's claim holds until claim_timeout
+    with open(claim, "w") as f:
+        json.dump({"host": "elsewhere", "pid": 1, "time": time.time() - 60}, f)
+    assert not GenerationJob(str(tmp_path)).claim(ident)
+    assert GenerationJob(str(tmp_path), claim_timeout=30).claim(ident)
+
+
+def test_done_scenarios_are_not_claimed(tmp_path):
+    job = GenerationJob.create(str(tmp_path), GRID)
+    ident = scenario_id(GRID[0])
+    assert job.claim(ident)
+    job.complete(ident, WindowResult(np.zeros(1, dtype=WINDOW_DTYPE), 1.0))
+    assert not job.claim(ident)
+    assert ident not in job.pending()
+
+
+def test_drive_and_resume(tmp_path, fake_runs):
+    job = GenerationJob.create(str(tmp_path), GRID, seed=1)
+    assert job.drive() == 4
+    assert job.status() == {"scenarios": 4, "done": 3, "failed": 1, "running": 0, "pending": 0}
+    result = job.result(scenario_id(GRID[0]))
+    np.testing.assert_array_equal(result["rxSum"], [3, 3])
+    with open(os.path.join(str(tmp_path), "manifest.json")) as f:
+        assert len(json.load(f)["scenarios"]) == 4
+
+    # resuming runs nothing, unless failed scenarios are retried
+    del fake_runs[:]
+    assert GenerationJob(str(tmp_path)).drive() == 0
+    assert fake_runs == []
+    assert GenerationJob(str(tmp_path)).drive(retry_failed=True) == 1
+    assert [s["numofbackbone"] for s in fake_runs] == [5]
+
+
+def test_drive_one_shard(tmp_path, fake_runs):
+    job = GenerationJob.create(str(tmp_path), GRID, num_shards=2)
+    shard = shard_of(scenario_id(GRID[0]), 2)
+    expected = [s for s in GRID if shard_of(scenario_id(s), 2) == shard]
+    assert job.drive(shard=shard) == len(expected)
+    assert sorted(s["numofbackbone"] for s in fake_runs) == sorted(s["numofbackbone"] for s in expected)
+    assert len(job.pending()) == len(GRID) - len(expected)
+
+
+def test_a_result_that_cannot_be_stored_fails_the_scenario(tmp_path, monkeypatch):
+    job = GenerationJob.create(str(tmp_path), GRID)
+    ident = scenario_id(GRID[0])
+
+    def full_disk(*args, **kwargs):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(np, "save", full_disk)
+    assert job.claim(ident)
+    job.complete(ident, WindowResult(np.zeros(1, dtype=WINDOW_DTYPE), 1.0))
+    (record,) = job.records()
+    assert record["status"] == "failed"
+    assert "No space left on device" in record["error"]
+    assert job.result(ident) is None
+    assert ident in job.pending(retry_failed=True)
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import multiprocessing as mp
+
+import numpy as np
+
+from generation_service import GenerationService, _read_request, _recv
+from results import WINDOW_DTYPE, WindowResult
+
+
+async def exchange(service, raw):
+    """send raw bytes to service._handle over a local socket, return the status and body"""
+    server = await asyncio.start_server(service._handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(raw)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), head.decode(), body
+
+
+def post(body, path="/generate", length=None):
+    length = len(body) if length is None else length
+    return b"POST %s HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (path.encode(), length, body)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_read_request():
+    async def parse():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"POST /generate?x=1 HTTP/1.1\r\nHost: a\r\nContent-Length: 2\r\n\r\n{}")
+        reader.feed_eof()
+        return await _read_request(reader)
+
+    method, path, headers, body = run(parse())
+    assert (method, path, body) == ("POST", "/generate", b"{}")
+    assert headers["host"] == "a"
+
+
+def test_errors_before_any_run():
+    async def check():
+        service = GenerationService(workers=1)
+        assert (await exchange(service, b"GET /nowhere HTTP/1.1\r\n\r\n"))[0] == 404
+        assert (await exchange(service, b"GET /generate HTTP/1.1\r\n\r\n"))[0] == 405
+        assert (await exchange(service, post(b"[1, 2]")))[0] == 400
+        assert (await exchange(service, b"nonsense\r\n\r\n"))[0] == 400
+        for timeout in ('"5"', "[1]", "true", "0", "-3", "1e999"):
+            body = b'{"numofbackbone": 3, "timeout": %s}' % timeout.encode()
+            status, _, reply = await exchange(service, post(body))
+            assert status == 400, timeout
+            assert "timeout" in json.loads(reply)["error"]
+        assert service._queue.qsize() == 0
+        status, head, body = await exchange(service, b"GET /status HTTP/1.1\r\n\r\n")
+        assert status == 200
+        assert json.loads(body)["queue_size"] == 16
+
+    run(check())
+
+
+def test_body_over_max_body_is_refused_unread():
+    async def check():
+        service = GenerationService(workers=1, max_body=64)
+        # the announced length alone decides, the body is never read
+        status, _, body = await exchange(service, post(b"{}", length=1 << 30))
+        assert status == 413
+        assert "64" in json.loads(body)["error"]
+        # a body that fits is read and parsed: not an object, so 400
+        assert (await exchange(service, post(b" " * 60 + b"[]")))[0] == 400
+
+    run(check())
+
+
+def test_full_queue_answers_503():
+    async def check():
+        service = GenerationService(workers=1, queue_size=1)
+        # nothing takes requests off the queue without started workers
+        service._queue.put_nowait(object())
+        status, head, _ = await exchange(service, post(json.dumps({"numofbackbone": 3}).encode()))
+        assert status == 503
+        assert "Retry-After: 1" in head
+
+    run(check())
+
+
+def test_streams_the_windows_of_a_run():
+    async def check():
+        service = GenerationService(workers=1)
+
+        async def serve():
+            # a worker slot that answers every request with two steps
+            request = await service._queue.get()
+            assert request.params == {"numofbackbone": 3}
+            records = np.zeros(2, dtype=WINDOW_DTYPE)
+            records["rxSum"] = [1.0, 2.0]
+            await service._deliver(request, ("windows", WindowResult(records, 1.0)))
+            await service._deliver(request, ("windows", WindowResult(records[:1], 1.0)))
+            await service._deliver(request, ("done", 3, 0.0))
+
+        slot = asyncio.create_task(serve())
+        status, head, body = await exchange(service, post(b'{"numofbackbone": 3, "timeout": 5}'))
+        await slot
+        assert status == 200
+        assert "Transfer-Encoding: chunked" in head
+        lines = []
+        while body:
+            size, _, rest = body.partition(b"\r\n")
+            size = int(size, 16)
+            if size == 0:
+                break
+            lines.append(json.loads(rest[:size]))
+            body = rest[size + 2:]
+        assert [line.get("windows") for line in lines] == [2, 1, 3]
+        assert lines[0]["metrics"]["rxSum"] == [1.0, 2.0]
+        assert lines[-1]["done"] is True
+
+    run(check())
+
+
+def _send_large(conn):
+    conn.send(b"x" * (8 << 20))
+
+
+def test_recv_large_message_leaves_the_loop_free():
+    async def check():
+        parent, child = mp.Pipe()
+        sender = mp.get_context("spawn").Process(target=_send_large, args=(child,))
+        sender.start()
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        ticker = asyncio.create_task(tick())
+        message = await _recv(parent, timeout=30)
+        ticker.cancel()
+        sender.join()
+        assert len(message) == 8 << 20
+        assert ticks > 1
+
+    run(check())
+
+
+def test_recv_times_out_while_nothing_arrives():
+    async def check():
+        parent, _child = mp.Pipe()
+        try:
+            await _recv(parent, timeout=0.05)
+        except asyncio.TimeoutError:
+            return
+        raise AssertionError("no timeout")
+
+    run(check())
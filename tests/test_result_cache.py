@@ -0,0 +1,80 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from result_cache import ResultCache, _normalize
+from results import WINDOW_DTYPE, DeviceWindows, WindowResult
+
+
+def make_result(windows=4, time_window=1.0):
+    records = np.zeros(windows, dtype=WINDOW_DTYPE)
+    records["windowStart"] = np.arange(windows) * time_window
+    records["rxSum"] = np.arange(windows) * 100.0
+    return WindowResult(records, time_window, simulated_seconds=windows * time_window)
+
+
+def test_key_normalizes_numbers_and_sequences(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    assert cache.key(duration=10, seed=1) == cache.key(duration=10.0, seed=1)
+    assert cache.key(resolutions=(7, 14)) == cache.key(resolutions=[7, 14])
+    assert cache.key(duration=10, seed=1) == cache.key(seed=1, duration=10)
+    assert cache.key(duration=10, seed=1) != cache.key(duration=10, seed=2)
+
+
+def test_key_keeps_list_order_and_allows_none(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    assert cache.key(resolutions=[7, 14]) != cache.key(resolutions=[14, 7])
+    assert cache.key(converge=[None, "rxSum"]) != cache.key(converge=["rxSum", None])
+
+
+def test_normalize_rejects_objects():
+    assert _normalize({"b": [1, None], "a": True}) == {"b": [1.0, None], "a": True}
+    with pytest.raises(TypeError):
+        _normalize(object())
+
+
+def test_round_trip(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    result = make_result()
+    result.rollups = {2.0: make_result(2, 2.0)}
+    result.devices = [DeviceWindows(3, 1, make_result())]
+    key = cache.key(duration=4, seed=1)
+    assert cache.get(key) is None
+
+    cache.put(key, result, {"duration": 4, "seed": 1})
+    loaded = cache.get(key)
+    assert isinstance(loaded.records, np.memmap)
+    np.testing.assert_array_equal(loaded.records, result.records)
+    assert loaded.time_window == 1.0
+    assert loaded.simulated_seconds == 4.0
+    np.testing.assert_array_equal(loaded.rollups[2.0].records, result.rollups[2.0].records)
+    assert (loaded.devices[0].node, loaded.devices[0].device) == (3, 1)
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_damaged_entry_is_a_miss(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put("k", make_result())
+    os.remove(os.path.join(str(tmp_path), "k", "records.npy"))
+    assert cache.get("k") is None
+    assert not os.path.exists(os.path.join(str(tmp_path), "k"))
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    for name in ("a", "b", "c"):
+        cache.put(name, make_result())
+    # mtime resolution: spread the uses out explicitly
+    now = time.time()
+    for age, name in enumerate(("b", "c", "a")):
+        os.utime(os.path.join(str(tmp_path), name, "meta.json"), (now - 10 + age, now - 10 + age))
+
+    size = cache.entries()[0][1]
+    cache.evict(2 * size)
+    assert sorted(key for _, _, key in cache.entries()) == ["a", "c"]
+    assert cache.evictions == 1
+
+    cache.clear()
+    assert cache.entries() == []
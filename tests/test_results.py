@@ -0,0 +1,93 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from results import (FIELD_MAPPING_KEYS, SKETCH_ACCURACY, SKETCH_BUCKETS, SKETCH_GAMMA, SKETCH_KINDS,
+                     WINDOW_DTYPE, WindowResult, check_window_layout, sketch_quantiles)
+
+
+def make_result(windows=3):
+    records = np.zeros(windows, dtype=WINDOW_DTYPE)
+    records["windowStart"] = np.arange(windows) * 1.5
+    records["rxSum"] = [100.0, 200.0, 300.0][:windows]
+    records["txSum"] = [10.0, 20.0, 30.0][:windows]
+    records["RadioRXBitsPeak"] = [7, 8, 9][:windows]
+    records["RadioTXBitsPeak"] = [3, 4, 6][:windows]
+    records["channelBusyRate"] = [0.25, 0.5, 0.75][:windows]
+    return WindowResult(records, 1.5, simulated_seconds=4.5)
+
+
+def test_reduce_copies_a_view_it_does_not_own():
+    result = make_result()
+    # a view into a bigger buffer, as the records of a tracker buffer are
+    backing = np.zeros(6, dtype=WINDOW_DTYPE)
+    backing[1:4] = result.records
+    result.records = backing[1:4]
+    result.sketches = np.ones((3, len(SKETCH_KINDS), SKETCH_BUCKETS), dtype=np.uint32)
+
+    cls, args = result.__reduce__()
+    assert cls is WindowResult
+    assert not np.shares_memory(args[0], backing)
+
+    copy = pickle.loads(pickle.dumps(result))
+    np.testing.assert_array_equal(copy.records, result.records)
+    np.testing.assert_array_equal(copy.sketches, result.sketches)
+    assert copy.time_window == 1.5
+    assert copy.simulated_seconds == 4.5
+
+
+def test_field_mapping():
+    mapping = make_result().field_mapping(base_time=1000)
+    assert list(mapping) == FIELD_MAPPING_KEYS
+    # 180 s of timestamp per second of window start, truncated to whole seconds
+    assert [t for t, _ in mapping["radio_rx_bits"]] == [1000, 1180, 1540]
+    assert [v for _, v in mapping["radio_rx_bits"]] == ["100.0", "200.0", "300.0"]
+    assert [v for _, v in mapping["radio_tx_bits"]] == ["10.0", "20.0", "30.0"]
+    assert [v for _, v in mapping["channel_throughput"]] == ["5", "6", "7"]
+    assert [v for _, v in mapping["ap_status"]] == ["1", "1", "1"]
+    assert [v for _, v in mapping["channel_busy_rate"]] == ["0.25", "0.5", "0.75"]
+
+
+def test_columns_and_length():
+    result = make_result()
+    assert len(result) == 3
+    assert result.fields == list(WINDOW_DTYPE.names)
+    np.testing.assert_array_equal(result["rxSum"], [100.0, 200.0, 300.0])
+
+
+def test_check_window_layout():
+    layout = [WINDOW_DTYPE.fields[name][1] for name in WINDOW_DTYPE.names] + [WINDOW_DTYPE.itemsize]
+    check_window_layout(layout)
+    with pytest.raises(RuntimeError):
+        check_window_layout(layout[:-1] + [layout[-1] + 8])
+
+
+def test_sketch_quantiles():
+    counts = np.zeros((2, SKETCH_BUCKETS))
+    counts[0, 100] = 10
+    q = sketch_quantiles(counts, [0.5])
+    assert q.shape == (2, 1)
+    assert q[0, 0] > 0 and np.isnan(q[1, 0])
+
+
+def test_sketch_quantiles_at_one():
+    # QuantileSketch::add puts 1.0 in bucket 1, [1, gamma]; 0 goes to bucket 0
+    counts = np.zeros(SKETCH_BUCKETS)
+    counts[1] = 5
+    (estimate,) = sketch_quantiles(counts, [0.5])
+    # with gamma = 1.02 / 0.98 the bucket value 2 gamma / (gamma + 1) is 1 + accuracy
+    assert estimate == pytest.approx(1.02)
+    assert abs(estimate - 1.0) <= SKETCH_ACCURACY * (1 + 1e-9)
+    counts[0] = 10
+    assert sketch_quantiles(counts, [0.5])[0] == 0.0
+
+
+def test_sketch_buckets_bound_the_relative_error():
+    for bucket in range(1, SKETCH_BUCKETS):
+        counts = np.zeros(SKETCH_BUCKETS)
+        counts[bucket] = 1
+        (estimate,) = sketch_quantiles(counts, [0.5])
+        # both ends of (gamma^(i-1), gamma^i] are within the accuracy of the estimate
+        for value in (SKETCH_GAMMA ** (bucket - 1), SKETCH_GAMMA ** bucket):
+            assert abs(estimate - value) <= SKETCH_ACCURACY * value * (1 + 1e-9)
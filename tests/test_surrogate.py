@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from results import WINDOW_DTYPE, WindowResult
+from surrogate import (SurrogateLibrary, SurrogateMixedWireless, SurrogateModel, class_key, normal_cdf,
+                       normal_ppf, scenario_class, validation_report)
+
+
+SCENARIO = dict(numofbackbone=3, numofInfra=3, numofLan=1, sampleCts=7)
+
+
+def fake_runs(runs=8, windows=40, seed=0):
+    """runs with a correlated, autocorrelated rx/tx load and a constant column"""
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(runs):
+        records = np.zeros(windows, dtype=WINDOW_DTYPE)
+        records["windowStart"] = np.arange(windows)
+        load = np.empty(windows)
+        load[0] = rng.normal()
+        for t in range(1, windows):
+            load[t] = 0.8 * load[t - 1] + 0.6 * rng.normal()
+        records["rxSum"] = np.exp(5 + load)
+        records["txSum"] = np.exp(4 + load + 0.1 * rng.normal(size=windows))
+        records["rxCount"] = rng.integers(1, 50, windows)
+        records["ratioAssociationClientsPeak"] = 2
+        out.append(WindowResult(records, 1.0, simulated_seconds=float(windows)))
+    return out
+
+
+def test_normal_cdf_and_ppf_invert():
+    p = np.linspace(0.001, 0.999, 101)
+    np.testing.assert_allclose(normal_cdf(normal_ppf(p)), p, atol=1e-6)
+    assert normal_ppf(np.array([0.5]))[0] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_scenario_class():
+    assert scenario_class(SCENARIO)["routing"] == "olsr"
+    assert scenario_class(SCENARIO)["cutoff_range"] is None
+    assert class_key(SCENARIO) == class_key(dict(SCENARIO, seed=4, duration=60))
+    assert class_key(SCENARIO) != class_key(dict(SCENARIO, routing="aodv"))
+    with pytest.raises(ValueError):
+        scenario_class({"numofbackbone": 3})
+
+
+def test_fit_and_sample():
+    runs = fake_runs()
+    model = SurrogateModel.fit(runs, warmup=3.0, scenario=scenario_class(SCENARIO))
+    assert model.first_window == 3
+    assert "ratioAssociationClientsPeak" in model.constants
+    assert "rxSum" in model.fields and "windowStart" not in model.fields
+
+    sample = model.sample(windows=40, runs=200, seed=1)
+    assert sample.shape == (200, 40)
+    np.testing.assert_array_equal(sample["windowStart"][0], np.arange(40))
+    assert (sample["ratioAssociationClientsPeak"] == 2).all()
+    # only values seen in the real runs come out of the marginals
+    assert np.isin(sample["rxSum"][:, 3:], model.marginals["rxSum"]).all()
+    # the coupling of rx and tx survives
+    steady = sample[:, 3:]
+    assert np.corrcoef(np.log(steady["rxSum"].ravel()), np.log(steady["txSum"].ravel()))[0, 1] > 0.8
+
+    report = validation_report(model, fake_runs(seed=1), runs=200)
+    assert report["rxSum"]["ks"] < 0.2
+    assert report["rxSum"]["rank_lag1"][1] > 0.5
+
+
+def test_sample_is_seeded():
+    model = SurrogateModel.fit(fake_runs())
+    np.testing.assert_array_equal(model.sample(20, 3, seed=5), model.sample(20, 3, seed=5))
+
+
+def test_fit_needs_steady_windows():
+    with pytest.raises(ValueError):
+        SurrogateModel.fit([])
+    with pytest.raises(ValueError):
+        SurrogateModel.fit(fake_runs(windows=4), warmup=3.0)
+
+
+def test_save_and_load(tmp_path):
+    model = SurrogateModel.fit(fake_runs(), scenario=scenario_class(SCENARIO))
+    path = str(tmp_path / "model.npz")
+    model.save(path)
+    loaded = SurrogateModel.load(path)
+    assert loaded.fields == model.fields
+    assert loaded.scenario == model.scenario
+    np.testing.assert_array_equal(loaded.sample(30, 4, seed=2), model.sample(30, 4, seed=2))
+
+
+def test_constant_runs_save_and_load(tmp_path):
+    runs = fake_runs()
+    for run in runs:
+        for name in ("rxSum", "txSum", "rxCount"):
+            run.records[name] = 0
+    model = SurrogateModel.fit(runs)
+    assert model.fields == []
+    path = str(tmp_path / "constant.npz")
+    model.save(path)
+    loaded = SurrogateModel.load(path)
+    assert loaded.fields == []
+    assert (loaded.sample(10, 2)["ratioAssociationClientsPeak"] == 2).all()
+
+
+def test_library(tmp_path):
+    library = SurrogateLibrary(str(tmp_path))
+    with pytest.raises(KeyError):
+        library.get(SCENARIO)
+    library.fit(SCENARIO, seeds=(), duration=40, results=fake_runs())
+
+    out = SurrogateMixedWireless(3, 3, 1, 20, 7, seed=1, result_format="windows", library=str(tmp_path))
+    assert len(out) == 20 and out.simulated_seconds == 20.0
+    mapping = SurrogateMixedWireless(3, 3, 1, 20, 7, seed=1, library=library)
+    assert len(mapping["radio_rx_bits"]) == 20